@@ -9,3 +9,38 @@ ADMIN_ID = os.getenv("ADMIN_ID")
 DATABASE_URL = os.getenv("DATABASE_URL")
 CHAT_ID = os.getenv("CHAT_ID")   # Додайте сюди ID чату для сповіщень
 
+FSM_STORAGE = os.getenv("FSM_STORAGE", "postgres")  # Сховище станів FSM: "postgres", "bounded" або "memory"
+FSM_MAX_KEYS = int(os.getenv("FSM_MAX_KEYS", "10000"))  # Максимум ключів для сховища "bounded"
+FSM_TTL = int(os.getenv("FSM_TTL", "3600"))  # Час життя стану за замовчуванням для "bounded", секунди
+
+# Режим зведення: сповіщення в загальний чат збираються за вікно часу в одне повідомлення
+NOTIFY_DIGEST = os.getenv("NOTIFY_DIGEST", "false").lower() in ("1", "true", "yes")
+NOTIFY_DIGEST_WINDOW = int(os.getenv("NOTIFY_DIGEST_WINDOW", "900"))  # Вікно зведення за замовчуванням, секунди
+# Окремі вікна для типів подій, наприклад "work_start=600,other_work=3600"
+NOTIFY_DIGEST_WINDOWS = {
+    event_type.strip(): int(window)
+    for event_type, window in (
+        item.split("=", 1) for item in os.getenv("NOTIFY_DIGEST_WINDOWS", "").split(",") if "=" in item
+    )
+}
+# Типи подій, які завжди відправляються одразу, навіть у режимі зведення
+NOTIFY_DIGEST_BYPASS = [
+    event_type.strip() for event_type in os.getenv("NOTIFY_DIGEST_BYPASS", "drying_finish").split(",")
+    if event_type.strip()
+]
+NOTIFY_RETENTION_DAYS = int(os.getenv("NOTIFY_RETENTION_DAYS", "7"))  # Скільки днів зберігати доставлені сповіщення
+
+REPORT_JOBS_CONCURRENCY = int(os.getenv("REPORT_JOBS_CONCURRENCY", "2"))  # Скільки звітів формується одночасно
+# Процеси для важких етапів побудови звітів; 0 - виконувати в потоці замість окремих процесів
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_WORKER_QUEUE = int(os.getenv("REPORT_WORKER_QUEUE", "8"))  # Скільки задач може чекати на вільний процес
+
+# Автоматичний звіт за попередній місяць у загальний чат
+MONTHLY_REPORT = os.getenv("MONTHLY_REPORT", "true").lower() in ("1", "true", "yes")
+MONTHLY_REPORT_HOUR = int(os.getenv("MONTHLY_REPORT_HOUR", "3"))  # Година першого числа місяця, коли готується звіт
+
+# Конфігурація повнотекстового пошуку Postgres ("simple" або, якщо встановлено словник, "ukrainian")
+FTS_CONFIG = os.getenv("FTS_CONFIG", "simple")
+
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "30"))  # Скільки секунд кешуються відповіді на inline-запити
+INLINE_SNAPSHOT_INTERVAL = int(os.getenv("INLINE_SNAPSHOT_INTERVAL", "30"))  # Як часто оновлювати дані для inline, секунди
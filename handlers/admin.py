@@ -1,7 +1,18 @@
+import datetime
+import html
+import os
+import tempfile
+
 from aiogram import Router
-from aiogram.types import CallbackQuery
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, FSInputFile, Message
 
 from services.db import approve_user, reject_user
+from services.export import EXPORT_FORMATS, export_work_data
+from services.importer import MAX_FILE_SIZE, ImportValidationError, import_work_logs
+from services.metrics import metrics
+from services.partner_index import invalidate_partner_index
+from utils.helpers import is_admin
 
 admin_router = Router()
 
@@ -10,9 +21,8 @@ admin_router = Router()
 async def approve_user_handler(callback: CallbackQuery):
     user_id = int(callback.data.split("_")[1])
     await approve_user(user_id)
-    await callback.bot.send_chat_action(user_id, "typing")
+    invalidate_partner_index()
     await callback.bot.send_message(user_id, "Ваш запит схвалено! Тепер ви можете користуватися ботом.")
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.answer("Користувача схвалено!")
     await callback.message.edit_text(f"✅ Користувача {user_id} схвалено!")
 
@@ -21,8 +31,103 @@ async def approve_user_handler(callback: CallbackQuery):
 async def reject_user_handler(callback: CallbackQuery):
     user_id = int(callback.data.split("_")[1])
     await reject_user(user_id)
-    await callback.bot.send_chat_action(user_id, "typing")
+    invalidate_partner_index()
     await callback.bot.send_message(user_id, "Ваш запит відхилено.")
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.answer("Користувача відхилено!")
     await callback.message.edit_text(f"❌ Користувача {user_id} відхилено!")
+
+
+@admin_router.message(Command("metrics"))
+async def show_metrics(message: Message):
+    """Показує адміністратору поточні показники роботи бота"""
+    if message.chat.type != "private" or not is_admin(message.from_user.id):
+        return
+
+    snapshot = metrics.snapshot()
+    if not snapshot:
+        await message.answer("📈 <b>Показники ще не зібрано.</b>", parse_mode="HTML")
+        return
+
+    lines = [f"<code>{name}</code>: {value}" for name, value in snapshot.items()]
+    await message.answer("📈 <b>Показники бота:</b>\n\n" + "\n".join(lines), parse_mode="HTML")
+
+
+@admin_router.message(Command("export"))
+async def export_data(message: Message, command: CommandObject):
+    """Вивантажує сирі дані про роботи за період: /export 2024-01-01 2024-12-31 [csv|xlsx]"""
+    if message.chat.type != "private" or not is_admin(message.from_user.id):
+        return
+
+    args = (command.args or "").split()
+    fmt = args.pop() if args and args[-1] in EXPORT_FORMATS else "csv"
+    try:
+        start_date, end_date = (datetime.datetime.strptime(arg, "%Y-%m-%d") for arg in args)
+    except ValueError:
+        await message.answer(
+            "ℹ️ <b>Використання:</b> <code>/export 2024-01-01 2024-12-31 [csv|xlsx]</code>",
+            parse_mode="HTML"
+        )
+        return
+    # Кінцева дата включається у період повністю
+    end_date = end_date.replace(hour=23, minute=59, second=59)
+
+    status = await message.answer("⏳ <b>Формую вивантаження...</b>", parse_mode="HTML")
+    path = None
+    try:
+        path, rows_written = await export_work_data(start_date, end_date, fmt)
+        extension = "zip" if fmt == "csv" else "xlsx"
+        filename = f"export_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{extension}"
+        await message.answer_document(
+            FSInputFile(path, filename=filename),
+            caption=f"📦 <b>Вивантаження даних</b>: {rows_written} рядків",
+            parse_mode="HTML"
+        )
+        await status.delete()
+    except Exception as e:
+        print(f"Помилка вивантаження даних: {e}")
+        await status.edit_text(f"❌ <b>Помилка вивантаження:</b> {html.escape(str(e))}", parse_mode="HTML")
+    finally:
+        if path is not None:
+            os.remove(path)
+
+
+@admin_router.message(Command("import"))
+async def import_data(message: Message):
+    """Імпортує історичні записи з CSV-файлу, надісланого з підписом /import"""
+    if message.chat.type != "private" or not is_admin(message.from_user.id):
+        return
+
+    if message.document is None:
+        await message.answer(
+            "ℹ️ <b>Надішліть CSV-файл з підписом</b> <code>/import</code>\n\n"
+            "Колонки: <code>kind,user_id,start_time,end_time,partners,packages_count,"
+            "sales_amount,results,description,duration</code>\n\n"
+            "Telegram дозволяє боту завантажувати файли до 20 МБ, більший файл розділіть на частини.",
+            parse_mode="HTML"
+        )
+        return
+
+    if message.document.file_size and message.document.file_size > MAX_FILE_SIZE:
+        await message.answer(
+            "❌ <b>Файл більший за 20 МБ, Telegram не дає боту його завантажити.</b>\n"
+            "Розділіть його на кілька файлів і імпортуйте по черзі.",
+            parse_mode="HTML"
+        )
+        return
+
+    status = await message.answer("⏳ <b>Перевіряю та імпортую файл...</b>", parse_mode="HTML")
+    fd, path = tempfile.mkstemp(prefix="import_", suffix=".csv")
+    os.close(fd)
+    try:
+        await message.bot.download(message.document, destination=path)
+        rows = await import_work_logs(path)
+        await status.edit_text(f"✅ <b>Імпортовано рядків:</b> {rows}", parse_mode="HTML")
+    except ImportValidationError as e:
+        errors = "\n".join(html.escape(error) for error in e.errors)
+        await status.edit_text(f"❌ <b>Файл не пройшов перевірку, нічого не імпортовано:</b>\n{errors}",
+                               parse_mode="HTML")
+    except Exception as e:
+        print(f"Помилка імпорту даних: {e}")
+        await status.edit_text(f"❌ <b>Помилка імпорту:</b> {html.escape(str(e))}", parse_mode="HTML")
+    finally:
+        os.remove(path)
@@ -24,31 +24,24 @@ async def show_dehydrators(message: types.Message, state: FSMContext):
 
     user_id = message.from_user.id
     if not await is_user_approved(user_id):
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer("❌ <b>У вас немає доступу до цієї функції.</b>", parse_mode="HTML")
         return
     await state.set_state(DryingSetup.selecting_dehydrator)
-    await message.bot.send_chat_action(message.chat.id, "typing")
     await message.answer("🔍 <b>Оберіть номер дегідратора:</b>", reply_markup=kb.dehydrators_with_menu_kb,
                          parse_mode="HTML")
 
 
 @dehydrator_router.message(DryingSetup.selecting_dehydrator)
 async def select_dehydrator(message: types.Message, state: FSMContext):
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
-
     if message.chat.type != "private":
         return
 
     user_id = message.from_user.id
     if not await is_user_approved(user_id):
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer("❌ <b>У вас немає доступу до цієї функції.</b>", parse_mode="HTML")
         return
 
     if message.text == "🏠 Меню" or message.text == "🏠 На головну":
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer("👋 <b>Головне меню</b>", reply_markup=kb.main_menu_kb, parse_mode="HTML")
         await state.clear()
         return
@@ -72,7 +65,6 @@ async def select_dehydrator(message: types.Message, state: FSMContext):
                 raise ValueError("Порожнє повідомлення")
 
         if dehydrator_id not in [1, 2, 3]:  # Перевірка на допустимі номери дегідраторів
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer("⚠️ <b>Будь ласка, оберіть дегідратор зі списку!</b>", parse_mode="HTML")
             return
 
@@ -81,7 +73,6 @@ async def select_dehydrator(message: types.Message, state: FSMContext):
             if session_data:
                 duration_hours = int((session_data.finish_time - session_data.start_time).total_seconds() / 3600)
 
-                await message.bot.send_chat_action(message.chat.id, "typing")
                 await message.answer(
                     f"⚠️ <b>Дегідратор {dehydrator_id} зараз зайнятий!</b>\n\n"
                     f"🕒 Включений о: <b>{session_data.start_time.strftime('%H:%M')}</b>\n"
@@ -94,7 +85,6 @@ async def select_dehydrator(message: types.Message, state: FSMContext):
 
         await state.update_data(dehydrator_id=dehydrator_id)
         await state.set_state(DryingSetup.setting_time)
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer(
             f"✅ <b>Ви обрали дегідратор {dehydrator_id}</b>\n\n"
             f"⏱ <b>Введіть тривалість сушки:</b>",
@@ -102,17 +92,13 @@ async def select_dehydrator(message: types.Message, state: FSMContext):
             parse_mode="HTML"
         )
     except (ValueError, IndexError):
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer("⚠️ <b>Будь ласка, оберіть дегідратор зі списку!</b>", parse_mode="HTML")
 
 
 @dehydrator_router.message(DryingSetup.setting_time, lambda message: message.text.startswith("⏱ "))
 async def handle_time_button(message: types.Message, state: FSMContext):
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     user_id = message.from_user.id
     if not await is_user_approved(user_id):
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer("❌ <b>У вас немає доступу до цієї функції.</b>", parse_mode="HTML")
         return
 
@@ -132,7 +118,6 @@ async def handle_time_button(message: types.Message, state: FSMContext):
             hours = int(time_text.split()[0])  # Беремо перше слово (число)
 
         if hours <= 0:
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer("⚠️ <b>Будь ласка, введіть додатнє число годин.</b>", parse_mode="HTML")
             return
 
@@ -141,8 +126,7 @@ async def handle_time_button(message: types.Message, state: FSMContext):
 
         try:
             # Передаємо години напряму, а не хвилини
-            finish_time = await start_drying(dehydrator_id, hours, message.bot, user_id)
-            await message.bot.send_chat_action(message.chat.id, "typing")
+            finish_time = await start_drying(dehydrator_id, hours, user_id)
             await message.answer(
                 f"✅ <b>СУШКА РОЗПОЧАТА!</b>\n\n"
                 f"🔹 Дегідратор: <b>№{dehydrator_id}</b>\n"
@@ -155,15 +139,12 @@ async def handle_time_button(message: types.Message, state: FSMContext):
             await state.clear()
 
         except ValueError as e:
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer(f"⚠️ <b>{str(e)}</b>", parse_mode="HTML")
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer("🔍 <b>Оберіть номер дегідратора:</b>", reply_markup=kb.dehydrators_with_menu_kb,
                                  parse_mode="HTML")
             await state.set_state(DryingSetup.selecting_dehydrator)
 
     except ValueError:
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer("⚠️ <b>Будь ласка, введіть коректне число годин.</b>", parse_mode="HTML")
 
 
@@ -174,15 +155,12 @@ async def back_to_dehydrator_selection(message: types.Message, state: FSMContext
         return
 
     await state.set_state(DryingSetup.selecting_dehydrator)
-    await message.bot.send_chat_action(message.chat.id, "typing")
     await message.answer("🔍 <b>Оберіть номер дегідратора:</b>", reply_markup=kb.dehydrators_with_menu_kb,
                          parse_mode="HTML")
 
 
 @dehydrator_router.message(DryingSetup.setting_time, F.text.in_(["🏠 Меню", "🏠 На головну"]))
 async def back_to_main_menu(message: types.Message, state: FSMContext):
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     if message.chat.type != "private":
         return
 
@@ -192,8 +170,6 @@ async def back_to_main_menu(message: types.Message, state: FSMContext):
 
 @dehydrator_router.message(DryingSetup.setting_time)
 async def process_time_input(message: types.Message, state: FSMContext):
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     # Не реагуємо на повідомлення з груп
     if message.chat.type != "private":
         return
@@ -228,7 +204,6 @@ async def process_time_input(message: types.Message, state: FSMContext):
                 # Спроба розпізнати як ціле число
                 drying_hours = int(message.text.strip())  # Вважаємо що це години
             except ValueError:
-                await message.bot.send_chat_action(message.chat.id, "typing")
                 await message.answer(
                     "⚠️ <b>Не вдалося розпізнати формат часу.</b>\n\n"
                     "Введіть час у форматі:\n"
@@ -242,7 +217,6 @@ async def process_time_input(message: types.Message, state: FSMContext):
 
         # Перевіряємо, що час більше нуля
         if drying_hours <= 0:
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer("⚠️ <b>Будь ласка, введіть додатній час сушіння.</b>", parse_mode="HTML")
             return
 
@@ -252,7 +226,7 @@ async def process_time_input(message: types.Message, state: FSMContext):
 
         try:
             # Передаємо години напряму
-            finish_time = await start_drying(dehydrator_id, drying_hours, message.bot, user_id=message.from_user.id)
+            finish_time = await start_drying(dehydrator_id, drying_hours, user_id=message.from_user.id)
 
             # Форматуємо відображення часу (години та хвилини)
             hours = int(drying_hours)
@@ -262,7 +236,6 @@ async def process_time_input(message: types.Message, state: FSMContext):
             if minutes > 0:
                 duration_text += f" {minutes} хв."
 
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer(
                 f"✅ <b>СУШКА РОЗПОЧАТА!</b>\n\n"
                 f"🔹 Дегідратор: <b>№{dehydrator_id}</b>\n"
@@ -275,15 +248,12 @@ async def process_time_input(message: types.Message, state: FSMContext):
             await state.clear()
 
         except ValueError as e:
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer(f"⚠️ <b>{str(e)}</b>", parse_mode="HTML")
-            await message.bot.send_chat_action(message.chat.id, "typing")
             await message.answer("🔍 <b>Оберіть номер дегідратора:</b>", reply_markup=kb.dehydrators_with_menu_kb,
                                  parse_mode="HTML")
             await state.set_state(DryingSetup.selecting_dehydrator)
 
     except Exception as e:
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer(
             f"⚠️ <b>Помилка обробки введеного часу:</b> {str(e)}\n\n"
             f"Будь ласка, оберіть час зі списку або введіть коректне значення.",
@@ -0,0 +1,128 @@
+import datetime
+import html
+from typing import List
+
+from aiogram import Router, types
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+from cachetools import TTLCache
+
+from config import INLINE_CACHE_TIME
+from services.snapshots import DEHYDRATOR_IDS, Snapshot, get_snapshot
+from utils.helpers import format_time
+
+# Створюємо роутер для inline-режиму
+inline_router = Router()
+
+WORK_TYPE_LABELS = {
+    "production": "🏭 Виробництво",
+    "packaging": "📦 Пакування",
+    "sales": "💰 Продаж",
+    "other_work": "📝 Інша робота",
+}
+
+# Слова запиту, за якими показується кожен результат
+RESULT_KEYWORDS = {
+    "dehydrators": ("дегідратор", "сушка", "сушіння"),
+    "shift": ("зміна", "робота", "shift"),
+    "month": ("місяць", "статистика", "звіт", "month"),
+}
+
+# (користувач, запит, версія знімка) -> готові результати
+_results = TTLCache(maxsize=5000, ttl=INLINE_CACHE_TIME)
+
+
+@inline_router.inline_query()
+async def inline_status(inline_query: types.InlineQuery):
+    """Обробник inline-запитів: відповідає лише з даних знімка, без звернень до БД"""
+    snapshot = get_snapshot()
+    user_id = inline_query.from_user.id
+    if snapshot is None or user_id not in snapshot.approved:
+        await inline_query.answer([], cache_time=INLINE_CACHE_TIME, is_personal=True)
+        return
+
+    query = inline_query.query.strip().lower()
+    cache_key = (user_id, query, snapshot.version)
+    results = _results.get(cache_key)
+    if results is None:
+        results = build_inline_results(snapshot, user_id, query, datetime.datetime.now())
+        _results[cache_key] = results
+
+    await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=True)
+
+
+def build_inline_results(snapshot: Snapshot, user_id: int, query: str,
+                         now: datetime.datetime) -> List[InlineQueryResultArticle]:
+    """Формує результати, що відповідають запиту"""
+    builders = {
+        "dehydrators": _dehydrators_result,
+        "shift": _shift_result,
+        "month": _month_result,
+    }
+    return [
+        build(snapshot, user_id, now)
+        for result_id, build in builders.items()
+        if not query or any(query in keyword for keyword in RESULT_KEYWORDS[result_id])
+    ]
+
+
+def _article(result_id: str, title: str, description: str, text: str) -> InlineQueryResultArticle:
+    return InlineQueryResultArticle(
+        id=result_id,
+        title=title,
+        description=description,
+        input_message_content=InputTextMessageContent(message_text=text, parse_mode="HTML"),
+    )
+
+
+def _dehydrators_result(snapshot: Snapshot, user_id: int, now: datetime.datetime) -> InlineQueryResultArticle:
+    lines = []
+    busy = 0
+    for dehydrator_id in DEHYDRATOR_IDS:
+        drying = snapshot.drying.get(dehydrator_id)
+        if drying is None or drying.finish_time <= now:
+            lines.append(f"🟢 Дегідратор №{dehydrator_id}: вільний")
+            continue
+        busy += 1
+        left = (drying.finish_time - now).total_seconds() / 60
+        lines.append(f"🔴 Дегідратор №{dehydrator_id}: до {drying.finish_time.strftime('%H:%M')} "
+                     f"(залишилось {format_time(left)})")
+
+    text = "🍇 <b>Стан дегідраторів</b>\n\n" + "\n".join(lines)
+    return _article("dehydrators", "🍇 Дегідратори", f"Зайнято {busy} з {len(DEHYDRATOR_IDS)}", text)
+
+
+def _shift_result(snapshot: Snapshot, user_id: int, now: datetime.datetime) -> InlineQueryResultArticle:
+    shift = snapshot.shifts.get(user_id)
+    if shift is None:
+        return _article("shift", "⏱ Моя зміна", "Зараз немає активної зміни", "⏱ <b>Зараз немає активної зміни</b>")
+
+    label = WORK_TYPE_LABELS.get(shift.work_type, html.escape(shift.work_type))
+    duration = format_time((now - shift.start_time).total_seconds() / 60)
+    text = (f"⏱ <b>Поточна зміна</b>\n\n"
+            f"{label}\n"
+            f"🕒 Початок: <b>{shift.start_time.strftime('%H:%M')}</b>\n"
+            f"⌛ Триває: <b>{duration}</b>")
+    return _article("shift", "⏱ Моя зміна", f"{label}, триває {duration}", text)
+
+
+def _month_result(snapshot: Snapshot, user_id: int, now: datetime.datetime) -> InlineQueryResultArticle:
+    by_type = snapshot.month_totals.get(user_id, {})
+    month = now.strftime("%m.%Y")
+    total = sum(values["minutes"] for values in by_type.values())
+
+    lines = []
+    for work_type, label in WORK_TYPE_LABELS.items():
+        values = by_type.get(work_type)
+        if not values:
+            continue
+        line = f"{label}: {format_time(values['minutes'])}"
+        if values["packages"] > 0:
+            line += f", {values['packages']} пакетів"
+        if values["amount"] > 0:
+            line += f", {values['amount']} грн"
+        lines.append(line)
+
+    text = f"📊 <b>Підсумки за {month}</b>\n\n"
+    text += "\n".join(lines) if lines else "Завершених робіт поки немає."
+    text += f"\n\n⏱ <b>Загальний час:</b> {format_time(total)}"
+    return _article("month", f"📊 Мій місяць ({month})", f"Загальний час: {format_time(total)}", text)
@@ -1,36 +1,48 @@
 import calendar
 import datetime
-from typing import Dict, List, Tuple
-from sqlalchemy import select
+import html
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from aiogram.types import KeyboardButton
+from aiogram.types import BufferedInputFile, KeyboardButton
 
 import keyboards as kb
 from services.db import get_available_months, get_all_work_sessions, \
-    get_all_other_works, get_available_months_all_users, get_user_by_id, \
-    async_session, WorkPartner, OtherWorkPartner
+    get_all_other_works, get_available_months_all_users, get_users_by_ids, \
+    get_user_work_sessions, get_user_other_works, is_user_approved, get_range_totals, notification_queued, \
+    add_report_notifications, get_monthly_totals, get_leaderboard, LEADERBOARD_MIN_MINUTES
+from services.accounting import sweep_union
+from services.analysis import analyze_all_work_data, other_work_records, render_month_pages, session_records
+from services.cache import chart_files, month_reports, month_version, report_documents, user_stats
+from services.charts import WORK_TYPE_NAMES, render_trend_chart
+from services.report_documents import render_report_document
+from services.report_jobs import report_jobs
+from services.workers import run_in_worker
 from utils.helpers import format_time
+from utils.pagination import pack_blocks, send_pages
+from utils.progress import ProgressReporter
 
 # Створюємо роутер для звітності
 reports_router = Router()
 
+# За скільки останніх місяців будується графік динаміки
+TREND_MONTHS = 6
+
 
 class ReportStates(StatesGroup):
     """Стани для роботи зі звітністю"""
     select_month = State()  # Вибір місяця для звіту
     choosing_report_type = State()
     waiting_for_month = State()
+    my_stats_month = State()  # Вибір місяця для персональної статистики
+    select_range = State()  # Вибір довільного періоду
 
 
 @reports_router.message(F.text.in_(["📊 Звітність", "📊 Перегляд звітності"]))
 async def start_report_process(message: types.Message, state: FSMContext):
     """Обробник для початку процесу звітності"""
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
-
     # Не реагуємо на повідомлення з груп
     if message.chat.type != "private":
         return
@@ -50,7 +62,7 @@ async def start_report_process(message: types.Message, state: FSMContext):
             return
 
         # Створюємо клавіатуру з доступними місяцями
-        months_kb = get_months_keyboard(available_months)
+        months_kb = get_months_keyboard(available_months, with_range=True, with_trend=True)
 
         await message.answer(
             "📅 <b>Виберіть місяць для отримання звіту по всіх користувачах:</b>",
@@ -73,12 +85,132 @@ async def start_report_process(message: types.Message, state: FSMContext):
         )
 
 
+@reports_router.message(ReportStates.select_month, F.text == kb.RANGE_BUTTON)
+async def start_range_selection(message: types.Message, state: FSMContext):
+    """Обробник переходу до вибору довільного періоду"""
+    await message.answer(
+        "📆 <b>Оберіть період або надішліть його у форматі</b> <code>01.01.2025-15.01.2025</code>",
+        reply_markup=kb.date_range_kb,
+        parse_mode="HTML"
+    )
+    await state.set_state(ReportStates.select_range)
+
+
+@reports_router.message(ReportStates.select_month, F.text == kb.TREND_BUTTON)
+async def show_overall_trend(message: types.Message, state: FSMContext):
+    """Обробник графіка динаміки за місяцями по всіх користувачах"""
+    await send_trend_chart(message, None)
+    await message.answer("🏠 <b>Головне меню</b>", reply_markup=kb.main_menu_kb, parse_mode="HTML")
+    await state.clear()
+
+
+@reports_router.message(ReportStates.select_range, F.text == "🔙 Назад")
+async def back_from_range_selection(message: types.Message, state: FSMContext):
+    """Обробник для повернення з вибору періоду до вибору місяця"""
+    available_months = await get_available_months_all_users()
+    await message.answer(
+        "📅 <b>Виберіть місяць для отримання звіту по всіх користувачах:</b>",
+        reply_markup=get_months_keyboard(available_months, with_range=True, with_trend=True),
+        parse_mode="HTML"
+    )
+    await state.set_state(ReportStates.select_month)
+
+
+@reports_router.message(ReportStates.select_range)
+async def process_range_selection(message: types.Message, state: FSMContext):
+    """Обробник вибору довільного періоду"""
+    date_range = parse_date_range(message.text or "", datetime.date.today())
+    if date_range is None:
+        await message.answer(
+            "❌ <b>Невірний формат періоду.</b>\n"
+            "Оберіть варіант з клавіатури або надішліть, наприклад, <code>01.01.2025-15.01.2025</code>",
+            reply_markup=kb.date_range_kb,
+            parse_mode="HTML"
+        )
+        return
+
+    await generate_range_report(message, *date_range)
+    await message.answer("🏠 <b>Головне меню</b>", reply_markup=kb.main_menu_kb, parse_mode="HTML")
+    await state.clear()
+
+
+def parse_date_range(text: str, today: datetime.date) -> Optional[Tuple[datetime.date, datetime.date]]:
+    """Повертає (початок, кінець) періоду з назви готового варіанту або тексту 'дд.мм.рррр-дд.мм.рррр'"""
+    if text == "📅 Цей тиждень":
+        return today - datetime.timedelta(days=today.weekday()), today
+    if text == "📅 Минулий тиждень":
+        end = today - datetime.timedelta(days=today.weekday() + 1)
+        return end - datetime.timedelta(days=6), end
+    if text == "📅 Останні 30 днів":
+        return today - datetime.timedelta(days=29), today
+    if text == "📅 Цей квартал":
+        return datetime.date(today.year, (today.month - 1) // 3 * 3 + 1, 1), today
+
+    parts = text.replace("–", "-").split("-")
+    if len(parts) != 2:
+        return None
+    try:
+        start, end = (datetime.datetime.strptime(part.strip(), "%d.%m.%Y").date() for part in parts)
+    except ValueError:
+        return None
+    return (start, end) if start <= end else None
+
+
+async def generate_range_report(message: types.Message, start_day: datetime.date, end_day: datetime.date):
+    """Надсилає звіт за довільний період, побудований зі щоденних накопичувальних підсумків"""
+    progress = ProgressReporter(message)
+    try:
+        await progress.update("🔍 <b>Пошук даних...</b>")
+        totals = await get_range_totals(start_day, end_day)
+        title = f"📊 <b>Звіт за {start_day.strftime('%d.%m.%Y')} – {end_day.strftime('%d.%m.%Y')}</b>\n\n"
+        if not totals:
+            await progress.finish(title + "Даних за цей період немає.")
+            return
+
+        users = {user.id: user for user in await get_users_by_ids(totals)}
+        pages = pack_blocks(build_range_blocks(title, totals, users))
+        await progress.finish(next(pages))
+        await send_pages(message, pages)
+    except Exception as e:
+        print(f"Error generating range report: {str(e)}")
+        await progress.finish(f"❌ <b>Помилка при формуванні звіту:</b> {html.escape(str(e))}")
+
+
+def build_range_blocks(title: str, totals: Dict, users: Dict) -> Iterator[str]:
+    """Блоки звіту за період: заголовок і по одному блоку на користувача"""
+    yield title + "<i>Час змін наведено без урахування перетинів.</i>\n\n"
+    for user_id, by_type in totals.items():
+        user = users.get(user_id)
+        user_name = f"@{user.username}" if user and user.username else f"Користувач {user_id}"
+        block = f"👤 <b>{html.escape(user_name)}</b>\n"
+
+        if "production" in by_type:
+            block += f"🏭 Виробництво: {format_time(by_type['production']['minutes'])}\n"
+        if "packaging" in by_type:
+            packaging = by_type["packaging"]
+            block += f"📦 Пакування: {format_time(packaging['minutes'])}"
+            if packaging["packages"] > 0:
+                block += f", {packaging['packages']} пакетів"
+            block += "\n"
+        if "sales" in by_type:
+            sales = by_type["sales"]
+            block += f"💰 Продаж: {format_time(sales['minutes'])}"
+            if sales["packages"] > 0:
+                block += f", {sales['packages']} пакетів"
+            if sales["amount"] > 0:
+                block += f", {sales['amount']} грн"
+            block += "\n"
+        if "other_work" in by_type:
+            block += f"📝 Інша робота: {format_time(by_type['other_work']['minutes'])}\n"
+
+        total_time = sum(values["minutes"] for values in by_type.values())
+        yield block + f"⏱ <b>Загальний час:</b> {format_time(total_time)}\n\n"
+
+
 @reports_router.message(ReportStates.select_month)
 async def process_month_selection(message: types.Message, state: FSMContext):
     """Обробник вибору місяця для звіту"""
 
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     month_text = message.text
 
     # Перевіряємо формат повідомлення (має бути "Місяць YYYY")
@@ -103,16 +235,14 @@ async def process_month_selection(message: types.Message, state: FSMContext):
         if month == 0:
             raise ValueError("Невірна назва місяця")
 
-        # Отримуємо дані про роботу користувача за вказаний місяць
-        await generate_monthly_report(message, month, year)
-
-        # Повертаємось до головного меню
+        # Запитуємо, у якому вигляді надіслати звіт
+        await state.update_data(report_month=month, report_year=year)
         await message.answer(
-            "🏠 <b>Головне меню</b>",
-            reply_markup=kb.main_menu_kb,
+            f"📄 <b>Як надіслати звіт за {month_name} {year}?</b>",
+            reply_markup=kb.report_type_kb,
             parse_mode="HTML"
         )
-        await state.clear()
+        await state.set_state(ReportStates.choosing_report_type)
 
     except ValueError:
         # Отримуємо доступні місяці
@@ -130,8 +260,6 @@ async def process_month_selection(message: types.Message, state: FSMContext):
 @reports_router.message(ReportStates.select_month, F.text.in_(["🔙 Назад", "🔙 Повернутися назад"]))
 async def back_to_main_menu(message: types.Message, state: FSMContext):
     """Обробник для повернення до головного меню з вибору місяця"""
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
 
     if message.chat.type != "private":
         return
@@ -144,157 +272,357 @@ async def back_to_main_menu(message: types.Message, state: FSMContext):
     await state.clear()
 
 
-async def generate_monthly_report(message: types.Message, month: int, year: int):
-    """Генерує та відправляє звіт за вказаний місяць для всіх користувачів"""
-    start_date, end_date = get_month_range(month, year)
-    await message.bot.send_chat_action(message.chat.id, "typing")
+@reports_router.message(ReportStates.choosing_report_type, F.text == "🔙 Назад")
+async def back_to_month_selection(message: types.Message, state: FSMContext):
+    """Обробник для повернення до вибору місяця"""
+    available_months = await get_available_months_all_users()
+    await message.answer(
+        "📅 <b>Виберіть місяць для отримання звіту по всіх користувачах:</b>",
+        reply_markup=get_months_keyboard(available_months, with_range=True, with_trend=True),
+        parse_mode="HTML"
+    )
+    await state.set_state(ReportStates.select_month)
 
-    try:
-        # Отримуємо дані про всіх користувачів
-        await message.answer("🔍 <b>Пошук даних...</b>", parse_mode="HTML")
-        await message.bot.send_chat_action(message.chat.id, "typing") 
-        all_work_sessions = await get_all_work_sessions(start_date, end_date)
-        all_other_works = await get_all_other_works(start_date, end_date)
-
-        # Аналізуємо дані та формуємо звіт для всіх користувачів
-        await message.answer("⚙️ <b>Аналізую дані...</b>", parse_mode="HTML")
-        await message.bot.send_chat_action(message.chat.id, "typing")
-        report_data = await analyze_all_work_data(all_work_sessions, all_other_works)
-
-        # Спочатку надсилаємо загальні підсумки
-        month_name = get_month_name(month)
-        totals = report_data["totals"]
-
-        # Обчислюємо загальний час для всіх типів робіт
-        total_all_time = (
-            totals['production']['time'] + 
-            totals['packaging']['time'] + 
-            totals['sales']['time'] + 
-            totals['other_work']['time']
+
+@reports_router.message(ReportStates.choosing_report_type)
+async def process_report_type(message: types.Message, state: FSMContext):
+    """Обробник вибору способу отримання звіту"""
+    data = await state.get_data()
+    month, year = data.get("report_month"), data.get("report_year")
+
+    if message.text == kb.REPORT_TYPE_CHAT:
+        await generate_monthly_report(message, month, year)
+    elif message.text in kb.REPORT_TYPE_BUTTONS:
+        await send_report_document(message, month, year, kb.REPORT_TYPE_BUTTONS[message.text])
+    elif message.text == kb.REPORT_TYPE_LEADERBOARD:
+        await send_leaderboard(message, month, year)
+    else:
+        await message.answer(
+            "⚠️ <b>Будь ласка, оберіть варіант з клавіатури.</b>",
+            reply_markup=kb.report_type_kb,
+            parse_mode="HTML"
         )
+        return
 
-        await message.answer("📝 <b>Формую загальний звіт...</b>", parse_mode="HTML")
-        report = f"📊 <b>Звіт за {month_name} {year} - Загальні підсумки</b>\n\n"
-        report += f"📋 <b>Загальні підсумки:</b>\n"
-        report += f"🏭 <b>Виробництво:</b> {format_time(totals['production']['time'])}\n"
-        report += f"📦 <b>Пакування:</b> {format_time(totals['packaging']['time'])}, {totals['packaging']['packages']} пакетів\n"
-        report += f"💰 <b>Продаж:</b> {format_time(totals['sales']['time'])}, {totals['sales']['packages']} пакетів, {totals['sales']['amount']} грн\n"
-        report += f"📝 <b>Інша робота:</b> {format_time(totals['other_work']['time'])}, {totals['other_work']['works']} робіт\n"
-        report += f"⏱ <b>Загальний час усіх робіт:</b> {format_time(total_all_time)}\n\n"
-
-        # Відправляємо загальний звіт
-        await message.answer(report, parse_mode="HTML")
-
-        # Готуємо детальний звіт по користувачах
-        await message.answer("📊 <b>Формую детальний звіт по користувачах...</b>", parse_mode="HTML")
-        users_report = f"📊 <b>Детальний звіт за {month_name} {year} по користувачах</b>\n\n"
-
-        # Формуємо словник для іншої роботи, де ключ - опис роботи, а значення - список імен користувачів
-        other_works_users = {}
-        if "other_works_details" in report_data:
-            for work_detail in report_data["other_works_details"]:
-                description = work_detail["description"]
-                user_id = work_detail["user_id"]
-                work_date = work_detail["date"]
-                
-                user = await get_user_by_id(user_id)
-                user_name = f"@{user.username}" if user and user.username else f"Користувач {user_id}"
-                
-                if description not in other_works_users:
-                    other_works_users[description] = []
-                
-                user_entry = f"{work_date} - {user_name}"
-                # Додаємо тільки унікальні записи
-                if user_entry not in other_works_users[description]:
-                    other_works_users[description].append(user_entry)
-
-        for user_id, user_data in report_data["users"].items():
-            user = await get_user_by_id(user_id)
-            
-            # Визначаємо ім'я користувача - якщо немає username, використовуємо ID
-            if user and user.username:
-                user_name = f"@{user.username}"
-            else:
-                user_name = f"Користувач {user_id}"
-                
-            users_report += f"👤 <b>{user_name}</b>\n"
-
-            # Додаємо інформацію про виробництво
-            production = user_data["production"]
-            production_time = production['host_time'] + production['partner_time']
-            if production_time > 0:
-                users_report += f"🏭 Виробництво: {format_time(production_time)}\n"
-
-            # Додаємо інформацію про пакування
-            packaging = user_data["packaging"]
-            packaging_time = packaging['host_time'] + packaging['partner_time']
-            if packaging_time > 0:
-                users_report += f"📦 Пакування: {format_time(packaging_time)}"
-                if packaging['packages'] > 0:
-                    users_report += f", {packaging['packages']} пакетів"
-                users_report += "\n"
-
-            # Додаємо інформацію про продаж
-            sales = user_data["sales"]
-            sales_time = sales['host_time'] + sales['partner_time']
-            if sales_time > 0:
-                users_report += f"💰 Продаж: {format_time(sales_time)}"
-                if sales['packages'] > 0:
-                    users_report += f", {sales['packages']} пакетів"
-                if sales['amount'] > 0:
-                    users_report += f", {sales['amount']} грн"
-                users_report += "\n"
-
-            # Додаємо інформацію про іншу роботу
-            other_work = user_data["other_work"]
-            if other_work['time'] > 0:
-                users_report += f"📝 Інша робота: {format_time(other_work['time'])}\n"
-
-            # Додаємо загальний час
-            total_time = production_time + packaging_time + sales_time + other_work['time']
-            users_report += f"⏱ <b>Загальний час:</b> {format_time(total_time)}\n\n"
-
-        # Додаємо окремий розділ з іншими роботами та учасниками
-        if other_works_users:
-            await message.answer(users_report, parse_mode="HTML")
-            
-            other_works_report = f"📋 <b>Список інших робіт за {month_name} {year}:</b>\n\n"
-            
-            # Сортуємо роботи за описом
-            for description in sorted(other_works_users.keys()):
-                users_list = other_works_users[description]
-                other_works_report += f"📝 <b>{description}</b>\n"
-                
-                # Сортуємо користувачів за датою
-                for user_info in sorted(users_list):
-                    other_works_report += f"   • {user_info}\n"
-                other_works_report += "\n"
-                
-            # Відправляємо звіт про інші роботи
-            if len(other_works_report) > 4096:
-                # Розбиваємо звіт на частини, якщо він занадто довгий
-                for i in range(0, len(other_works_report), 4000):
-                    part = other_works_report[i:i+4000]
-                    await message.answer(part, parse_mode="HTML")
+    # Повертаємось до головного меню
+    await message.answer(
+        "🏠 <b>Головне меню</b>",
+        reply_markup=kb.main_menu_kb,
+        parse_mode="HTML"
+    )
+    await state.clear()
+
+
+async def send_report_document(message: types.Message, month: int, year: int, fmt: str):
+    """Надсилає звіт за місяць одним документом
+
+    Завантажений документ кешується за його file_id, тож повторний запит
+    за той самий місяць без нових даних надсилається без повторного завантаження.
+    """
+    month_name = get_month_name(month)
+    caption = f"📊 <b>Звіт за {month_name} {year}</b>"
+    cache_key = (month, year, fmt, month_version(month, year))
+
+    file_id = report_documents.get(cache_key)
+    if file_id:
+        await message.answer_document(file_id, caption=caption, parse_mode="HTML")
+        return
+
+    async def deliver(progress: ProgressReporter, result: Tuple[Dict, Dict[int, str]]):
+        report_data, user_names = result
+        document = await run_in_worker(render_report_document, fmt, report_data, user_names, month_name, year)
+        sent = await progress.message.answer_document(
+            BufferedInputFile(document, filename=f"report_{year}_{month:02d}.{fmt}"),
+            caption=caption,
+            parse_mode="HTML"
+        )
+        report_documents[cache_key] = sent.document.file_id
+        await progress.discard()
+
+    await submit_month_report(message, month, year, deliver)
+
+
+async def send_leaderboard(message: types.Message, month: int, year: int):
+    """Надсилає рейтинг продуктивності за місяць"""
+    try:
+        entries = await get_leaderboard(year, month)
+        title = f"🏆 <b>Рейтинг продуктивності за {get_month_name(month)} {year}</b>\n\n"
+        if not entries:
+            await message.answer(title + "Даних за цей місяць немає.", parse_mode="HTML")
+            return
+
+        users = {user.id: user for user in await get_users_by_ids(entry.user_id for entry in entries)}
+        await send_pages(message, pack_blocks(build_leaderboard_blocks(title, entries, users)))
+    except Exception as e:
+        print(f"Error generating leaderboard: {str(e)}")
+        await message.answer(f"❌ <b>Помилка при формуванні рейтингу:</b> {html.escape(str(e))}",
+                             parse_mode="HTML")
+
+
+# Тип роботи -> (заголовок розділу, за чим ранжується)
+LEADERBOARD_SECTIONS = {
+    "production": ("🏭 <b>Виробництво</b>", "за відпрацьованим часом"),
+    "packaging": ("📦 <b>Пакування</b>", "за пакетами на годину"),
+    "sales": ("💰 <b>Продаж</b>", "за сумою продажу на годину"),
+}
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+
+def build_leaderboard_blocks(title: str, entries: List, users: Dict) -> Iterator[str]:
+    """Блоки рейтингу: заголовок і по одному блоку на тип роботи"""
+    yield title + "<i>Швидкість рахується за змінами, у яких брав участь користувач. " \
+                  f"Менше {LEADERBOARD_MIN_MINUTES // 60} год. за місяць - без місця.</i>\n\n"
+
+    by_type = {}
+    for entry in entries:
+        by_type.setdefault(entry.work_type, []).append(entry)
+
+    for work_type, (header, ranked_by) in LEADERBOARD_SECTIONS.items():
+        if work_type not in by_type:
+            continue
+        block = f"{header} ({ranked_by})\n"
+        for entry in by_type[work_type]:
+            user = users.get(entry.user_id)
+            user_name = html.escape(f"@{user.username}" if user and user.username else f"Користувач {entry.user_id}")
+            if entry.minutes >= LEADERBOARD_MIN_MINUTES:
+                place = MEDALS.get(entry.rank, f"{entry.rank}.")
             else:
-                await message.answer(other_works_report, parse_mode="HTML")
-        else:
-            # Відправляємо детальний звіт по користувачах, якщо немає інших робіт
-            if len(users_report) > 4096:
-                # Розбиваємо звіт на частини, якщо він занадто довгий
-                for i in range(0, len(users_report), 4000):
-                    part = users_report[i:i+4000]
-                    await message.answer(part, parse_mode="HTML")
+                place = "–"
+
+            if work_type == "packaging":
+                result = f"{entry.packages_per_hour or 0:.1f} пак./год ({entry.packages} пакетів, " \
+                         f"{format_time(entry.minutes)})"
+            elif work_type == "sales":
+                result = f"{entry.amount_per_hour or 0:.0f} грн/год ({entry.amount} грн, {format_time(entry.minutes)})"
             else:
-                await message.answer(users_report, parse_mode="HTML")
+                result = format_time(entry.minutes)
+            block += f"{place} {user_name}: {result}\n"
+        yield block + "\n"
+
+
+@reports_router.callback_query(F.data.startswith("report_cancel_"))
+async def cancel_report(callback: types.CallbackQuery):
+    """Обробник кнопки скасування формування звіту"""
+    job_id = int(callback.data.removeprefix("report_cancel_"))
+    if await report_jobs.cancel(job_id, callback.message.chat.id):
+        await callback.answer("Формування звіту скасовано")
+    else:
+        await callback.answer("Звіт уже сформовано або скасовано")
+
+
+@reports_router.message(F.text == "📈 Моя статистика")
+async def start_my_stats(message: types.Message, state: FSMContext):
+    """Обробник для початку перегляду персональної статистики"""
+    if message.chat.type != "private":
+        return
+
+    user_id = message.from_user.id
+    if not await is_user_approved(user_id):
+        await message.answer("❌ <b>У вас немає доступу до цієї функції.</b>", parse_mode="HTML")
+        return
+
+    available_months = await get_available_months(user_id)
+    if not available_months:
+        await message.answer(
+            "❌ <b>У вас поки немає завершених робіт.</b>",
+            reply_markup=kb.main_menu_kb,
+            parse_mode="HTML"
+        )
+        return
+
+    await message.answer(
+        "📅 <b>Виберіть місяць для перегляду вашої статистики:</b>",
+        reply_markup=get_months_keyboard(available_months, with_trend=True),
+        parse_mode="HTML"
+    )
+    await state.set_state(ReportStates.my_stats_month)
+
+
+@reports_router.message(ReportStates.my_stats_month, F.text == kb.TREND_BUTTON)
+async def show_my_trend(message: types.Message, state: FSMContext):
+    """Обробник графіка динаміки за місяцями для користувача"""
+    await send_trend_chart(message, message.from_user.id)
+    await message.answer("🏠 <b>Головне меню</b>", reply_markup=kb.main_menu_kb, parse_mode="HTML")
+    await state.clear()
+
+
+@reports_router.message(ReportStates.my_stats_month)
+async def process_my_stats_month(message: types.Message, state: FSMContext):
+    """Обробник вибору місяця для персональної статистики"""
+    if message.text not in ["🔙 Назад", "🔙 Повернутися назад"]:
+        month_name, _, year_str = (message.text or "").partition(" ")
+        month = get_month_number(month_name)
+        if month == 0 or not year_str.isdigit():
+            await message.answer(
+                "❌ <b>Невірний формат дати.</b>\n"
+                "Будь ласка, виберіть місяць з клавіатури.",
+                parse_mode="HTML"
+            )
+            return
+        await message.answer(await get_user_month_report(message.from_user.id, month, int(year_str)),
+                             parse_mode="HTML")
+
+    await message.answer("🏠 <b>Головне меню</b>", reply_markup=kb.main_menu_kb, parse_mode="HTML")
+    await state.clear()
+
+
+def last_months(today: datetime.date, count: int) -> List[Tuple[int, int]]:
+    """Останні count місяців, включно з поточним, від найстарішого: [(рік, місяць), ...]"""
+    index = today.year * 12 + today.month - 1
+    return [(i // 12, i % 12 + 1) for i in range(index - count + 1, index + 1)]
+
+
+async def send_trend_chart(message: types.Message, user_id: Optional[int]):
+    """Надсилає графік динаміки за останні TREND_MONTHS місяців для користувача або всіх (user_id=None)
+
+    Завантажений графік кешується за file_id, доки не зміняться дані хоча б одного з місяців.
+    """
+    months = last_months(datetime.date.today(), TREND_MONTHS)
+    versions = tuple(month_version(month, year) for year, month in months)
+    cache_key = (user_id, months[-1], len(months), versions)
+    scope = "ваша робота" if user_id is not None else "усі користувачі"
+    caption = f"📉 <b>Динаміка за {len(months)} міс.: {scope}</b>"
+
+    file_id = chart_files.get(cache_key)
+    if file_id:
+        await message.answer_photo(file_id, caption=caption, parse_mode="HTML")
+        return
 
+    try:
+        (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+        totals = await get_monthly_totals(
+            datetime.date(first_year, first_month, 1),
+            datetime.date(last_year, last_month, calendar.monthrange(last_year, last_month)[1]),
+            user_id
+        )
+        by_month = [totals.get(month, {}) for month in months]
+        hours = {
+            work_type: [values.get(work_type, {}).get("minutes", 0) / 60 for values in by_month]
+            for work_type in WORK_TYPE_NAMES
+        }
+        packages = [values.get("packaging", {}).get("packages", 0) for values in by_month]
+        amounts = [values.get("sales", {}).get("amount", 0) for values in by_month]
+        labels = [f"{month:02d}.{year % 100:02d}" for year, month in months]
+
+        # Малювання графіка - важка синхронна робота, тому виконується в процес-воркері
+        png = await run_in_worker(render_trend_chart, f"Динаміка: {scope}", labels, hours, packages, amounts)
+        sent = await message.answer_photo(BufferedInputFile(png, filename="trend.png"), caption=caption,
+                                          parse_mode="HTML")
+        chart_files[cache_key] = sent.photo[-1].file_id
     except Exception as e:
-        print(f"Error generating monthly report: {str(e)}")
-        await message.answer(f"❌ <b>Помилка при формуванні звіту:</b> {str(e)}", parse_mode="HTML")
+        print(f"Error generating trend chart: {str(e)}")
+        await message.answer(f"❌ <b>Помилка при побудові графіка:</b> {html.escape(str(e))}", parse_mode="HTML")
+
+
+async def get_user_month_report(user_id: int, month: int, year: int) -> str:
+    """Повертає текст персональної статистики за місяць, кешований до зміни даних місяця"""
+    cache_key = (user_id, month, year, month_version(month, year))
+    report = user_stats.get(cache_key)
+    if report is None:
+        start_date, end_date = get_month_range(month, year)
+        work_sessions = await get_user_work_sessions(user_id, start_date, end_date)
+        other_works = await get_user_other_works(user_id, start_date, end_date)
+        report = format_report(analyze_work_data(work_sessions, other_works, user_id), month, year)
+        user_stats[cache_key] = report
+    return report
+
+
+async def generate_monthly_report(message: types.Message, month: int, year: int):
+    """Генерує та відправляє звіт за вказаний місяць для всіх користувачів"""
+    month_name = get_month_name(month)
+
+    async def deliver(progress: ProgressReporter, result: Tuple[Dict, Dict[int, str]]):
+        report_data, user_names = result
+        # Звіт складається з логічних блоків, які пакуються в повідомлення до ліміту Telegram
+        pages = await run_in_worker(render_month_pages, report_data, user_names, month_name, year)
+
+        # Перша сторінка замінює статусне повідомлення, решта надсилається по черзі
+        await progress.finish(pages[0])
+        await send_pages(progress.message, pages[1:])
+
+    await submit_month_report(message, month, year, deliver)
+
 
+async def submit_month_report(message: types.Message, month: int, year: int, deliver) -> None:
+    """Ставить у чергу розрахунок звіту за місяць
 
-def analyze_work_data(work_sessions: List, other_works: List) -> Dict:
-    """Аналізує дані про роботи та повертає структуровану інформацію для звіту"""
+    Однакові запити від різних чатів чекають на одне обчислення, а результат
+    доставляється кожному з них через deliver.
+    """
+    await report_jobs.submit(
+        ("month", year, month, month_version(month, year)),
+        message,
+        lambda stage: load_month_report(month, year, stage),
+        deliver
+    )
+
+
+async def load_month_report(month: int, year: int, stage=None) -> Tuple[Dict, Dict[int, str]]:
+    """Завантажує та аналізує дані за місяць, повертає (дані звіту, імена користувачів)
+
+    Результат кешується до зміни даних місяця.
+    """
+    cache_key = (month, year, month_version(month, year))
+    cached = month_reports.get(cache_key)
+    if cached is not None:
+        return cached
+
+    start_date, end_date = get_month_range(month, year)
+    all_work_sessions = await get_all_work_sessions(start_date, end_date)
+    all_other_works = await get_all_other_works(start_date, end_date)
+
+    if stage is not None:
+        await stage("⚙️ <b>Аналізую дані...</b>")
+    # Аналіз виконується в окремому процесі над простими записами замість ORM-об'єктів
+    report_data = await run_in_worker(
+        analyze_all_work_data, session_records(all_work_sessions), other_work_records(all_other_works)
+    )
+    result = report_data, await get_user_names(report_data)
+    month_reports[cache_key] = result
+    return result
+
+
+async def publish_month_report(month: int, year: int) -> bool:
+    """Готує звіт за місяць і ставить його в outbox для загального чату
+
+    Звіт за кожен місяць публікується лише раз, а розрахований результат
+    лишається в кеші, тож запити адміністраторів за цей місяць відповідаються одразу.
+
+    Returns:
+        bool: чи було поставлено звіт у чергу
+    """
+    dedup_prefix = f"monthly_report:{year}-{month:02d}"
+    if await notification_queued(f"{dedup_prefix}:1"):
+        return False
+
+    report_data, user_names = await load_month_report(month, year)
+    if not report_data["users"]:
+        return False
+
+    pages = await run_in_worker(render_month_pages, report_data, user_names, get_month_name(month), year)
+    return await add_report_notifications(pages, "monthly_report", dedup_prefix)
+
+
+async def get_user_names(report_data: Dict) -> Dict[int, str]:
+    """Повертає імена всіх користувачів звіту, отримані одним запитом"""
+    user_ids = set(report_data["users"])
+    user_ids.update(detail["user_id"] for detail in report_data.get("other_works_details", []))
+    users = {user.id: user for user in await get_users_by_ids(user_ids)}
+
+    names = {}
+    for user_id in user_ids:
+        user = users.get(user_id)
+        # Якщо немає username, використовуємо ID
+        names[user_id] = f"@{user.username}" if user and user.username else f"Користувач {user_id}"
+    return names
+
+
+def analyze_work_data(work_sessions: List, other_works: List, user_id: int = None) -> Dict:
+    """Аналізує дані про роботи та повертає структуровану інформацію для звіту
+
+    Якщо передано user_id, сесії, створені іншими користувачами, зараховуються
+    йому як час партнера.
+    """
     report = {
         "production": {"host_time": 0, "partner_time": 0, "sessions": []},
         "packaging": {"host_time": 0, "partner_time": 0, "sessions": [], "packages": 0},
@@ -311,11 +639,10 @@ def analyze_work_data(work_sessions: List, other_works: List) -> Dict:
         duration_minutes = (session.end_time - session.start_time).total_seconds() / 60
 
         # Визначаємо, чи користувач був головним або партнером
-        try:
+        if user_id is not None:
+            is_host = session.requested_by == user_id
+        else:
             is_host = session.user_id == session.requested_by
-        except (AttributeError, TypeError):
-            # Якщо поле requested_by відсутнє, використовуємо user_id
-            is_host = True  # За замовчуванням вважаємо головним
 
         work_type = session.work_type
 
@@ -372,7 +699,7 @@ def analyze_work_data(work_sessions: List, other_works: List) -> Dict:
 
     # Обробляємо інші роботи
     for work in other_works:
-        work_date = work.created_at.date()
+        work_date = work.work_date.date()
         
         # Додаємо тривалість іншої роботи
         work_duration = work.duration if work.duration else 0
@@ -385,6 +712,10 @@ def analyze_work_data(work_sessions: List, other_works: List) -> Dict:
             "duration": work.duration if work.duration else 0
         })
 
+    report["accounting"] = sweep_union(
+        (session.start_time, session.end_time, session.id) for session in work_sessions if session.end_time
+    )
+
     return report
 
 
@@ -427,16 +758,28 @@ def format_report(report_data: Dict, month: int, year: int) -> str:
     if other_work["works"]:
         report += "   - Виконані завдання:\n"
         for work in other_work["works"]:
-            report += f"     • {work['description']}\n"
+            report += f"     • {html.escape(work['description'])}\n"
+
+    # Фактичний час змін без перетинів
+    accounting = report_data["accounting"]
+    report += f"\n⏱ <b>Фактичний час змін:</b> {format_time(accounting['time'])}\n"
+    if accounting["overlaps"]:
+        report += f"⚠️ <b>Перетини змін:</b> {format_time(accounting['raw_time'] - accounting['time'])}\n"
+        for overlap in accounting["overlaps"]:
+            report += (f"   • {overlap['start'].strftime('%d.%m %H:%M')}–{overlap['end'].strftime('%H:%M')}, "
+                       f"{format_time(overlap['minutes'])}\n")
 
     return report
 
 
-def get_months_keyboard(available_months: List[Tuple[int, int]]) -> types.ReplyKeyboardMarkup:
+def get_months_keyboard(available_months: List[Tuple[int, int]], with_range: bool = False,
+                        with_trend: bool = False) -> types.ReplyKeyboardMarkup:
     """Створює клавіатуру з доступними місяцями
     
     Args:
         available_months: Список кортежів (місяць, рік)
+        with_range: чи додавати кнопку вибору довільного періоду
+        with_trend: чи додавати кнопку графіка динаміки за місяцями
     """
     # Сортуємо місяці у зворотньому хронологічному порядку
     sorted_months = sorted(available_months, key=lambda x: (x[1], x[0]), reverse=True)
@@ -446,6 +789,11 @@ def get_months_keyboard(available_months: List[Tuple[int, int]]) -> types.ReplyK
         month_name = get_month_name(month)
         buttons.append([KeyboardButton(text=f"{month_name} {year}")])
 
+    if with_range:
+        buttons.append([KeyboardButton(text=kb.RANGE_BUTTON)])
+    if with_trend:
+        buttons.append([KeyboardButton(text=kb.TREND_BUTTON)])
+
     # Додаємо кнопку "Назад"
     buttons.append([KeyboardButton(text="🔙 Назад")])
 
@@ -485,260 +833,6 @@ def get_month_range(month: int, year: int) -> Tuple[datetime.datetime, datetime.
     return first_day, last_day
 
 
-async def analyze_all_work_data(all_work_sessions: List, all_other_works: List) -> Dict:
-    """Аналізує дані всіх користувачів та повертає структуровану інформацію для звіту"""
-    report = {
-        "totals": {
-            "production": {"time": 0, "sessions": 0},
-            "packaging": {"time": 0, "sessions": 0, "packages": 0},
-            "sales": {"time": 0, "sessions": 0, "packages": 0, "amount": 0},
-            "other_work": {"time": 0, "works": 0}
-        },
-        "users": {},
-        "other_works_details": []  # Додаємо деталі інших робіт
-    }
-
-    # Ініціалізуємо словник для зберігання даних користувачів
-    unique_users = set()
-    
-    # Додаємо всіх головних користувачів та їх партнерів
-    for ws in all_work_sessions:
-        unique_users.add(ws.user_id)
-        # Додаємо замовника сесії
-        if hasattr(ws, 'requested_by'):
-            unique_users.add(ws.requested_by)
-        # Додаємо партнера, якщо він вказаний напряму
-        if hasattr(ws, 'partner_id') and ws.partner_id:
-            unique_users.add(ws.partner_id)
-    
-    for work in all_other_works:
-        unique_users.add(work.user_id)
-        # Додаємо партнера, якщо він вказаний напряму
-        if hasattr(work, 'partner_id') and work.partner_id:
-            unique_users.add(work.partner_id)
-    
-    # Додаємо всіх партнерів з таблиць WorkPartner і OtherWorkPartner
-    async with async_session() as db_session:
-        # Отримуємо всіх партнерів з WorkPartner для всіх сесій
-        for ws in all_work_sessions:
-            if ws.id:  # Переконуємося, що сесія має ID
-                result = await db_session.execute(
-                    select(WorkPartner.partner_id).where(
-                        WorkPartner.session_id == ws.id
-                    )
-                )
-                partners = result.scalars().all()
-                for partner_id in partners:
-                    unique_users.add(partner_id)
-        
-        # Отримуємо всіх партнерів з OtherWorkPartner
-        for other_work in all_other_works:
-            if other_work.id:  # Переконуємося, що робота має ID
-                result = await db_session.execute(
-                    select(OtherWorkPartner.partner_id).where(
-                        OtherWorkPartner.other_work_id == other_work.id
-                    )
-                )
-                partners = result.scalars().all()
-                for partner_id in partners:
-                    unique_users.add(partner_id)
-
-    # Ініціалізуємо дані для всіх унікальних користувачів
-    for user_id in unique_users:
-        report["users"][user_id] = {
-            "production": {"host_time": 0, "partner_time": 0},
-            "packaging": {"host_time": 0, "partner_time": 0, "packages": 0},
-            "sales": {"host_time": 0, "partner_time": 0, "packages": 0, "amount": 0},
-            "other_work": {"time": 0}
-        }
-
-    # Обробляємо сесії роботи
-    for ws in all_work_sessions:
-        if not ws.end_time:
-            continue  # Пропускаємо незавершені сесії
-
-        # Розраховуємо тривалість у хвилинах
-        duration_minutes = (ws.end_time - ws.start_time).total_seconds() / 60
-        
-        # Визначаємо тип роботи
-        work_type = ws.work_type
-        
-        # Визначаємо користувача
-        user_id = ws.user_id
-        
-        # Визначаємо, чи користувач був головним або партнером
-        try:
-            is_host = ws.user_id == ws.requested_by
-        except (AttributeError, TypeError):
-            is_host = True  # За замовчуванням вважаємо головним
-
-        # Додаємо до загальних підсумків (тільки один раз для кожної сесії)
-        if work_type == "production":
-            # Додаємо до загальних підсумків
-            report["totals"]["production"]["time"] += duration_minutes
-            report["totals"]["production"]["sessions"] += 1
-            
-            # Додаємо до користувача
-            if is_host:
-                report["users"][user_id]["production"]["host_time"] += duration_minutes
-            else:
-                report["users"][user_id]["production"]["partner_time"] += duration_minutes
-                
-            # Додаємо час для замовника, якщо це інша людина
-            if ws.requested_by != user_id and ws.requested_by in report["users"]:
-                report["users"][ws.requested_by]["production"]["host_time"] += duration_minutes
-        
-        elif work_type == "packaging":
-            # Додаємо до загальних підсумків
-            report["totals"]["packaging"]["time"] += duration_minutes
-            report["totals"]["packaging"]["sessions"] += 1
-            packages_count = ws.packages_count if ws.packages_count else 0
-            report["totals"]["packaging"]["packages"] += packages_count
-            
-            # Додаємо до користувача
-            if is_host:
-                report["users"][user_id]["packaging"]["host_time"] += duration_minutes
-            else:
-                report["users"][user_id]["packaging"]["partner_time"] += duration_minutes
-            
-            # Додаємо час для замовника, якщо це інша людина
-            if ws.requested_by != user_id and ws.requested_by in report["users"]:
-                report["users"][ws.requested_by]["packaging"]["host_time"] += duration_minutes
-            
-            # Додаємо кількість пакетів (тільки для головного)
-            if is_host:
-                report["users"][user_id]["packaging"]["packages"] += packages_count
-            # Якщо участник не є головним, також додаємо пакети замовнику
-            elif ws.requested_by in report["users"]:
-                report["users"][ws.requested_by]["packaging"]["packages"] += packages_count
-        
-        elif work_type == "sales":
-            # Додаємо до загальних підсумків
-            report["totals"]["sales"]["time"] += duration_minutes
-            report["totals"]["sales"]["sessions"] += 1
-            packages_count = ws.packages_count if ws.packages_count else 0
-            sales_amount = ws.sales_amount if ws.sales_amount else 0
-            report["totals"]["sales"]["packages"] += packages_count
-            report["totals"]["sales"]["amount"] += sales_amount
-            
-            # Додаємо до користувача
-            if is_host:
-                report["users"][user_id]["sales"]["host_time"] += duration_minutes
-            else:
-                report["users"][user_id]["sales"]["partner_time"] += duration_minutes
-            
-            # Додаємо час для замовника, якщо це інша людина
-            if ws.requested_by != user_id and ws.requested_by in report["users"]:
-                report["users"][ws.requested_by]["sales"]["host_time"] += duration_minutes
-            
-            # Додаємо кількість пакетів та суму (тільки для головного)
-            if is_host:
-                report["users"][user_id]["sales"]["packages"] += packages_count
-                report["users"][user_id]["sales"]["amount"] += sales_amount
-            # Якщо участник не є головним, також додаємо пакети й суму замовнику
-            elif ws.requested_by in report["users"]:
-                report["users"][ws.requested_by]["sales"]["packages"] += packages_count
-                report["users"][ws.requested_by]["sales"]["amount"] += sales_amount
-
-    # Окремий цикл для обробки партнерів з таблиці WorkPartner
-    async with async_session() as db_session:
-        for ws in all_work_sessions:
-            if not ws.end_time:
-                continue  # Пропускаємо незавершені сесії
-                
-            # Розраховуємо тривалість у хвилинах
-            duration_minutes = (ws.end_time - ws.start_time).total_seconds() / 60
-            work_type = ws.work_type
-                
-            # Отримуємо всіх партнерів для цієї сесії
-            if ws.id:
-                result = await db_session.execute(
-                    select(WorkPartner.partner_id).where(
-                        WorkPartner.session_id == ws.id
-                    )
-                )
-                partners = result.scalars().all()
-                
-                # Додаємо час для кожного партнера
-                for partner_id in partners:
-                    if partner_id in report["users"]:
-                        if work_type == "production":
-                            report["users"][partner_id]["production"]["partner_time"] += duration_minutes
-                        elif work_type == "packaging":
-                            report["users"][partner_id]["packaging"]["partner_time"] += duration_minutes
-                        elif work_type == "sales":
-                            report["users"][partner_id]["sales"]["partner_time"] += duration_minutes
-
-    # Обробляємо інші роботи
-    for work in all_other_works:
-        user_id = work.user_id
-        
-        # Додаємо тривалість іншої роботи
-        work_duration = work.duration if work.duration else 0
-        
-        # Додаємо до загальних підсумків
-        report["totals"]["other_work"]["time"] += work_duration
-        report["totals"]["other_work"]["works"] += 1
-        
-        # Додаємо до користувача
-        if user_id in report["users"]:
-            report["users"][user_id]["other_work"]["time"] += work_duration
-        
-        # Якщо є прямий партнер (partner_id)
-        if hasattr(work, 'partner_id') and work.partner_id and work.partner_id in report["users"]:
-            report["users"][work.partner_id]["other_work"]["time"] += work_duration
-            
-        # Додаємо детальну інформацію про іншу роботу
-        work_date = work.work_date.strftime("%d.%m.%Y") if hasattr(work, 'work_date') else "Невідома дата"
-        
-        # Додаємо головного користувача
-        report["other_works_details"].append({
-            "description": work.description,
-            "user_id": user_id,
-            "date": work_date,
-            "duration": work_duration
-        })
-        
-        # Додаємо прямого партнера, якщо він є
-        if hasattr(work, 'partner_id') and work.partner_id:
-            report["other_works_details"].append({
-                "description": work.description,
-                "user_id": work.partner_id,
-                "date": work_date,
-                "duration": work_duration
-            })
-
-    # Окремий цикл для обробки партнерів з таблиці OtherWorkPartner
-    async with async_session() as db_session:
-        for work in all_other_works:
-            work_duration = work.duration if work.duration else 0
-            work_date = work.work_date.strftime("%d.%m.%Y") if hasattr(work, 'work_date') else "Невідома дата"
-            
-            # Отримуємо всіх партнерів для цієї роботи
-            if work.id:
-                result = await db_session.execute(
-                    select(OtherWorkPartner.partner_id).where(
-                        OtherWorkPartner.other_work_id == work.id
-                    )
-                )
-                partners = result.scalars().all()
-                
-                # Додаємо час для кожного партнера і записуємо в деталі
-                for partner_id in partners:
-                    if partner_id in report["users"]:
-                        report["users"][partner_id]["other_work"]["time"] += work_duration
-                        
-                        # Додаємо інформацію про партнера для цієї роботи
-                        report["other_works_details"].append({
-                            "description": work.description,
-                            "user_id": partner_id,
-                            "date": work_date,
-                            "duration": work_duration
-                        })
-
-    return report
-
-
 def format_all_users_report(report_data: Dict, month: int, year: int) -> str:
     """Форматує дані звіту по всіх користувачах у текстове повідомлення
     
@@ -0,0 +1,120 @@
+import html
+import itertools
+from typing import List
+
+from aiogram import Router, types, F
+from aiogram.filters import Command, CommandObject
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from cachetools import TTLCache
+
+from services.cache import search_results
+from services.db import get_users_by_ids, is_user_approved, search_works
+
+# Створюємо роутер для пошуку
+search_router = Router()
+
+# Скільки результатів показувати в одному повідомленні
+PAGE_SIZE = 5
+# Максимальна довжина фрагмента тексту в результатах
+SNIPPET_LENGTH = 200
+
+WORK_TYPE_LABELS = {
+    "production": "🏭 Виробництво",
+    "packaging": "📦 Пакування",
+    "sales": "💰 Продаж",
+    "other_work": "📝 Інша робота",
+}
+
+# Номер сторінки -> (запит, курсор); callback_data не вміщує запит і курсор повністю
+_pages = TTLCache(maxsize=1000, ttl=30 * 60)
+_page_ids = itertools.count(1)
+
+
+@search_router.message(Command("search"))
+async def search_command(message: types.Message, command: CommandObject):
+    """Обробник команди /search"""
+    if message.chat.type != "private":
+        return
+
+    if not await is_user_approved(message.from_user.id):
+        await message.answer("❌ <b>У вас немає доступу до цієї функції.</b>", parse_mode="HTML")
+        return
+
+    query = " ".join((command.args or "").split())
+    if not query:
+        await message.answer(
+            "🔍 <b>Пошук по результатах змін та описах робіт</b>\n"
+            "Використання: <code>/search сушка яблук</code>\n"
+            "Фраза береться в лапки, а <code>-слово</code> виключає слово з пошуку.",
+            parse_mode="HTML"
+        )
+        return
+
+    await send_search_page(message, query, None)
+
+
+@search_router.callback_query(F.data.startswith("search_more_"))
+async def search_more(callback: types.CallbackQuery):
+    """Обробник кнопки наступної сторінки результатів пошуку"""
+    page = _pages.pop(int(callback.data.removeprefix("search_more_")), None)
+    if page is None:
+        await callback.answer("Пошук застарів, повторіть команду /search", show_alert=True)
+        return
+
+    await callback.answer()
+    # Кнопка переходить на нову сторінку, зі старої її прибираємо
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await send_search_page(callback.message, *page)
+
+
+async def send_search_page(message: types.Message, query: str, after):
+    """Надсилає сторінку результатів, що починається після курсора after"""
+    cache_key = (query.lower(), after)
+    rows = search_results.get(cache_key)
+    if rows is None:
+        # Беремо на один рядок більше, щоб знати, чи є наступна сторінка
+        rows = await search_works(query, PAGE_SIZE + 1, after)
+        search_results[cache_key] = rows
+
+    if not rows:
+        text = "🤷 <b>Нічого не знайдено.</b>" if after is None else "✅ <b>Більше результатів немає.</b>"
+        await message.answer(text, parse_mode="HTML")
+        return
+
+    hits = rows[:PAGE_SIZE]
+    text = await format_search_page(query, hits)
+
+    reply_markup = None
+    if len(rows) > PAGE_SIZE:
+        last = hits[-1]
+        page_id = next(_page_ids)
+        _pages[page_id] = (query, (last.rank, last.moment, last.kind, last.id))
+        builder = InlineKeyboardBuilder()
+        builder.button(text="Далі ▶️", callback_data=f"search_more_{page_id}")
+        reply_markup = builder.as_markup()
+
+    await message.answer(text, parse_mode="HTML", reply_markup=reply_markup)
+
+
+async def format_search_page(query: str, hits: List) -> str:
+    """Форматує сторінку результатів пошуку"""
+    users = {user.id: user for user in await get_users_by_ids(
+        user_id for hit in hits for user_id in hit.participants
+    )}
+
+    text = f"🔍 <b>Результати пошуку:</b> {html.escape(query)}\n\n"
+    for hit in hits:
+        snippet = hit.text or ""
+        if len(snippet) > SNIPPET_LENGTH:
+            snippet = snippet[:SNIPPET_LENGTH].rstrip() + "…"
+        names = [
+            f"@{users[user_id].username}" if user_id in users and users[user_id].username else str(user_id)
+            for user_id in hit.participants
+        ]
+
+        text += f"{WORK_TYPE_LABELS.get(hit.work_type, hit.work_type)} · <b>{hit.moment.strftime('%d.%m.%Y')}</b>\n"
+        text += f"<i>{html.escape(snippet)}</i>\n"
+        if names:
+            text += f"👥 {html.escape(', '.join(names))}\n"
+        text += "\n"
+    return text
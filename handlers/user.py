@@ -18,8 +18,6 @@ async def start_cmd(message: types.Message, state: FSMContext):
     if not check_private_chat(message):
         return
 
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     user_id = message.from_user.id
     username = message.from_user.username
 
@@ -31,7 +29,6 @@ async def start_cmd(message: types.Message, state: FSMContext):
         await add_user(user_id, username)
 
         # Повідомляємо адміністраторів про нового користувача
-        await message.bot.send_chat_action(ADMIN_ID, "typing")
         approve_kb = types.InlineKeyboardMarkup(inline_keyboard=[
             [
                 types.InlineKeyboardButton(text="✅ Підтвердити", callback_data=f"approve_{user_id}"),
@@ -77,7 +74,6 @@ async def start_cmd(message: types.Message, state: FSMContext):
 
 @user_router.message()
 async def handle_menu(message: types.Message, state: FSMContext):
-    await message.bot.send_chat_action(message.chat.id, "typing")
     # Не реагуємо на повідомлення з груп
     if message.chat.type != "private":
         return
@@ -4,7 +4,6 @@ from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 
 import keyboards as kb
-from config import CHAT_ID
 from handlers.work import WorkStates
 from services.db import (
     get_active_work_session,
@@ -39,7 +38,6 @@ def register_common_handlers(router: Router) -> None:
     async def start_work_process(message: types.Message, state: FSMContext):
         """Обробник для початку процесу роботи"""
 
-        await message.bot.send_chat_action(message.chat.id, "typing")
         # Не реагуємо на повідомлення з груп
         if not check_private_chat(message):
             return
@@ -64,7 +62,6 @@ def register_common_handlers(router: Router) -> None:
     async def back_to_main_menu(message: types.Message, state: FSMContext):
         """Обробник для повернення до головного меню"""
 
-        await message.bot.send_chat_action(message.chat.id, "typing")
         # Не реагуємо на повідомлення з груп
         if not check_private_chat(message):
             return
@@ -89,7 +86,6 @@ def register_common_handlers(router: Router) -> None:
     async def unhandled_work_type(message: types.Message, state: FSMContext):
         """Обробник невизначеного типу роботи (найнижчий пріоритет)"""
 
-        await message.bot.send_chat_action(message.chat.id, "typing")
         # Не реагуємо на повідомлення з груп
         if not check_private_chat(message):
             return
@@ -103,7 +99,6 @@ def register_common_handlers(router: Router) -> None:
     async def process_work_results(message: types.Message, state: FSMContext):
         """Обробник результатів роботи після завершення зміни"""
         # Отримуємо дані сесії
-        await message.bot.send_chat_action(message.chat.id, "typing")
 
         data = await state.get_data()
         session_id = data.get("session_id")
@@ -165,12 +160,28 @@ async def handle_production_results(message: types.Message, state: FSMContext, s
     """Обробник для завершення виробництва"""
     results = message.text
 
-    await message.bot.send_chat_action(message.chat.id, "typing")
+    # Формуємо згадку користувача
+    user_mention = f"@{message.from_user.username}" if message.from_user.username else f"{message.from_user.id}"
 
-    # Завершуємо сесію
+    # Отримуємо всіх партнерів
+    all_partners = data.get("all_partners", [])
+    nobody_selected = data.get("nobody_selected", False)
+
+    # Визначаємо текст партнерів
+    users = await get_all_approved_users()
+    partners_text = get_partners_text(all_partners, nobody_selected, users)
+
+    # Завершуємо сесію разом зі сповіщенням для загального чату
     session = await end_work_session(
         session_id=session_id,
-        results=results
+        results=results,
+        notification=lambda ended: (
+            f"🏭 <b>ВИРОБНИЦТВО ЗАВЕРШЕНО</b> 🏭\n\n"
+            f"👤 Працівник: {user_mention}\n"
+            f"👥 Партнери: {partners_text}\n"
+            f"🕒 Тривалість: <b>{calculate_duration(ended.start_time)}</b>\n\n"
+            f"📋 <b>Результати:</b> {results}"
+        )
     )
 
     # Перевіряємо, чи сесія не є None
@@ -187,28 +198,6 @@ async def handle_production_results(message: types.Message, state: FSMContext, s
     # Розраховуємо тривалість зміни
     duration = calculate_duration(session.start_time)
 
-    # Формуємо згадку користувача
-    user_mention = f"@{message.from_user.username}" if message.from_user.username else f"{message.from_user.id}"
-
-    # Отримуємо всіх партнерів
-    all_partners = data.get("all_partners", [])
-    nobody_selected = data.get("nobody_selected", False)
-
-    # Визначаємо текст партнерів
-    users = await get_all_approved_users()
-    partners_text = get_partners_text(all_partners, nobody_selected, users)
-
-    # Відправляємо повідомлення в загальний чат
-    await message.bot.send_message(
-        CHAT_ID,
-        f"🏭 <b>ВИРОБНИЦТВО ЗАВЕРШЕНО</b> 🏭\n\n"
-        f"👤 Працівник: {user_mention}\n"
-        f"👥 Партнери: {partners_text}\n"
-        f"🕒 Тривалість: <b>{duration}</b>\n\n"
-        f"📋 <b>Результати:</b> {results}",
-        parse_mode="HTML"
-    )
-
     # Відправляємо повідомлення користувачу
     await message.answer(
         f"✅ <b>Виробництво завершено!</b>\n"
@@ -5,7 +5,6 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
 import keyboards as kb
-from config import CHAT_ID
 from handlers.work import WorkStates
 from services.db import (
     get_all_approved_users,
@@ -15,9 +14,14 @@ from utils.helpers import (
     init_partner_selection,
     handle_nobody_selection,
     handle_partner_selection,
+    handle_partner_navigation,
+    handle_partner_filter_input,
+    send_partner_picker,
+    MENU_BUTTON_TEXTS,
     get_partners_text,
     check_private_chat
 )
+from utils.keyboard_edits import keyboard_edits
 
 # Створюємо роутер для іншої роботи
 other_work_router = Router()
@@ -32,20 +36,11 @@ class OtherWorkStates(StatesGroup):
 @other_work_router.message(WorkStates.select_work_type, F.text == "📝 Інша діяльність")
 async def start_other_work_process(message: types.Message, state: FSMContext):
     """Обробник початку процесу іншої роботи"""
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     # Ініціалізуємо стан для вибору партнерів
     await init_partner_selection(state, "other_work")
 
-    # Отримання всіх користувачів для вибору партнера
-    users = await get_all_approved_users()
-
     # Створюємо інлайн-клавіатуру з користувачами
-    await message.answer(
-        "👥 <b>Виберіть партнерів для іншої роботи:</b>",
-        reply_markup=kb.get_multiselect_partners_kb(users, message.from_user.id),
-        parse_mode="HTML"
-    )
+    await send_partner_picker(message, state, "👥 <b>Виберіть партнерів для іншої роботи:</b>")
     await state.set_state(OtherWorkStates.partner_selection)
 
 
@@ -61,6 +56,18 @@ async def toggle_partner_selection(callback: types.CallbackQuery, state: FSMCont
     await handle_partner_selection(callback, state)
 
 
+@other_work_router.callback_query(OtherWorkStates.partner_selection, F.data.startswith("partners_"))
+async def navigate_partners(callback: types.CallbackQuery, state: FSMContext):
+    """Обробник гортання та пошуку у списку партнерів"""
+    await handle_partner_navigation(callback, state)
+
+
+@other_work_router.message(OtherWorkStates.partner_selection, F.text, ~F.text.in_(MENU_BUTTON_TEXTS))
+async def filter_partners(message: types.Message, state: FSMContext):
+    """Обробник пошукового запиту для списку партнерів"""
+    await handle_partner_filter_input(message, state)
+
+
 @other_work_router.callback_query(OtherWorkStates.partner_selection, F.data == "confirm_partners")
 async def confirm_other_work_partners(callback: types.CallbackQuery, state: FSMContext):
     """Обробник підтвердження вибору партнерів"""
@@ -70,13 +77,13 @@ async def confirm_other_work_partners(callback: types.CallbackQuery, state: FSMC
     nobody_selected = data.get("nobody_selected", False)
 
     # Видаляємо повідомлення з інлайн-клавіатурою вибору партнерів
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
 
     # Зберігаємо вибраних партнерів
     await state.update_data(all_partners=selected_partners, nobody_selected=nobody_selected)
 
     # Питаємо опис іншої роботи
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.message.answer(
         "📝 <b>Опишіть, яку роботу ви виконали:</b>",
         reply_markup=kb.menu_kb,
@@ -92,8 +99,8 @@ async def confirm_other_work_partners(callback: types.CallbackQuery, state: FSMC
 @other_work_router.callback_query(OtherWorkStates.partner_selection, F.data == "cancel_partners")
 async def cancel_other_work_partners_selection(callback: types.CallbackQuery, state: FSMContext):
     """Обробник скасування вибору партнерів"""
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.message.answer(
         "🤖 <b>Виберіть тип роботи:</b>",
         reply_markup=kb.work_type_kb,
@@ -119,22 +126,12 @@ async def process_other_work_description(message: types.Message, state: FSMConte
 
     # Перевіряємо наявність опису
     if not description:
-        await message.bot.send_chat_action(message.chat.id, "typing")
         await message.answer(
             "❌ <b>Будь ласка, введіть опис виконаної роботи.</b>",
             parse_mode="HTML"
         )
         return
 
-    # Зберігаємо іншу роботу в базу даних
-    main_partner_id = selected_partners[0] if selected_partners else None
-    await add_other_work(
-        user_id=message.from_user.id,
-        partner_id=main_partner_id,
-        description=description,
-        all_partners=selected_partners
-    )
-
     # Формуємо згадку користувача
     user_mention = f"@{message.from_user.username}" if message.from_user.username else f"{message.from_user.id}"
 
@@ -142,19 +139,23 @@ async def process_other_work_description(message: types.Message, state: FSMConte
     users = await get_all_approved_users()
     partners_text = get_partners_text(selected_partners, nobody_selected, users)
 
-    # Відправляємо повідомлення в загальний чат
-    await message.bot.send_message(
-        CHAT_ID,
-        f"📝 <b>ІНША РОБОТА ВИКОНАНА</b> 📝\n\n"
-        f"👤 Працівник: {user_mention}\n"
-        f"👥 Партнери: {partners_text}\n"
-        f"🕒 Час запису: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>\n\n"
-        f"📋 <b>Опис роботи:</b> {description}",
-        parse_mode="HTML"
+    # Зберігаємо іншу роботу в базу даних разом зі сповіщенням для загального чату
+    main_partner_id = selected_partners[0] if selected_partners else None
+    await add_other_work(
+        user_id=message.from_user.id,
+        partner_id=main_partner_id,
+        description=description,
+        all_partners=selected_partners,
+        notification=(
+            f"📝 <b>ІНША РОБОТА ВИКОНАНА</b> 📝\n\n"
+            f"👤 Працівник: {user_mention}\n"
+            f"👥 Партнери: {partners_text}\n"
+            f"🕒 Час запису: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>\n\n"
+            f"📋 <b>Опис роботи:</b> {description}"
+        )
     )
 
     # Відправляємо повідомлення користувачу
-    await message.bot.send_chat_action(message.chat.id, "typing")
     await message.answer(
         "✅ <b>Ваша робота була записана!</b>",
         reply_markup=kb.main_menu_kb,
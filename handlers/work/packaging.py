@@ -5,7 +5,6 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
 import keyboards as kb
-from config import CHAT_ID
 from handlers.work import WorkStates
 from services.db import (
     get_all_approved_users,
@@ -18,10 +17,15 @@ from utils.helpers import (
     init_partner_selection,
     handle_nobody_selection,
     handle_partner_selection,
+    handle_partner_navigation,
+    handle_partner_filter_input,
+    send_partner_picker,
+    MENU_BUTTON_TEXTS,
     get_partners_text,
     check_private_chat,
     calculate_duration
 )
+from utils.keyboard_edits import keyboard_edits
 
 # Створюємо роутер для пакування
 packaging_router = Router()
@@ -36,8 +40,6 @@ class PackagingStates(StatesGroup):
 @packaging_router.message(WorkStates.select_work_type, F.text.in_(["📦 Пакування", "📦 Пакування продукції"]))
 async def start_packaging_process(message: types.Message, state: FSMContext):
     """Обробник початку процесу пакування"""
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     # Не реагуємо на повідомлення з груп
     if not check_private_chat(message):
         return
@@ -45,16 +47,8 @@ async def start_packaging_process(message: types.Message, state: FSMContext):
     # Ініціалізуємо стан для вибору партнерів
     await init_partner_selection(state, "packaging")
 
-    # Отримання всіх користувачів для вибору партнера
-    users = await get_all_approved_users()
-
     # Створюємо інлайн-клавіатуру з користувачами
-    await message.bot.send_chat_action(message.chat.id, "typing")
-    await message.answer(
-        "👥 <b>Виберіть партнерів для пакування:</b>",
-        reply_markup=kb.get_multiselect_partners_kb(users, message.from_user.id),
-        parse_mode="HTML"
-    )
+    await send_partner_picker(message, state, "👥 <b>Виберіть партнерів для пакування:</b>")
     await state.set_state(PackagingStates.partner_selection)
 
 
@@ -70,6 +64,18 @@ async def toggle_partner_selection(callback: types.CallbackQuery, state: FSMCont
     await handle_partner_selection(callback, state)
 
 
+@packaging_router.callback_query(PackagingStates.partner_selection, F.data.startswith("partners_"))
+async def navigate_partners(callback: types.CallbackQuery, state: FSMContext):
+    """Обробник гортання та пошуку у списку партнерів"""
+    await handle_partner_navigation(callback, state)
+
+
+@packaging_router.message(PackagingStates.partner_selection, F.text, ~F.text.in_(MENU_BUTTON_TEXTS))
+async def filter_partners(message: types.Message, state: FSMContext):
+    """Обробник пошукового запиту для списку партнерів"""
+    await handle_partner_filter_input(message, state)
+
+
 @packaging_router.callback_query(PackagingStates.partner_selection, F.data == "confirm_partners")
 async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     """Обробник підтвердження вибору партнерів"""
@@ -86,35 +92,31 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     # Зберігаємо тип роботи
     work_type = data.get("work_type")
 
-    # Зберігаємо сесію пакування
+    # Формуємо згадку користувача
+    user_mention = f"@{callback.from_user.username}" if callback.from_user.username else f"{callback.from_user.id}"
+
+    # Визначаємо текст партнерів
+    users = await get_all_approved_users()
+    partners_text = get_partners_text(selected_partners, nobody_selected, users)
+
+    # Зберігаємо сесію пакування разом зі сповіщенням для загального чату
     main_partner_id = selected_partners[0] if selected_partners else None
     session_id = await start_work_session(
         user_id=callback.from_user.id,
         partner_id=main_partner_id,
         work_type=work_type,
-        all_partners=selected_partners
+        all_partners=selected_partners,
+        notification=(
+            f"📦 <b>ПОЧАЛОСЯ ПАКУВАННЯ</b> 📦\n\n"
+            f"👤 Працівник: {user_mention}\n"
+            f"👥 Партнери: {partners_text}\n"
+            f"🕒 Час початку: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>"
+        )
     )
 
     # Зберігаємо ID сесії та вибраних партнерів
     await state.update_data(session_id=session_id, all_partners=selected_partners, nobody_selected=nobody_selected)
 
-    # Формуємо згадку користувача
-    user_mention = f"@{callback.from_user.username}" if callback.from_user.username else f"{callback.from_user.id}"
-
-    # Визначаємо текст партнерів
-    users = await get_all_approved_users()
-    partners_text = get_partners_text(selected_partners, nobody_selected, users)
-
-    # Відправляємо повідомлення в загальний чат з роботою
-    await callback.bot.send_message(
-        CHAT_ID,
-        f"📦 <b>ПОЧАЛОСЯ ПАКУВАННЯ</b> 📦\n\n"
-        f"👤 Працівник: {user_mention}\n"
-        f"👥 Партнери: {partners_text}\n"
-        f"🕒 Час початку: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>",
-        parse_mode="HTML"
-    )
-
     # Створюємо та закріплюємо інлайн клавіатуру для завершення зміни
     shift_message = await callback.message.answer(
         "🟢 <b>ЗМІНА ПАКУВАННЯ ПОЧАЛАСЬ</b>",
@@ -133,10 +135,10 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     await update_work_session_message_id(session_id, shift_message.message_id)
 
     # Видаляємо повідомлення з інлайн-клавіатурою вибору партнерів
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
 
     # Відправляємо повідомлення про початок роботи
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.message.answer(
         "✅ <b>Ви почали пакувати продукцію!</b>\n"
         "По завершенню натисніть кнопку '🔴 Завершити зміну' на закріпленому повідомленні.",
@@ -153,8 +155,8 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
 @packaging_router.callback_query(PackagingStates.partner_selection, F.data == "cancel_partners")
 async def cancel_partners_selection(callback: types.CallbackQuery, state: FSMContext):
     """Обробник скасування вибору партнерів"""
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.message.answer(
         "🤖 <b>Виберіть тип роботи:</b>",
         reply_markup=kb.work_type_kb,
@@ -224,16 +226,6 @@ async def process_package_count(message: types.Message, state: FSMContext):
         if packages_count < 0:
             raise ValueError("Кількість пакетів не може бути від'ємною")
 
-        # Завершуємо сесію
-        session = await end_work_session(
-            session_id=session_id,
-            results=f"Запаковано {packages_count} пакетів",
-            packages_count=packages_count
-        )
-
-        # Розраховуємо тривалість зміни
-        duration = calculate_duration(session.start_time)
-
         # Формуємо згадку користувача
         user_mention = f"@{message.from_user.username}" if message.from_user.username else f"{message.from_user.id}"
 
@@ -245,17 +237,23 @@ async def process_package_count(message: types.Message, state: FSMContext):
         users = await get_all_approved_users()
         partners_text = get_partners_text(all_partners, nobody_selected, users)
 
-        # Відправляємо повідомлення в загальний чат
-        await message.bot.send_message(
-            CHAT_ID,
-            f"📦 <b>ПАКУВАННЯ ЗАВЕРШЕНО</b> 📦\n\n"
-            f"👤 Працівник: {user_mention}\n"
-            f"👥 Партнери: {partners_text}\n"
-            f"🕒 Тривалість: <b>{duration}</b>\n"
-            f"📦 Запаковано пакетів: <b>{packages_count}</b>",
-            parse_mode="HTML"
+        # Завершуємо сесію разом зі сповіщенням для загального чату
+        session = await end_work_session(
+            session_id=session_id,
+            results=f"Запаковано {packages_count} пакетів",
+            packages_count=packages_count,
+            notification=lambda ended: (
+                f"📦 <b>ПАКУВАННЯ ЗАВЕРШЕНО</b> 📦\n\n"
+                f"👤 Працівник: {user_mention}\n"
+                f"👥 Партнери: {partners_text}\n"
+                f"🕒 Тривалість: <b>{calculate_duration(ended.start_time)}</b>\n"
+                f"📦 Запаковано пакетів: <b>{packages_count}</b>"
+            )
         )
 
+        # Розраховуємо тривалість зміни
+        duration = calculate_duration(session.start_time)
+
         # Відправляємо повідомлення користувачу
         await message.answer(
             f"✅ <b>Пакування завершено!</b>\n"
@@ -6,7 +6,6 @@ from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 import keyboards as kb
-from config import CHAT_ID
 from handlers.work import WorkStates
 from services.db import (
     get_all_approved_users,
@@ -18,9 +17,14 @@ from utils.helpers import (
     init_partner_selection,
     handle_nobody_selection,
     handle_partner_selection,
+    handle_partner_navigation,
+    handle_partner_filter_input,
+    send_partner_picker,
+    MENU_BUTTON_TEXTS,
     get_partners_text,
     check_private_chat
 )
+from utils.keyboard_edits import keyboard_edits
 
 # Створюємо роутер для виробництва
 production_router = Router()
@@ -35,8 +39,6 @@ class ProductionStates(StatesGroup):
                            F.text.in_(["🏭 Виробництво", "🏭 Виробництво сушених продуктів"]))
 async def start_production_process(message: types.Message, state: FSMContext):
     """Обробник початку процесу виробництва"""
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     # Не реагуємо на повідомлення з груп
     if not check_private_chat(message):
         return
@@ -44,15 +46,8 @@ async def start_production_process(message: types.Message, state: FSMContext):
     # Ініціалізуємо стан для вибору партнерів
     await init_partner_selection(state, "production")
 
-    # Отримання всіх користувачів для вибору партнера
-    users = await get_all_approved_users()
-
     # Створюємо інлайн-клавіатуру з користувачами
-    await message.answer(
-        "👥 <b>Виберіть партнерів для виробництва:</b>",
-        reply_markup=kb.get_multiselect_partners_kb(users, message.from_user.id),
-        parse_mode="HTML"
-    )
+    await send_partner_picker(message, state, "👥 <b>Виберіть партнерів для виробництва:</b>")
     await state.set_state(ProductionStates.partner_selection)
 
 
@@ -68,6 +63,18 @@ async def toggle_partner_selection(callback: types.CallbackQuery, state: FSMCont
     await handle_partner_selection(callback, state)
 
 
+@production_router.callback_query(ProductionStates.partner_selection, F.data.startswith("partners_"))
+async def navigate_partners(callback: types.CallbackQuery, state: FSMContext):
+    """Обробник гортання та пошуку у списку партнерів"""
+    await handle_partner_navigation(callback, state)
+
+
+@production_router.message(ProductionStates.partner_selection, F.text, ~F.text.in_(MENU_BUTTON_TEXTS))
+async def filter_partners(message: types.Message, state: FSMContext):
+    """Обробник пошукового запиту для списку партнерів"""
+    await handle_partner_filter_input(message, state)
+
+
 @production_router.callback_query(ProductionStates.partner_selection, F.data == "confirm_partners")
 async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     """Обробник підтвердження вибору партнерів"""
@@ -84,35 +91,31 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     # Зберігаємо тип роботи
     work_type = data.get("work_type")
 
-    # Зберігаємо сесію виробництва
+    # Формуємо згадку користувача
+    user_mention = f"@{callback.from_user.username}" if callback.from_user.username else f"{callback.from_user.id}"
+
+    # Визначаємо текст партнерів
+    users = await get_all_approved_users()
+    partners_text = get_partners_text(selected_partners, nobody_selected, users)
+
+    # Зберігаємо сесію виробництва разом зі сповіщенням для загального чату
     main_partner_id = selected_partners[0] if selected_partners else None
     session_id = await start_work_session(
         user_id=callback.from_user.id,
         partner_id=main_partner_id,
         work_type=work_type,
-        all_partners=selected_partners
+        all_partners=selected_partners,
+        notification=(
+            f"🏭 <b>ПОЧАЛОСЯ ВИРОБНИЦТВО</b> 🏭\n\n"
+            f"👤 Працівник: {user_mention}\n"
+            f"👥 Партнери: {partners_text}\n"
+            f"🕒 Час початку: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>"
+        )
     )
 
     # Зберігаємо ID сесії та вибраних партнерів
     await state.update_data(session_id=session_id, all_partners=selected_partners, nobody_selected=nobody_selected)
 
-    # Формуємо згадку користувача
-    user_mention = f"@{callback.from_user.username}" if callback.from_user.username else f"{callback.from_user.id}"
-
-    # Визначаємо текст партнерів
-    users = await get_all_approved_users()
-    partners_text = get_partners_text(selected_partners, nobody_selected, users)
-
-    # Відправляємо повідомлення в загальний чат з роботою
-    message = await callback.bot.send_message(
-        CHAT_ID,
-        f"🏭 <b>ПОЧАЛОСЯ ВИРОБНИЦТВО</b> 🏭\n\n"
-        f"👤 Працівник: {user_mention}\n"
-        f"👥 Партнери: {partners_text}\n"
-        f"🕒 Час початку: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>",
-        parse_mode="HTML"
-    )
-
     # Закріплюємо повідомлення з кнопкою для завершення зміни
     pinned_message = await callback.message.answer(
         f"🟢 <b>ЗМІНА ВИРОБНИЦТВА ПОЧАЛАСЬ</b>\n"
@@ -132,10 +135,10 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     await update_work_session_message_id(session_id, pinned_message.message_id)
 
     # Видаляємо повідомлення з інлайн-клавіатурою вибору партнерів
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
 
     # Відправляємо повідомлення про початок роботи
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.message.answer(
         "✅ <b>Ви почали виробляти продукт!</b>\n"
         "По завершенню натисніть кнопку '🔴 Завершити зміну' на закріпленому повідомленні.",
@@ -152,8 +155,8 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
 @production_router.callback_query(ProductionStates.partner_selection, F.data == "cancel_partners")
 async def cancel_partners_selection(callback: types.CallbackQuery, state: FSMContext):
     """Обробник скасування вибору партнерів"""
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await callback.message.answer(
         "🤖 <b>Виберіть тип роботи:</b>",
         reply_markup=kb.work_type_kb,
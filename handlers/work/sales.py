@@ -5,7 +5,6 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
 import keyboards as kb
-from config import CHAT_ID
 from handlers.work import WorkStates
 from handlers.work.common import calculate_duration
 from services.db import (
@@ -19,10 +18,15 @@ from utils.helpers import (
     init_partner_selection,
     handle_nobody_selection,
     handle_partner_selection,
+    handle_partner_navigation,
+    handle_partner_filter_input,
+    send_partner_picker,
+    MENU_BUTTON_TEXTS,
     get_partners_text,
     check_private_chat,
     calculate_duration
 )
+from utils.keyboard_edits import keyboard_edits
 
 # Створюємо роутер для продажу
 sales_router = Router()
@@ -38,9 +42,6 @@ class SalesStates(StatesGroup):
 @sales_router.message(WorkStates.select_work_type, F.text.in_(["💰 Продаж", "💰 Продаж та реалізація"]))
 async def start_sales_process(message: types.Message, state: FSMContext):
     """Обробник початку процесу продажу"""
-
-    await message.bot.send_chat_action(message.chat.id, "typing")
-
     # Не реагуємо на повідомлення з груп
     if not check_private_chat(message):
         return
@@ -48,15 +49,8 @@ async def start_sales_process(message: types.Message, state: FSMContext):
     # Ініціалізуємо стан для вибору партнерів
     await init_partner_selection(state, "sales")
 
-    # Отримання всіх користувачів для вибору партнера
-    users = await get_all_approved_users()
-
     # Створюємо інлайн-клавіатуру з користувачами
-    await message.answer(
-        "👥 <b>Виберіть партнерів для продажу:</b>",
-        reply_markup=kb.get_multiselect_partners_kb(users, message.from_user.id),
-        parse_mode="HTML"
-    )
+    await send_partner_picker(message, state, "👥 <b>Виберіть партнерів для продажу:</b>")
     await state.set_state(SalesStates.partner_selection)
 
 
@@ -69,14 +63,24 @@ async def toggle_nobody_selection(callback: types.CallbackQuery, state: FSMConte
 @sales_router.callback_query(SalesStates.partner_selection, F.data.startswith("select_partner_"))
 async def toggle_partner_selection(callback: types.CallbackQuery, state: FSMContext):
     """Обробник вибору партнера"""
-    await callback.bot.send_chat_action(callback.message.chat.id, "typing")
     await handle_partner_selection(callback, state)
 
 
+@sales_router.callback_query(SalesStates.partner_selection, F.data.startswith("partners_"))
+async def navigate_partners(callback: types.CallbackQuery, state: FSMContext):
+    """Обробник гортання та пошуку у списку партнерів"""
+    await handle_partner_navigation(callback, state)
+
+
+@sales_router.message(SalesStates.partner_selection, F.text, ~F.text.in_(MENU_BUTTON_TEXTS))
+async def filter_partners(message: types.Message, state: FSMContext):
+    """Обробник пошукового запиту для списку партнерів"""
+    await handle_partner_filter_input(message, state)
+
+
 @sales_router.callback_query(SalesStates.partner_selection, F.data == "confirm_partners")
 async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     """Обробник підтвердження вибору партнерів"""
-
     # Отримуємо дані партнерів
     data = await state.get_data()
     selected_partners = data.get("selected_partners", [])
@@ -90,35 +94,31 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     # Зберігаємо тип роботи
     work_type = data.get("work_type")
 
-    # Зберігаємо сесію продажу
+    # Формуємо згадку користувача
+    user_mention = f"@{callback.from_user.username}" if callback.from_user.username else f"{callback.from_user.id}"
+
+    # Визначаємо текст партнерів
+    users = await get_all_approved_users()
+    partners_text = get_partners_text(selected_partners, nobody_selected, users)
+
+    # Зберігаємо сесію продажу разом зі сповіщенням для загального чату
     main_partner_id = selected_partners[0] if selected_partners else None
     session_id = await start_work_session(
         user_id=callback.from_user.id,
         partner_id=main_partner_id,
         work_type=work_type,
-        all_partners=selected_partners
+        all_partners=selected_partners,
+        notification=(
+            f"💰 <b>РОЗПОЧАТО ЗМІНУ ПРОДАЖУ</b> 💰\n\n"
+            f"👤 Працівник: {user_mention}\n"
+            f"👥 Партнери: {partners_text}\n"
+            f"🕒 Час початку: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>"
+        )
     )
 
     # Зберігаємо ID сесії та вибраних партнерів
     await state.update_data(session_id=session_id, all_partners=selected_partners, nobody_selected=nobody_selected)
 
-    # Формуємо згадку користувача
-    user_mention = f"@{callback.from_user.username}" if callback.from_user.username else f"{callback.from_user.id}"
-
-    # Визначаємо текст партнерів
-    users = await get_all_approved_users()
-    partners_text = get_partners_text(selected_partners, nobody_selected, users)
-
-    # Відправляємо повідомлення в загальний чат з роботою
-    message = await callback.bot.send_message(
-        CHAT_ID,
-        f"💰 <b>РОЗПОЧАТО ЗМІНУ ПРОДАЖУ</b> 💰\n\n"
-        f"👤 Працівник: {user_mention}\n"
-        f"👥 Партнери: {partners_text}\n"
-        f"🕒 Час початку: <b>{datetime.datetime.now().strftime('%H:%M %d.%m.%Y')}</b>",
-        parse_mode="HTML"
-    )
-
     # Створюємо та закріплюємо інлайн клавіатуру для завершення зміни
     shift_message = await callback.message.answer(
         "🟢 <b>АКТИВНА ЗМІНА ПРОДАЖУ</b>",
@@ -137,6 +137,7 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
     await update_work_session_message_id(session_id, shift_message.message_id)
 
     # Видаляємо повідомлення з інлайн-клавіатурою вибору партнерів
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
 
     # Відправляємо повідомлення про початок роботи
@@ -156,6 +157,7 @@ async def confirm_partners(callback: types.CallbackQuery, state: FSMContext):
 @sales_router.callback_query(SalesStates.partner_selection, F.data == "cancel_partners")
 async def cancel_partners_selection(callback: types.CallbackQuery, state: FSMContext):
     """Обробник скасування вибору партнерів"""
+    keyboard_edits.discard(callback.message)
     await callback.message.delete()
     await callback.message.answer(
         "🤖 <b>Виберіть тип роботи:</b>",
@@ -260,17 +262,6 @@ async def process_sales_amount(message: types.Message, state: FSMContext):
         if sales_amount < 0:
             raise ValueError("Сума продажу не може бути від'ємною")
 
-        # Завершуємо сесію і зберігаємо результати
-        session = await end_work_session(
-            session_id=session_id,
-            results=f"Продано {packages_count} пакетів на суму {sales_amount} грн",
-            packages_count=packages_count,
-            sales_amount=sales_amount
-        )
-
-        # Розраховуємо тривалість зміни
-        duration = calculate_duration(session.start_time)
-
         # Формуємо згадку користувача
         user_mention = f"@{message.from_user.username}" if message.from_user.username else f"{message.from_user.id}"
 
@@ -282,18 +273,25 @@ async def process_sales_amount(message: types.Message, state: FSMContext):
         users = await get_all_approved_users()
         partners_text = get_partners_text(all_partners, nobody_selected, users)
 
-        # Відправляємо повідомлення в загальний чат
-        await message.bot.send_message(
-            CHAT_ID,
-            f"💰 <b>ЗМІНА ПРОДАЖУ ЗАВЕРШЕНА</b> 💰\n\n"
-            f"👤 Працівник: {user_mention}\n"
-            f"👥 Партнери: {partners_text}\n"
-            f"🕒 Тривалість: <b>{duration}</b>\n"
-            f"📦 Продано пакетів: <b>{packages_count}</b>\n"
-            f"💵 Загальна сума: <b>{sales_amount} грн</b>",
-            parse_mode="HTML"
+        # Завершуємо сесію, зберігаємо результати та сповіщення для загального чату
+        session = await end_work_session(
+            session_id=session_id,
+            results=f"Продано {packages_count} пакетів на суму {sales_amount} грн",
+            packages_count=packages_count,
+            sales_amount=sales_amount,
+            notification=lambda ended: (
+                f"💰 <b>ЗМІНА ПРОДАЖУ ЗАВЕРШЕНА</b> 💰\n\n"
+                f"👤 Працівник: {user_mention}\n"
+                f"👥 Партнери: {partners_text}\n"
+                f"🕒 Тривалість: <b>{calculate_duration(ended.start_time)}</b>\n"
+                f"📦 Продано пакетів: <b>{packages_count}</b>\n"
+                f"💵 Загальна сума: <b>{sales_amount} грн</b>"
+            )
         )
 
+        # Розраховуємо тривалість зміни
+        duration = calculate_duration(session.start_time)
+
         # Відправляємо повідомлення користувачу
         await message.answer(
             f"✅ <b>Зміну продажу завершено!</b>\n"
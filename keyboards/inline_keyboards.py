@@ -74,16 +74,23 @@ async def get_users_keyboard(users, current_user_id, include_nobody=False):
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 
+# Кількість користувачів на одній сторінці вибору партнерів
+PARTNERS_PAGE_SIZE = 10
+
+
 def get_multiselect_partners_kb(users: list, user_id: int, selected_partners: list = None,
-                                nobody_selected: bool = False) -> InlineKeyboardMarkup:
+                                nobody_selected: bool = False, page: int = 0,
+                                query: str = None) -> InlineKeyboardMarkup:
     """
     Створює інлайн-клавіатуру для вибору кількох партнерів з можливістю позначити/зняти позначку
     
     Args:
-        users: список користувачів
+        users: список користувачів (вже відфільтрований за query, якщо він заданий)
         user_id: ID поточного користувача
         selected_partners: список ID вибраних партнерів
         nobody_selected: чи вибрано "Нікого"
+        page: номер сторінки списку (з нуля)
+        query: активний фільтр за іменем користувача
     
     Returns:
         InlineKeyboardMarkup: інлайн-клавіатура з користувачами
@@ -93,26 +100,48 @@ def get_multiselect_partners_kb(users: list, user_id: int, selected_partners: li
 
     kb = InlineKeyboardBuilder()
 
+    # Не показуємо поточного користувача та обираємо лише поточну сторінку
+    candidates = [user for user in users if user.id != user_id]
+    pages_count = max(1, (len(candidates) + PARTNERS_PAGE_SIZE - 1) // PARTNERS_PAGE_SIZE)
+    page = min(max(page, 0), pages_count - 1)
+    page_users = candidates[page * PARTNERS_PAGE_SIZE:(page + 1) * PARTNERS_PAGE_SIZE]
+
     # Додаємо користувачів
-    for user in users:
-        if user.id != user_id:  # Не показуємо поточного користувача
-            # Визначаємо, чи вибраний цей партнер
-            is_selected = user.id in selected_partners
+    for user in page_users:
+        # Визначаємо, чи вибраний цей партнер
+        is_selected = user.id in selected_partners
 
-            # Додаємо відповідний символ (✅ або ⬜️)
-            mark = "✅" if is_selected and not nobody_selected else "⬜️"
+        # Додаємо відповідний символ (✅ або ⬜️)
+        mark = "✅" if is_selected and not nobody_selected else "⬜️"
 
-            # Формуємо текст кнопки з username або ID користувача
-            display_name = f"@{user.username}" if user.username else f"Користувач {user.id}"
+        # Формуємо текст кнопки з username або ID користувача
+        display_name = f"@{user.username}" if user.username else f"Користувач {user.id}"
 
-            kb.button(
-                text=f"{mark} {display_name}",
-                callback_data=f"select_partner_{user.id}"
-            )
+        kb.button(
+            text=f"{mark} {display_name}",
+            callback_data=f"select_partner_{user.id}"
+        )
 
     # Додаємо кнопки в ряди по 2
     kb.adjust(2)
 
+    if not page_users and query:
+        kb.row(InlineKeyboardButton(text="🤷 Нікого не знайдено", callback_data="partners_noop"))
+
+    # Додаємо навігацію між сторінками
+    if pages_count > 1:
+        kb.row(
+            InlineKeyboardButton(text="◀️", callback_data=f"partners_page_{(page - 1) % pages_count}"),
+            InlineKeyboardButton(text=f"{page + 1}/{pages_count}", callback_data="partners_noop"),
+            InlineKeyboardButton(text="▶️", callback_data=f"partners_page_{(page + 1) % pages_count}")
+        )
+
+    # Додаємо пошук за іменем
+    if query:
+        kb.row(InlineKeyboardButton(text=f"✖️ Скинути фільтр «{query}»", callback_data="partners_search_reset"))
+    else:
+        kb.row(InlineKeyboardButton(text="🔍 Пошук за іменем", callback_data="partners_search"))
+
     # Додаємо кнопку "Нікого"
     nobody_mark = "✅" if nobody_selected else "⬜️"
     kb.row(
@@ -123,9 +152,11 @@ def get_multiselect_partners_kb(users: list, user_id: int, selected_partners: li
     )
 
     # Додаємо кнопку підтвердження
+    selected_count = 0 if nobody_selected else len(selected_partners)
     kb.row(
         InlineKeyboardButton(
-            text="✅ Підтвердити обраних партнерів",
+            text=f"✅ Підтвердити обраних партнерів ({selected_count})" if selected_count
+            else "✅ Підтвердити обраних партнерів",
             callback_data="confirm_partners"
         )
     )
@@ -139,3 +170,10 @@ def get_multiselect_partners_kb(users: list, user_id: int, selected_partners: li
     )
 
     return kb.as_markup()
+
+
+def report_cancel_kb(job_id: int):
+    """Кнопка скасування формування звіту під статусним повідомленням"""
+    builder = InlineKeyboardBuilder()
+    builder.row(InlineKeyboardButton(text="❌ Скасувати", callback_data=f"report_cancel_{job_id}"))
+    return builder.as_markup()
@@ -3,7 +3,7 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 main_menu_kb = ReplyKeyboardMarkup(
     keyboard=[
         [KeyboardButton(text="🍇 Дегідратори"), KeyboardButton(text="🤖 Робота")],
-        [KeyboardButton(text="📊 Звітність")],
+        [KeyboardButton(text="📊 Звітність"), KeyboardButton(text="📈 Моя статистика")],
     ],
     resize_keyboard=True
 )
@@ -31,3 +31,33 @@ work_type_kb = ReplyKeyboardMarkup(
     ],
     resize_keyboard=True
 )
+
+# Клавіатура для вибору способу отримання звіту
+REPORT_TYPE_CHAT = "💬 У чаті"
+REPORT_TYPE_LEADERBOARD = "🏆 Рейтинг продуктивності"
+REPORT_TYPE_BUTTONS = {
+    "📄 HTML-файл": "html",
+    "📊 CSV-файл": "csv",
+}
+report_type_kb = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=REPORT_TYPE_CHAT)],
+        [KeyboardButton(text=text) for text in REPORT_TYPE_BUTTONS],
+        [KeyboardButton(text=REPORT_TYPE_LEADERBOARD)],
+        [KeyboardButton(text="🔙 Назад")]
+    ],
+    resize_keyboard=True
+)
+
+# Клавіатура для вибору довільного періоду звіту
+RANGE_BUTTON = "📆 Довільний період"
+TREND_BUTTON = "📉 Динаміка за місяцями"
+RANGE_PRESETS = ["📅 Цей тиждень", "📅 Минулий тиждень", "📅 Останні 30 днів", "📅 Цей квартал"]
+date_range_kb = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=text) for text in RANGE_PRESETS[:2]],
+        [KeyboardButton(text=text) for text in RANGE_PRESETS[2:]],
+        [KeyboardButton(text="🔙 Назад")]
+    ],
+    resize_keyboard=True
+)
@@ -1,49 +1,108 @@
 import asyncio
+import datetime
 
 from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import SimpleEventIsolation
 
-from config import BOT_TOKEN
+from config import BOT_TOKEN, MONTHLY_REPORT, MONTHLY_REPORT_HOUR
 from handlers.admin import admin_router
 from handlers.dehydrator import dehydrator_router
-from handlers.reports import reports_router
+from handlers.inline import inline_router
+from handlers.reports import reports_router, publish_month_report
+from handlers.search import search_router
 from handlers.user import user_router
 from handlers.work import work_router
-from services.db import init_db, check_and_notify_finished_drying
+from middleware.fsm_context import InlineStatelessFSMMiddleware
+from middleware.fsm_flush import FSMFlushMiddleware
+from services.db import init_db, check_and_notify_finished_drying, materialize_leaderboard
+from services.fsm_storage import create_storage
+from services.notifications import run_notification_delivery
+from services.send_queue import send_queue, OutgoingQueueMiddleware
+from services.snapshots import run_snapshot_refresh
+from services.workers import shutdown_workers
 
 
-async def check_drying_sessions(bot: Bot):
+async def check_drying_sessions():
     while True:
-        await check_and_notify_finished_drying(bot)
+        await check_and_notify_finished_drying()
         await asyncio.sleep(60)
 
 
+# Скільки після MONTHLY_REPORT_HOUR ще можна надіслати звіт; пізніший запуск бота чекає наступного місяця
+MONTHLY_REPORT_WINDOW = datetime.timedelta(hours=3)
+
+
+async def publish_monthly_reports():
+    """Після закриття місяця в тихий час готує звіт і рейтинг за попередній місяць, звіт надсилає в загальний чат"""
+    while True:
+        now = datetime.datetime.now()
+        run_at = now.replace(day=1, hour=MONTHLY_REPORT_HOUR, minute=0, second=0, microsecond=0)
+        if now >= run_at + MONTHLY_REPORT_WINDOW:
+            # Вікно цього місяця вже минуло (наприклад, бот запущено посеред місяця) - звіт не надсилаємо
+            run_at = (run_at + datetime.timedelta(days=32)).replace(day=1)
+        elif now >= run_at:
+            # Повторний запуск (наприклад, після перезапуску бота) нічого не надсилає вдруге
+            previous = run_at - datetime.timedelta(days=1)
+            try:
+                if await publish_month_report(previous.month, previous.year):
+                    print(f"Звіт за {previous.month:02d}.{previous.year} поставлено в чергу")
+                # Місяць закрито - рейтинг за нього можна розрахувати раз і читати готовим
+                await materialize_leaderboard(previous.year, previous.month)
+            except Exception as e:
+                print(f"Помилка при підготовці звіту за місяць: {e}")
+            run_at = (run_at + datetime.timedelta(days=32)).replace(day=1)
+
+        # Спимо частинами, щоб переведення годинника не зсувало запуск надовго
+        while (left := (run_at - datetime.datetime.now()).total_seconds()) > 0:
+            await asyncio.sleep(min(left, 3600))
+
+
 async def main():
     import middleware
 
     bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher()
+    # Усі відправлення повідомлень проходять через чергу з лімітами Telegram
+    bot.session.middleware(OutgoingQueueMiddleware(send_queue))
+    # Ізолюємо апдейти одного користувача, щоб буфер FSM не змішував зміни
+    dp = Dispatcher(storage=create_storage(), events_isolation=SimpleEventIsolation(), disable_fsm=True)
+    # Inline-запити відповідають зі знімка і не мають звертатись до сховища станів
+    dp.fsm = InlineStatelessFSMMiddleware(storage=dp.fsm.storage, events_isolation=dp.fsm.events_isolation)
+    dp.update.outer_middleware(dp.fsm)
 
     await init_db()
 
+    dp.update.outer_middleware(FSMFlushMiddleware())
+
     for middleware in middleware.__all__:
         dp.message.outer_middleware(middleware())
         dp.callback_query.outer_middleware(middleware())
         dp.inline_query.outer_middleware(middleware())
 
     dp.include_router(admin_router)
+    # Команда пошуку має працювати з будь-якого стану, тому роутер іде перед роботами
+    dp.include_router(search_router)
+    dp.include_router(inline_router)
     dp.include_router(work_router)
     dp.include_router(reports_router)
     dp.include_router(dehydrator_router)
     dp.include_router(user_router)
 
+    send_queue.start()
     polling_task = asyncio.create_task(dp.start_polling(bot))
-    checking_task = asyncio.create_task(check_drying_sessions(bot))
+    checking_task = asyncio.create_task(check_drying_sessions())
+    delivery_task = asyncio.create_task(run_notification_delivery(bot))
+    snapshot_task = asyncio.create_task(run_snapshot_refresh())
+    tasks = [polling_task, checking_task, delivery_task, snapshot_task]
+    if MONTHLY_REPORT:
+        tasks.append(asyncio.create_task(publish_monthly_reports()))
 
     try:
-        await asyncio.gather(polling_task, checking_task)
+        await asyncio.gather(*tasks)
     except Exception as e:
         print(f"Error: {e}")
     finally:
+        await send_queue.stop()
+        shutdown_workers()
         await bot.session.close()
 
 
@@ -1,5 +1,7 @@
 from .antiflood import AntifloodMiddleware
+from .chat_action import ChatActionMiddleware
 
 __all__ = [
     AntifloodMiddleware,
+    ChatActionMiddleware,
 ]
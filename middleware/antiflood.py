@@ -1,17 +1,37 @@
-from typing import Any, Awaitable, Callable, Dict
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from aiogram import BaseMiddleware
 from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message
 from cachetools import TTLCache
 
+from services.metrics import metrics
+
 
 class AntifloodMiddleware(BaseMiddleware):
-    caches = {
-        "another_flag": TTLCache(maxsize=10_000, ttl=2),
-        "default": TTLCache(maxsize=10_000, ttl=1)
+    """
+    Обмежує частоту подій від користувача за алгоритмом token bucket.
+
+    Для кожного користувача, типу події та ключа троттлінгу ведеться окреме
+    відро: користувач може надіслати до `burst` подій поспіль, після чого
+    відро поповнюється зі швидкістю `refill` токенів на секунду.
+    """
+    # Ключ троттлінгу -> (burst, refill)
+    limits = {
+        "another_flag": (3, 0.5),
+        "default": (5, 2.0),
     }
 
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None, max_users: int = 10_000):
+        if limits is not None:
+            self.limits = limits
+        # Відро, яке простояло довше за час повного поповнення, знову повне,
+        # тому його можна безпечно видалити з пам'яті
+        idle_ttl = max(math.ceil(burst / refill) for burst, refill in self.limits.values())
+        self.buckets = TTLCache(maxsize=max_users, ttl=idle_ttl)
+
     async def __call__(
             self,
             handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
@@ -19,10 +39,29 @@ class AntifloodMiddleware(BaseMiddleware):
             data: Dict[str, Any],
     ) -> Any:
         throttling_key = get_flag(handler=data, name="throttling_key", default="default")
-        if throttling_key is not None and throttling_key in self.caches:
-            chat_id = event.from_user.id
-            if chat_id in self.caches[throttling_key]:
-                return
-            else:
-                self.caches[throttling_key][chat_id] = None
+        user = data.get("event_from_user")
+        if throttling_key is None or throttling_key not in self.limits or user is None:
+            return await handler(event, data)
+
+        event_type = type(event).__name__
+        burst, refill = self.limits[throttling_key]
+        bucket_key = (event_type, throttling_key, user.id)
+        now = time.monotonic()
+
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            tokens = burst
+        else:
+            tokens, updated_at = bucket
+            tokens = min(burst, tokens + (now - updated_at) * refill)
+
+        if tokens < 1:
+            self.buckets[bucket_key] = (tokens, now)
+            metrics.inc("antiflood.dropped")
+            metrics.inc(f"antiflood.dropped.{event_type}")
+            return
+
+        self.buckets[bucket_key] = (tokens - 1, now)
+        metrics.inc("antiflood.admitted")
+        metrics.inc(f"antiflood.admitted.{event_type}")
         return await handler(event, data)
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.enums import ChatAction, ChatType
+from aiogram.types import Chat, TelegramObject
+from cachetools import TTLCache
+
+from services.metrics import metrics
+
+
+class ChatActionMiddleware(BaseMiddleware):
+    """
+    Показує "друкує..." лише тоді, коли обробка апдейту затягнулася.
+
+    Дія надсилається, якщо обробник працює довше за `threshold` секунд,
+    не частіше одного разу на `interval` секунд для чату і тільки в
+    приватних чатах. Швидкі відповіді обходяться без зайвих запитів до API.
+    """
+
+    def __init__(self, threshold: float = 0.5, interval: float = 5.0):
+        self.threshold = threshold
+        self.interval = interval
+        # Чати, яким дію вже надсилали протягом останніх interval секунд
+        self._recent_actions = TTLCache(maxsize=10_000, ttl=interval)
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        chat: Chat = data.get("event_chat")
+        bot = data.get("bot")
+        if chat is None or bot is None or chat.type != ChatType.PRIVATE:
+            return await handler(event, data)
+
+        task = asyncio.create_task(self._keep_typing(bot, chat.id))
+        try:
+            return await handler(event, data)
+        finally:
+            task.cancel()
+
+    async def _keep_typing(self, bot, chat_id: int) -> None:
+        await asyncio.sleep(self.threshold)
+        while True:
+            if chat_id in self._recent_actions:
+                metrics.inc("chat_action.skipped")
+            else:
+                self._recent_actions[chat_id] = True
+                try:
+                    await bot.send_chat_action(chat_id, ChatAction.TYPING)
+                    metrics.inc("chat_action.sent")
+                except Exception as e:
+                    print(f"Не вдалось надіслати дію чату: {e}")
+                    return
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,24 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.fsm.middleware import FSMContextMiddleware
+from aiogram.types import TelegramObject, Update
+
+
+class InlineStatelessFSMMiddleware(FSMContextMiddleware):
+    """
+    FSMContextMiddleware, що не чіпає сховище станів для inline-запитів.
+
+    Inline-запити приходять при кожному натисканні клавіші і стан FSM їм
+    не потрібен, а стандартне середовище читає стан для кожного апдейту.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and event.inline_query is not None:
+            data["fsm_storage"] = self.storage
+            return await handler(event, data)
+        return await super().__call__(handler, event, data)
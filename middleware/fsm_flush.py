@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from services.fsm_storage import PostgresStorage
+
+
+class FSMFlushMiddleware(BaseMiddleware):
+    """Записує зміни FSM, накопичені під час обробки апдейту, одним запитом"""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            state = data.get("state")
+            storage = data.get("fsm_storage")
+            if state is not None and isinstance(storage, PostgresStorage):
+                try:
+                    await storage.flush(state.key)
+                except Exception as e:
+                    # Зміни лишаються в буфері і будуть записані з наступним апдейтом
+                    print(f"Помилка при збереженні стану FSM: {e}")
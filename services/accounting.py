@@ -0,0 +1,70 @@
+"""
+Облік робочого часу з урахуванням змін, що перетинаються в часі
+"""
+import datetime
+from typing import Dict, Iterable, List, Tuple
+
+# (початок, кінець, ID сесії)
+Interval = Tuple[datetime.datetime, datetime.datetime, int]
+
+
+def session_participants(session) -> List[int]:
+    """Учасники сесії: з колонки participants або, для старих записів, з полів сесії"""
+    if getattr(session, "participants", None):
+        return list(session.participants)
+    ids = {session.user_id, session.requested_by, session.partner_id}
+    return sorted(user_id for user_id in ids if user_id is not None)
+
+
+def sweep_union(intervals: Iterable[Interval]) -> Dict:
+    """
+    Об'єднує інтервали одного користувача проходом по відсортованих кінцях (O(n log n)).
+
+    Returns:
+        Dict: raw_time - сума тривалостей, time - тривалість об'єднання (у хвилинах),
+        overlaps - список перетинів {"start", "end", "minutes", "sessions"}
+    """
+    raw = 0.0
+    union = 0.0
+    overlaps = []
+
+    current_start = current_end = None
+    current_id = None
+    for start, end, session_id in sorted(intervals, key=lambda interval: (interval[0], interval[1])):
+        raw += (end - start).total_seconds() / 60
+        if current_end is None or start >= current_end:
+            # Новий відрізок без перетину з попереднім
+            if current_end is not None:
+                union += (current_end - current_start).total_seconds() / 60
+            current_start, current_end, current_id = start, end, session_id
+            continue
+
+        overlap_end = min(end, current_end)
+        overlaps.append({
+            "start": start,
+            "end": overlap_end,
+            "minutes": (overlap_end - start).total_seconds() / 60,
+            "sessions": (current_id, session_id),
+        })
+        if end > current_end:
+            current_end, current_id = end, session_id
+
+    if current_end is not None:
+        union += (current_end - current_start).total_seconds() / 60
+
+    return {"raw_time": raw, "time": union, "overlaps": overlaps}
+
+
+def account_sessions(sessions: Iterable) -> Dict[int, Dict]:
+    """Рахує для кожного учасника сумарний і фактичний (без перетинів) час змін
+
+    Інша робота не має часу початку й кінця, тому сюди не входить.
+    """
+    intervals: Dict[int, List[Interval]] = {}
+    for session in sessions:
+        if not session.end_time:
+            continue
+        for user_id in session_participants(session):
+            intervals.setdefault(user_id, []).append((session.start_time, session.end_time, session.id))
+
+    return {user_id: sweep_union(user_intervals) for user_id, user_intervals in intervals.items()}
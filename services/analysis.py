@@ -0,0 +1,239 @@
+"""
+Чисті (без доступу до БД і Telegram) етапи побудови звіту за місяць
+
+Функції працюють зі звичайними записами замість ORM-об'єктів, тому їх
+можна передавати в процес-воркер (див. services.workers).
+"""
+import datetime
+import html
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from services.accounting import account_sessions, session_participants
+from utils.formatting import format_time
+from utils.pagination import pack_blocks
+
+
+class SessionRecord(NamedTuple):
+    """Робоча сесія у вигляді простого запису"""
+    id: int
+    user_id: int
+    partner_id: Optional[int]
+    requested_by: Optional[int]
+    work_type: str
+    start_time: datetime.datetime
+    end_time: Optional[datetime.datetime]
+    results: Optional[str]
+    packages_count: Optional[int]
+    sales_amount: Optional[int]
+    participants: List[int]
+
+
+class OtherWorkRecord(NamedTuple):
+    """Запис іншої роботи у вигляді простого запису"""
+    id: int
+    user_id: int
+    partner_id: Optional[int]
+    description: str
+    work_date: datetime.datetime
+    duration: Optional[int]
+    participants: List[int]
+
+
+def session_records(sessions: Iterable) -> List[SessionRecord]:
+    """Перетворює ORM-об'єкти сесій на прості записи"""
+    return [SessionRecord(*(getattr(session, field) for field in SessionRecord._fields)) for session in sessions]
+
+
+def other_work_records(works: Iterable) -> List[OtherWorkRecord]:
+    """Перетворює ORM-об'єкти іншої роботи на прості записи"""
+    return [OtherWorkRecord(*(getattr(work, field) for field in OtherWorkRecord._fields)) for work in works]
+
+
+def analyze_all_work_data(all_work_sessions: List, all_other_works: List) -> Dict:
+    """Аналізує дані всіх користувачів та повертає структуровану інформацію для звіту
+
+    Кожен учасник сесії враховується один раз: замовник (requested_by) - як
+    головний, решта - як партнери. Для кожного користувача окремо рахується
+    фактичний час змін без перетинів (див. services.accounting).
+    """
+    report = {
+        "totals": {
+            "production": {"time": 0, "sessions": 0},
+            "packaging": {"time": 0, "sessions": 0, "packages": 0},
+            "sales": {"time": 0, "sessions": 0, "packages": 0, "amount": 0},
+            "other_work": {"time": 0, "works": 0}
+        },
+        "users": {},
+        "other_works_details": []  # Додаємо деталі інших робіт
+    }
+
+    def user_report(user_id: int) -> Dict:
+        if user_id not in report["users"]:
+            report["users"][user_id] = {
+                "production": {"host_time": 0, "partner_time": 0},
+                "packaging": {"host_time": 0, "partner_time": 0, "packages": 0},
+                "sales": {"host_time": 0, "partner_time": 0, "packages": 0, "amount": 0},
+                "other_work": {"time": 0},
+                "accounting": {"raw_time": 0, "time": 0, "overlaps": []}
+            }
+        return report["users"][user_id]
+
+    # Обробляємо сесії роботи
+    for ws in all_work_sessions:
+        if not ws.end_time:
+            continue  # Пропускаємо незавершені сесії
+
+        work_type = ws.work_type
+        if work_type not in ("production", "packaging", "sales"):
+            continue
+
+        # Розраховуємо тривалість у хвилинах
+        duration_minutes = (ws.end_time - ws.start_time).total_seconds() / 60
+        packages_count = ws.packages_count if ws.packages_count else 0
+        sales_amount = ws.sales_amount if ws.sales_amount else 0
+
+        # Додаємо до загальних підсумків (тільки один раз для кожної сесії)
+        totals = report["totals"][work_type]
+        totals["time"] += duration_minutes
+        totals["sessions"] += 1
+        if work_type in ("packaging", "sales"):
+            totals["packages"] += packages_count
+        if work_type == "sales":
+            totals["amount"] += sales_amount
+
+        for user_id in session_participants(ws):
+            user_data = user_report(user_id)[work_type]
+            if user_id == ws.requested_by:
+                user_data["host_time"] += duration_minutes
+                # Пакети та суму зараховуємо лише замовнику
+                if work_type in ("packaging", "sales"):
+                    user_data["packages"] += packages_count
+                if work_type == "sales":
+                    user_data["amount"] += sales_amount
+            else:
+                user_data["partner_time"] += duration_minutes
+
+    # Фактичний час без перетинів змін
+    for user_id, accounting in account_sessions(all_work_sessions).items():
+        user_report(user_id)["accounting"] = accounting
+
+    # Обробляємо інші роботи
+    for work in all_other_works:
+        # Додаємо тривалість іншої роботи
+        work_duration = work.duration if work.duration else 0
+
+        # Додаємо до загальних підсумків
+        report["totals"]["other_work"]["time"] += work_duration
+        report["totals"]["other_work"]["works"] += 1
+
+        work_date = work.work_date.strftime("%d.%m.%Y")
+        participants = work.participants or [user_id for user_id in (work.user_id, work.partner_id) if user_id]
+        for user_id in participants:
+            user_report(user_id)["other_work"]["time"] += work_duration
+            # Додаємо детальну інформацію про іншу роботу
+            report["other_works_details"].append({
+                "description": work.description,
+                "user_id": user_id,
+                "date": work_date,
+                "duration": work_duration
+            })
+
+    return report
+
+
+def build_report_summary(report_data: Dict, month_name: str, year: int) -> str:
+    """Загальні підсумки звіту за місяць"""
+    totals = report_data["totals"]
+
+    # Обчислюємо загальний час для всіх типів робіт
+    total_all_time = (
+        totals['production']['time'] + 
+        totals['packaging']['time'] + 
+        totals['sales']['time'] + 
+        totals['other_work']['time']
+    )
+
+    report = f"📊 <b>Звіт за {month_name} {year} - Загальні підсумки</b>\n\n"
+    report += "📋 <b>Загальні підсумки:</b>\n"
+    report += f"🏭 <b>Виробництво:</b> {format_time(totals['production']['time'])}\n"
+    report += f"📦 <b>Пакування:</b> {format_time(totals['packaging']['time'])}, {totals['packaging']['packages']} пакетів\n"
+    report += f"💰 <b>Продаж:</b> {format_time(totals['sales']['time'])}, {totals['sales']['packages']} пакетів, {totals['sales']['amount']} грн\n"
+    report += f"📝 <b>Інша робота:</b> {format_time(totals['other_work']['time'])}, {totals['other_work']['works']} робіт\n"
+    report += f"⏱ <b>Загальний час усіх робіт:</b> {format_time(total_all_time)}\n\n"
+    return report
+
+
+def build_report_blocks(summary: str, report_data: Dict, month_name: str, year: int,
+                        user_names: Dict[int, str]) -> Iterator[str]:
+    """Формує детальний звіт як послідовність логічних блоків: підсумки, користувачі, інші роботи"""
+    yield summary
+    yield f"📊 <b>Детальний звіт за {month_name} {year} по користувачах</b>\n\n"
+
+    for user_id, user_data in report_data["users"].items():
+        block = f"👤 <b>{html.escape(user_names[user_id])}</b>\n"
+
+        # Додаємо інформацію про виробництво
+        production = user_data["production"]
+        production_time = production['host_time'] + production['partner_time']
+        if production_time > 0:
+            block += f"🏭 Виробництво: {format_time(production_time)}\n"
+
+        # Додаємо інформацію про пакування
+        packaging = user_data["packaging"]
+        packaging_time = packaging['host_time'] + packaging['partner_time']
+        if packaging_time > 0:
+            block += f"📦 Пакування: {format_time(packaging_time)}"
+            if packaging['packages'] > 0:
+                block += f", {packaging['packages']} пакетів"
+            block += "\n"
+
+        # Додаємо інформацію про продаж
+        sales = user_data["sales"]
+        sales_time = sales['host_time'] + sales['partner_time']
+        if sales_time > 0:
+            block += f"💰 Продаж: {format_time(sales_time)}"
+            if sales['packages'] > 0:
+                block += f", {sales['packages']} пакетів"
+            if sales['amount'] > 0:
+                block += f", {sales['amount']} грн"
+            block += "\n"
+
+        # Додаємо інформацію про іншу роботу
+        other_work = user_data["other_work"]
+        if other_work['time'] > 0:
+            block += f"📝 Інша робота: {format_time(other_work['time'])}\n"
+
+        # Загальний час рахуємо без перетинів змін, щоб не завищувати години
+        accounting = user_data["accounting"]
+        total_time = accounting['time'] + other_work['time']
+        block += f"⏱ <b>Загальний час:</b> {format_time(total_time)}\n"
+        if accounting["overlaps"]:
+            block += (f"⚠️ Перетини змін: {len(accounting['overlaps'])}, "
+                      f"{format_time(accounting['raw_time'] - accounting['time'])} не враховано\n")
+        yield block + "\n"
+
+    # Формуємо словник для іншої роботи, де ключ - опис роботи, а значення - список учасників
+    other_works_users = {}
+    for work_detail in report_data.get("other_works_details", []):
+        user_entry = f"{work_detail['date']} - {html.escape(user_names[work_detail['user_id']])}"
+        entries = other_works_users.setdefault(work_detail["description"], [])
+        # Додаємо тільки унікальні записи
+        if user_entry not in entries:
+            entries.append(user_entry)
+
+    if not other_works_users:
+        return
+
+    yield f"📋 <b>Список інших робіт за {month_name} {year}:</b>\n\n"
+    # Сортуємо роботи за описом, а учасників - за датою
+    for description in sorted(other_works_users):
+        block = f"📝 <b>{html.escape(description)}</b>\n"
+        for user_info in sorted(other_works_users[description]):
+            block += f"   • {user_info}\n"
+        yield block + "\n"
+
+
+def render_month_pages(report_data: Dict, user_names: Dict[int, str], month_name: str, year: int) -> List[str]:
+    """Готові сторінки звіту за місяць для надсилання в чат"""
+    summary = build_report_summary(report_data, month_name, year)
+    return list(pack_blocks(build_report_blocks(summary, report_data, month_name, year, user_names)))
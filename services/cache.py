@@ -0,0 +1,36 @@
+"""
+Версії даних за місяць і кеші, що від них залежать
+"""
+import datetime
+from typing import Dict, Tuple
+
+from cachetools import LRUCache, TTLCache
+
+# (рік, місяць) -> номер версії даних; збільшується при кожному записі за цей місяць
+_month_versions: Dict[Tuple[int, int], int] = {}
+
+# (місяць, рік, формат, версія) -> file_id вже завантаженого документа зі звітом
+report_documents = LRUCache(maxsize=128)
+
+# (місяць, рік, версія) -> (дані звіту, імена користувачів) для звіту за місяць
+month_reports = LRUCache(maxsize=12)
+
+# (користувач або None, останній місяць, кількість місяців, версії місяців) -> file_id графіка динаміки
+chart_files = LRUCache(maxsize=256)
+
+# (запит, курсор) -> сторінка результатів повнотекстового пошуку
+search_results = TTLCache(maxsize=256, ttl=60)
+
+# (користувач, місяць, рік, версія) -> готовий текст персональної статистики
+user_stats = TTLCache(maxsize=1000, ttl=10 * 60)
+
+
+def month_version(month: int, year: int) -> int:
+    """Поточна версія даних за місяць"""
+    return _month_versions.get((year, month), 0)
+
+
+def bump_month_version(moment: datetime.datetime) -> None:
+    """Позначає, що дані за місяць, до якого належить moment, змінилися"""
+    key = (moment.year, moment.month)
+    _month_versions[key] = _month_versions.get(key, 0) + 1
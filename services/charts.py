@@ -0,0 +1,66 @@
+"""
+Графіки динаміки роботи за місяцями
+
+render_trend_chart - чиста функція над простими даними, тож вона виконується
+в процес-воркері (див. services.workers) і не блокує бота.
+"""
+import io
+from typing import Dict, List
+
+# Назви типів робіт на графіку (емодзі шрифт графіка не підтримує)
+WORK_TYPE_NAMES = {
+    "production": "Виробництво",
+    "packaging": "Пакування",
+    "sales": "Продаж",
+    "other_work": "Інша робота",
+}
+
+
+def render_trend_chart(title: str, labels: List[str], hours: Dict[str, List[float]], packages: List[int],
+                       amounts: List[int]) -> bytes:
+    """
+    Малює PNG з двома графіками: години за типами робіт (стовпці з накопиченням)
+    та пакети і сума продажу (лінії) для кожного місяця.
+
+    Args:
+        labels: підписи місяців
+        hours: тип роботи -> години по місяцях
+        packages: кількість запакованих пакетів по місяцях
+        amounts: сума продажу по місяцях, грн
+    """
+    # Figure без pyplot не має глобального стану і не потребує графічного середовища
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(8, 6), dpi=110)
+    FigureCanvasAgg(figure)
+    hours_axis, packages_axis = figure.subplots(2, 1, sharex=True)
+
+    bottom = [0.0] * len(labels)
+    for work_type, name in WORK_TYPE_NAMES.items():
+        values = hours.get(work_type)
+        if not values or not any(values):
+            continue
+        hours_axis.bar(labels, values, bottom=bottom, label=name)
+        bottom = [total + value for total, value in zip(bottom, values)]
+    hours_axis.set_ylabel("Години")
+    hours_axis.grid(axis="y", alpha=0.3)
+    if any(bottom):
+        hours_axis.legend(loc="upper left", fontsize="small")
+
+    packages_axis.plot(labels, packages, marker="o", color="tab:blue", label="Пакети (пакування)")
+    packages_axis.set_ylabel("Пакети")
+    packages_axis.grid(axis="y", alpha=0.3)
+    amount_axis = packages_axis.twinx()
+    amount_axis.plot(labels, amounts, marker="s", color="tab:green", label="Продаж, грн")
+    amount_axis.set_ylabel("Продаж, грн")
+
+    lines = packages_axis.get_lines() + amount_axis.get_lines()
+    packages_axis.legend(lines, [line.get_label() for line in lines], loc="upper left", fontsize="small")
+
+    figure.suptitle(title)
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
@@ -1,18 +1,31 @@
+import asyncio
 import datetime
-from typing import List, Tuple
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy import BigInteger, Integer, Boolean, String, select, update, DateTime, delete, and_, Text, ForeignKey, \
-    or_
+    or_, Select, text, union, extract, Date, Float, Computed, func, literal, literal_column, tuple_, union_all, Index
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-from config import DATABASE_URL, CHAT_ID
+from config import DATABASE_URL, CHAT_ID, FTS_CONFIG
+from services.cache import bump_month_version
 
 # Використання asyncpg
 engine = create_async_engine(DATABASE_URL, echo=True, pool_size=5, max_overflow=10, future=True)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Назва конфігурації підставляється прямо в DDL, тому дозволяємо лише звичайні ідентифікатори
+if not FTS_CONFIG.isidentifier():
+    raise ValueError(f"Некоректна конфігурація повнотекстового пошуку: {FTS_CONFIG}")
+
+
+def _search_vector(column: str) -> str:
+    """Вираз generated-колонки з tsvector для текстової колонки"""
+    return f"to_tsvector('{FTS_CONFIG}'::regconfig, coalesce({column}, ''))"
+
 
 class Base(DeclarativeBase):
     pass
@@ -47,6 +60,10 @@ class WorkSession(Base):
     message_id: Mapped[int] = mapped_column(Integer, nullable=True)  # ID закріпленого повідомлення
     packages_count: Mapped[int] = mapped_column(Integer, nullable=True)  # Кількість пакетів (для пакування)
     sales_amount: Mapped[float] = mapped_column(Integer, nullable=True)  # Сума продажів (для продажів)
+    # Усі учасники сесії (user_id, requested_by, partner_id та партнери з WorkPartner)
+    participants: Mapped[List[int]] = mapped_column(ARRAY(BigInteger), nullable=False, server_default="{}")
+    # Повнотекстовий індекс результатів; рахується самим Postgres і не завантажується разом із сесією
+    search_vector = mapped_column(TSVECTOR, Computed(_search_vector("results"), persisted=True), deferred=True)
 
 
 class WorkPartner(Base):
@@ -65,6 +82,10 @@ class OtherWork(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     work_date: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
     duration: Mapped[int] = mapped_column(Integer, nullable=True)  # Тривалість у хвилинах
+    # Усі учасники роботи (user_id, partner_id та партнери з OtherWorkPartner)
+    participants: Mapped[List[int]] = mapped_column(ARRAY(BigInteger), nullable=False, server_default="{}")
+    # Повнотекстовий індекс опису
+    search_vector = mapped_column(TSVECTOR, Computed(_search_vector("description"), persisted=True), deferred=True)
 
 
 class OtherWorkPartner(Base):
@@ -75,9 +96,349 @@ class OtherWorkPartner(Base):
     partner_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
 
+class NotificationOutbox(Base):
+    """Модель для сповіщень, записаних разом зі зміною даних і ще не доставлених у Telegram"""
+    __tablename__ = "notification_outbox"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    event_type: Mapped[str] = mapped_column(String, nullable=False)  # "work_start", "drying_finish" тощо
+    dedup_key: Mapped[str] = mapped_column(String, nullable=True, unique=True)  # Захист від повторного запису
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")  # "pending", "sent" або "failed"
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, index=True)
+    sent_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=True)  # Автор події, для рядка у зведенні
+
+
+class FSMRecord(Base):
+    """Модель для зберігання станів та даних FSM між перезапусками бота"""
+    __tablename__ = "fsm_storage"
+    key: Mapped[str] = mapped_column(String, primary_key=True)  # Ключ, побудований зі StorageKey
+    state: Mapped[str] = mapped_column(String, nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+
+
+class DailyRollup(Base):
+    """Накопичувальні підсумки роботи користувача за днями
+
+    cum_* містять суму з першого дня до day включно, тож підсумки за будь-який
+    період - це різниця двох рядків: на кінець періоду та перед його початком.
+    """
+    __tablename__ = "daily_rollups"
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    work_type: Mapped[str] = mapped_column(String, primary_key=True)  # "production", ..., "other_work"
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    minutes: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    packages: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    amount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cum_minutes: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    cum_sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cum_packages: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cum_amount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class LeaderboardEntry(Base):
+    """Рейтинг продуктивності за закритий місяць, розрахований заздалегідь"""
+    __tablename__ = "leaderboard"
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    work_type: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False)
+    minutes: Mapped[float] = mapped_column(Float, nullable=False)
+    packages: Mapped[int] = mapped_column(Integer, nullable=False)
+    amount: Mapped[int] = mapped_column(Integer, nullable=False)
+    packages_per_hour: Mapped[float] = mapped_column(Float, nullable=True)
+    amount_per_hour: Mapped[float] = mapped_column(Float, nullable=True)
+
+    # Рейтинг за місяць читається одним проходом по цьому індексу
+    __table_args__ = (Index("ix_leaderboard_month_rank", "year", "month", "work_type", "rank"),)
+
+
+class LeaderboardMonth(Base):
+    """Місяці, для яких рейтинг уже розраховано; запис видаляється, коли дані місяця змінюються"""
+    __tablename__ = "leaderboard_months"
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    built_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+
+
+ROLLUP_METRICS = ("minutes", "sessions", "packages", "amount")
+
+# Додає внесок у день і переносить його в накопичувальні суми цього та наступних днів
+_ROLLUP_UPSERT = text("""
+    INSERT INTO daily_rollups (user_id, work_type, day, minutes, sessions, packages, amount,
+                               cum_minutes, cum_sessions, cum_packages, cum_amount)
+    SELECT :user_id, :work_type, :day, :minutes, :sessions, :packages, :amount,
+           COALESCE(prev.cum_minutes, 0) + :minutes, COALESCE(prev.cum_sessions, 0) + :sessions,
+           COALESCE(prev.cum_packages, 0) + :packages, COALESCE(prev.cum_amount, 0) + :amount
+    FROM (SELECT 1) AS one
+    LEFT JOIN LATERAL (
+        SELECT cum_minutes, cum_sessions, cum_packages, cum_amount FROM daily_rollups
+        WHERE user_id = :user_id AND work_type = :work_type AND day < :day
+        ORDER BY day DESC LIMIT 1
+    ) AS prev ON TRUE
+    ON CONFLICT (user_id, work_type, day) DO UPDATE SET
+        minutes = daily_rollups.minutes + EXCLUDED.minutes,
+        sessions = daily_rollups.sessions + EXCLUDED.sessions,
+        packages = daily_rollups.packages + EXCLUDED.packages,
+        amount = daily_rollups.amount + EXCLUDED.amount,
+        cum_minutes = daily_rollups.cum_minutes + EXCLUDED.minutes,
+        cum_sessions = daily_rollups.cum_sessions + EXCLUDED.sessions,
+        cum_packages = daily_rollups.cum_packages + EXCLUDED.packages,
+        cum_amount = daily_rollups.cum_amount + EXCLUDED.amount
+""")
+_ROLLUP_SHIFT = text("""
+    UPDATE daily_rollups SET
+        cum_minutes = cum_minutes + :minutes, cum_sessions = cum_sessions + :sessions,
+        cum_packages = cum_packages + :packages, cum_amount = cum_amount + :amount
+    WHERE user_id = :user_id AND work_type = :work_type AND day > :day
+""")
+# Повне перерахування з сирих даних (після імпорту або при першому запуску)
+_ROLLUP_REBUILD = [
+    "DELETE FROM daily_rollups",
+    """
+    INSERT INTO daily_rollups (user_id, work_type, day, minutes, sessions, packages, amount,
+                               cum_minutes, cum_sessions, cum_packages, cum_amount)
+    SELECT user_id, work_type, day, minutes, sessions, packages, amount,
+           SUM(minutes) OVER w, SUM(sessions) OVER w, SUM(packages) OVER w, SUM(amount) OVER w
+    FROM (
+        SELECT user_id, work_type, day, SUM(minutes) AS minutes, SUM(sessions) AS sessions,
+               SUM(packages) AS packages, SUM(amount) AS amount
+        FROM (
+            SELECT p.user_id, ws.work_type, ws.start_time::date AS day,
+                   EXTRACT(EPOCH FROM ws.end_time - ws.start_time) / 60 AS minutes, 1 AS sessions,
+                   CASE WHEN p.user_id = ws.requested_by THEN COALESCE(ws.packages_count, 0) ELSE 0 END AS packages,
+                   CASE WHEN p.user_id = ws.requested_by THEN COALESCE(ws.sales_amount, 0) ELSE 0 END AS amount
+            FROM work_sessions ws CROSS JOIN LATERAL unnest(ws.participants) AS p(user_id)
+            WHERE ws.end_time IS NOT NULL
+            UNION ALL
+            SELECT p.user_id, 'other_work', ow.work_date::date, COALESCE(ow.duration, 0), 1, 0, 0
+            FROM other_work ow CROSS JOIN LATERAL unnest(ow.participants) AS p(user_id)
+        ) AS contributions
+        GROUP BY user_id, work_type, day
+    ) AS daily
+    WINDOW w AS (PARTITION BY user_id, work_type ORDER BY day)
+    """,
+]
+
+
+# Менше цього часу за місяць - замало для чесного порівняння швидкості, такі рядки йдуть у кінець рейтингу
+LEADERBOARD_MIN_MINUTES = 60
+
+# Показники кожного учасника за місяць і місце серед тих, хто виконував той самий тип робіт.
+# Кожному учаснику зміни зараховуються її час, пакети та сума, тож швидкість - це швидкість змін,
+# у яких він брав участь. Виробництво ранжується за часом, пакування - за пакетами на годину,
+# продаж - за сумою на годину.
+_LEADERBOARD_SELECT = """
+    SELECT work_type, user_id, sessions, minutes, packages, amount, packages_per_hour, amount_per_hour,
+           RANK() OVER (
+               PARTITION BY work_type
+               ORDER BY CASE WHEN minutes >= :min_minutes THEN
+                   CASE work_type WHEN 'packaging' THEN packages_per_hour
+                                  WHEN 'sales' THEN amount_per_hour
+                                  ELSE minutes END
+               END DESC NULLS LAST
+           ) AS rank
+    FROM (
+        SELECT work_type, user_id, COUNT(*) AS sessions, SUM(minutes) AS minutes,
+               SUM(packages) AS packages, SUM(amount) AS amount,
+               SUM(packages) * 60 / NULLIF(SUM(minutes), 0) AS packages_per_hour,
+               SUM(amount) * 60 / NULLIF(SUM(minutes), 0) AS amount_per_hour
+        FROM (
+            SELECT ws.work_type, p.user_id, EXTRACT(EPOCH FROM ws.end_time - ws.start_time) / 60 AS minutes,
+                   COALESCE(ws.packages_count, 0) AS packages, COALESCE(ws.sales_amount, 0) AS amount
+            FROM work_sessions ws CROSS JOIN LATERAL unnest(ws.participants) AS p(user_id)
+            WHERE ws.end_time IS NOT NULL AND ws.start_time >= :start AND ws.start_time < :end
+              AND ws.work_type IN ('production', 'packaging', 'sales')
+        ) AS contributions
+        GROUP BY work_type, user_id
+    ) AS totals
+"""
+
+
+# Підсумки за період як різниця двох зрізів накопичувальних сум. Пари
+# (користувач, тип роботи) перебираються стрибками по первинному ключу, а кожен
+# зріз - це один пошук по індексу, тож запит не читає всю історію
+_RANGE_TOTALS = text("""
+    WITH RECURSIVE rollup_keys AS (
+        (SELECT user_id, work_type FROM daily_rollups ORDER BY user_id, work_type LIMIT 1)
+        UNION ALL
+        SELECT next_key.user_id, next_key.work_type
+        FROM rollup_keys k
+        CROSS JOIN LATERAL (
+            SELECT r.user_id, r.work_type FROM daily_rollups r
+            WHERE (r.user_id, r.work_type) > (k.user_id, k.work_type)
+            ORDER BY r.user_id, r.work_type
+            LIMIT 1
+        ) next_key
+    )
+    SELECT k.user_id, k.work_type,
+           at_end.cum_minutes - COALESCE(before_start.cum_minutes, 0) AS minutes,
+           at_end.cum_sessions - COALESCE(before_start.cum_sessions, 0) AS sessions,
+           at_end.cum_packages - COALESCE(before_start.cum_packages, 0) AS packages,
+           at_end.cum_amount - COALESCE(before_start.cum_amount, 0) AS amount
+    FROM rollup_keys k
+    CROSS JOIN LATERAL (
+        SELECT r.cum_minutes, r.cum_sessions, r.cum_packages, r.cum_amount FROM daily_rollups r
+        WHERE r.user_id = k.user_id AND r.work_type = k.work_type AND r.day <= :end_day
+        ORDER BY r.day DESC
+        LIMIT 1
+    ) at_end
+    LEFT JOIN LATERAL (
+        SELECT r.cum_minutes, r.cum_sessions, r.cum_packages, r.cum_amount FROM daily_rollups r
+        WHERE r.user_id = k.user_id AND r.work_type = k.work_type AND r.day < :start_day
+        ORDER BY r.day DESC
+        LIMIT 1
+    ) before_start ON true
+""")
+
+
+# Подія, яка будить доставку сповіщень після запису нових рядків у outbox
+outbox_ready = asyncio.Event()
+
+
+# Зміни схеми для вже створених таблиць; кожна інструкція має бути ідемпотентною
+_SCHEMA_UPGRADES = [
+    "CREATE INDEX IF NOT EXISTS ix_work_sessions_user_id_start ON work_sessions (user_id, start_time)",
+    "CREATE INDEX IF NOT EXISTS ix_other_work_user_id_date ON other_work (user_id, work_date)",
+    # Пошук за учасником тепер іде через participants, окремі індекси не потрібні
+    "DROP INDEX IF EXISTS ix_work_sessions_requested_by_start",
+    "DROP INDEX IF EXISTS ix_work_partners_partner_id",
+    "DROP INDEX IF EXISTS ix_other_work_partners_partner_id",
+    "ALTER TABLE work_sessions ADD COLUMN IF NOT EXISTS participants BIGINT[] NOT NULL DEFAULT '{}'",
+    "ALTER TABLE other_work ADD COLUMN IF NOT EXISTS participants BIGINT[] NOT NULL DEFAULT '{}'",
+    # Заповнюємо participants для записів, створених до появи колонки
+    """
+    UPDATE work_sessions ws SET participants = ARRAY(
+        SELECT DISTINCT p FROM unnest(
+            ARRAY[ws.user_id, ws.requested_by, ws.partner_id]
+            || ARRAY(SELECT wp.partner_id FROM work_partners wp WHERE wp.session_id = ws.id)
+        ) AS p WHERE p IS NOT NULL ORDER BY p
+    ) WHERE ws.participants = '{}'
+    """,
+    """
+    UPDATE other_work ow SET participants = ARRAY(
+        SELECT DISTINCT p FROM unnest(
+            ARRAY[ow.user_id, ow.partner_id]
+            || ARRAY(SELECT owp.partner_id FROM other_work_partners owp WHERE owp.other_work_id = ow.id)
+        ) AS p WHERE p IS NOT NULL ORDER BY p
+    ) WHERE ow.participants = '{}'
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_work_sessions_participants ON work_sessions USING GIN (participants)",
+    "CREATE INDEX IF NOT EXISTS ix_other_work_participants ON other_work USING GIN (participants)",
+    # Повнотекстовий пошук: generated-колонки заповнюються для наявних рядків під час ALTER
+    f"ALTER TABLE work_sessions ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_search_vector('results')}) STORED",
+    f"ALTER TABLE other_work ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_search_vector('description')}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_work_sessions_search ON work_sessions USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_other_work_search ON other_work USING GIN (search_vector)",
+    "ALTER TABLE notification_outbox ADD COLUMN IF NOT EXISTS user_id BIGINT",
+]
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in _SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+
+        # Таблиця підсумків щойно з'явилась - заповнюємо її з наявних даних
+        if await conn.scalar(select(DailyRollup.user_id).limit(1)) is None:
+            await _rebuild_daily_rollups(conn)
+
+
+async def _rebuild_daily_rollups(conn) -> None:
+    for statement in _ROLLUP_REBUILD:
+        await conn.execute(text(statement))
+
+
+async def rebuild_daily_rollups() -> None:
+    """Перераховує таблицю daily_rollups з сирих даних"""
+    async with engine.begin() as conn:
+        await _rebuild_daily_rollups(conn)
+
+
+async def add_to_rollups(session: AsyncSession, user_id: int, work_type: str, day: datetime.date,
+                         minutes: float, sessions: int = 1, packages: int = 0, amount: int = 0) -> None:
+    """Додає внесок у щоденні підсумки в межах транзакції переданої сесії"""
+    params = {"user_id": user_id, "work_type": work_type, "day": day, "minutes": minutes,
+              "sessions": sessions, "packages": packages, "amount": amount}
+    await session.execute(_ROLLUP_UPSERT, params)
+    # Зазвичай це сьогоднішній день і пізніших рядків немає
+    await session.execute(_ROLLUP_SHIFT, params)
+
+
+def collect_participants(*ids) -> List[int]:
+    """Збирає відсортований список унікальних учасників з ID та списків ID"""
+    participants = set()
+    for item in ids:
+        if isinstance(item, (list, tuple, set)):
+            participants.update(item)
+        elif item is not None:
+            participants.add(item)
+    return sorted(participants)
+
+
+def add_notification(session: AsyncSession, text: str, event_type: str, dedup_key: str = None,
+                     chat_id: int = None, user_id: int = None):
+    """Додає сповіщення в outbox у межах транзакції переданої сесії
+
+    Args:
+        session: сесія, у транзакції якої змінюються дані
+        text: текст повідомлення (HTML)
+        event_type: тип події
+        dedup_key: унікальний ключ, який не дає записати те саме сповіщення двічі
+        chat_id: отримувач, за замовчуванням загальний чат CHAT_ID
+        user_id: користувач, що спричинив подію (показується у зведенні)
+    """
+    now = datetime.datetime.now()
+    session.add(NotificationOutbox(
+        chat_id=int(chat_id if chat_id is not None else CHAT_ID),
+        text=text,
+        event_type=event_type,
+        dedup_key=dedup_key,
+        status="pending",
+        attempts=0,
+        created_at=now,
+        next_attempt_at=now,
+        user_id=user_id
+    ))
+
+
+async def notification_queued(dedup_key: str) -> bool:
+    """Перевіряє, чи сповіщення з таким ключем уже записане в outbox"""
+    async with async_session() as session:
+        result = await session.execute(
+            select(NotificationOutbox.id).where(NotificationOutbox.dedup_key == dedup_key)
+        )
+        return result.scalar_one_or_none() is not None
+
+
+async def add_report_notifications(pages: List[str], event_type: str, dedup_prefix: str) -> bool:
+    """Записує сторінки звіту в outbox однією транзакцією
+
+    Кожна сторінка отримує ключ "<dedup_prefix>:<номер>", тож той самий звіт
+    не може потрапити в чергу двічі.
+    """
+    async with async_session() as session:
+        for number, page in enumerate(pages, start=1):
+            add_notification(session, page, event_type=event_type, dedup_key=f"{dedup_prefix}:{number}")
+        try:
+            await session.commit()
+        except IntegrityError:
+            print(f"Звіт {dedup_prefix} уже є в outbox")
+            return False
+
+    outbox_ready.set()
+    return True
 
 
 async def add_user(user_id: int, username: str):
@@ -120,7 +481,7 @@ async def is_dehydrator_busy(dehydrator_id: int) -> bool:
         return result.scalar_one_or_none() is not None
 
 
-async def start_drying(dehydrator_id: int, drying_hours: int, bot, user_id: int) -> datetime.datetime:
+async def start_drying(dehydrator_id: int, drying_hours: int, user_id: int) -> datetime.datetime:
     if await is_dehydrator_busy(dehydrator_id):
         raise ValueError("❌ Цей дегідратор вже використовується!")
 
@@ -135,23 +496,27 @@ async def start_drying(dehydrator_id: int, drying_hours: int, bot, user_id: int)
             user_id=user_id
         )
         session.add(new_session)
-        await session.commit()
+        await session.flush()
 
-        # Відправляємо сповіщення про початок сушки
-        await bot.send_message(
-            CHAT_ID,
+        # Сповіщення про початок сушки записується в тій самій транзакції
+        add_notification(
+            session,
             f"🟢 <b>СУШКА РОЗПОЧАТА</b> 🟢\n\n"
             f"🔹 Дегідратор: <b>№{dehydrator_id}</b>\n"
             f"🕒 Час початку: <b>{now.strftime('%H:%M')}</b>\n"
             f"⏱ Тривалість: <b>{drying_hours} год.</b>\n"
             f"🏁 Закінчиться о: <b>{finish_time.strftime('%H:%M')}</b>",
-            parse_mode="HTML"
+            event_type="drying_start",
+            dedup_key=f"drying_start:{new_session.id}",
+            user_id=user_id
         )
+        await session.commit()
 
+    outbox_ready.set()
     return finish_time
 
 
-async def check_and_notify_finished_drying(bot):
+async def check_and_notify_finished_drying():
     async with async_session() as session:
         now = datetime.datetime.now()
         # Знаходимо всі сесії, які закінчились
@@ -173,37 +538,40 @@ async def check_and_notify_finished_drying(bot):
             if minutes > 0:
                 duration_text += f" {minutes} хв."
 
-            # Відправляємо сповіщення в загальний чат
-            await bot.send_message(
-                CHAT_ID,
+            # Сповіщення в загальний чат
+            add_notification(
+                session,
                 f"🔴 <b>СУШКА ЗАВЕРШЕНА</b> 🔴\n\n"
                 f"🔹 Дегідратор: <b>№{finished_session.dehydrator_id}</b>\n"
                 f"🕒 Час початку: <b>{finished_session.start_time.strftime('%H:%M')}</b>\n"
                 f"🏁 Час завершення: <b>{finished_session.finish_time.strftime('%H:%M')}</b>\n"
                 f"⏱ Тривалість: <b>{duration_text}</b>",
-                parse_mode="HTML"
+                event_type="drying_finish",
+                dedup_key=f"drying_finish:{finished_session.id}",
+                user_id=finished_session.user_id
             )
 
-            # Відправляємо сповіщення користувачу, який запускав сушку
-            try:
-                await bot.send_message(
-                    finished_session.user_id,
-                    f"🔴 <b>ВАША СУШКА ЗАВЕРШЕНА</b> 🔴\n\n"
-                    f"🔹 Дегідратор: <b>№{finished_session.dehydrator_id}</b>\n"
-                    f"🕒 Час початку: <b>{finished_session.start_time.strftime('%H:%M')}</b>\n"
-                    f"🏁 Час завершення: <b>{finished_session.finish_time.strftime('%H:%M')}</b>\n"
-                    f"⏱ Тривалість: <b>{duration_text}</b>",
-                    parse_mode="HTML"
-                )
-            except Exception as e:
-                # Якщо не вдалось відправити повідомлення користувачу, логуємо помилку
-                print(f"Не вдалось відправити повідомлення користувачу {finished_session.user_id}: {str(e)}")
+            # Сповіщення користувачу, який запускав сушку
+            add_notification(
+                session,
+                f"🔴 <b>ВАША СУШКА ЗАВЕРШЕНА</b> 🔴\n\n"
+                f"🔹 Дегідратор: <b>№{finished_session.dehydrator_id}</b>\n"
+                f"🕒 Час початку: <b>{finished_session.start_time.strftime('%H:%M')}</b>\n"
+                f"🏁 Час завершення: <b>{finished_session.finish_time.strftime('%H:%M')}</b>\n"
+                f"⏱ Тривалість: <b>{duration_text}</b>",
+                event_type="drying_finish_user",
+                dedup_key=f"drying_finish_user:{finished_session.id}",
+                chat_id=finished_session.user_id
+            )
 
             # Видаляємо завершену сесію
             await session.execute(delete(DryingSession).where(DryingSession.id == finished_session.id))
 
         await session.commit()
 
+    if finished_sessions:
+        outbox_ready.set()
+
 
 async def get_dehydrator_session(dehydrator_id: int):
     """Отримання інформації про активну сесію дегідратора"""
@@ -221,6 +589,15 @@ async def get_dehydrator_session(dehydrator_id: int):
         return session_data
 
 
+async def get_active_drying_sessions() -> List[DryingSession]:
+    """Отримати всі сушки, що зараз тривають"""
+    async with async_session() as session:
+        result = await session.execute(
+            select(DryingSession).where(DryingSession.finish_time > datetime.datetime.now())
+        )
+        return list(result.scalars().all())
+
+
 async def get_all_approved_users():
     """Отримати всіх затверджених користувачів"""
     async with async_session() as session:
@@ -228,8 +605,13 @@ async def get_all_approved_users():
         return result.scalars().all()
 
 
-async def start_work_session(user_id: int, partner_id: int, work_type: str, all_partners=None) -> int:
-    """Почати робочу зміну"""
+async def start_work_session(user_id: int, partner_id: int, work_type: str, all_partners=None,
+                             notification: str = None) -> int:
+    """Почати робочу зміну
+
+    Якщо передано notification, сповіщення в загальний чат записується
+    в outbox у тій самій транзакції, що й зміна.
+    """
     now = datetime.datetime.now()
 
     async with async_session() as session:
@@ -252,11 +634,11 @@ async def start_work_session(user_id: int, partner_id: int, work_type: str, all_
             partner_id=partner_id,
             requested_by=user_id,  # Додаємо хто створив сесію
             work_type=work_type,
-            start_time=now
+            start_time=now,
+            participants=collect_participants(user_id, partner_id, all_partners)
         )
         session.add(new_session)
-        await session.commit()
-        await session.refresh(new_session)
+        await session.flush()
 
         # Додаємо всіх партнерів у таблицю WorkPartner
         if all_partners:
@@ -267,13 +649,25 @@ async def start_work_session(user_id: int, partner_id: int, work_type: str, all_
                 )
                 session.add(work_partner)
 
-            await session.commit()
+        if notification:
+            add_notification(session, notification, event_type="work_start",
+                             dedup_key=f"work_start:{new_session.id}", user_id=user_id)
+
+        await session.commit()
 
-        return new_session.id
+    if notification:
+        outbox_ready.set()
+    return new_session.id
 
 
-async def end_work_session(session_id: int, results: str, packages_count: int = None, sales_amount: float = None):
-    """Завершити робочу зміну"""
+async def end_work_session(session_id: int, results: str, packages_count: int = None, sales_amount: float = None,
+                           notification: Optional[Callable[[WorkSession], str]] = None):
+    """Завершити робочу зміну
+
+    notification - функція, що отримує завершену сесію та повертає текст
+    сповіщення для загального чату. Сповіщення записується в outbox
+    у тій самій транзакції, що й завершення зміни.
+    """
     now = datetime.datetime.now()
 
     async with async_session() as session:
@@ -288,19 +682,44 @@ async def end_work_session(session_id: int, results: str, packages_count: int =
         if sales_amount is not None:
             update_data["sales_amount"] = sales_amount
 
-        await session.execute(
+        # Зміна, що вже завершена, повторно не закривається і не потрапляє в підсумки двічі
+        closed = await session.execute(
             update(WorkSession)
-            .where(WorkSession.id == session_id)
+            .where(WorkSession.id == session_id, WorkSession.end_time == None)
             .values(**update_data)
         )
-        await session.commit()
 
         # Отримуємо оновлену сесію
         result = await session.execute(
             select(WorkSession).where(WorkSession.id == session_id)
         )
         updated_session = result.scalar_one_or_none()
-        return updated_session
+        just_closed = updated_session is not None and closed.rowcount > 0
+
+        if just_closed:
+            # Оновлюємо щоденні підсумки всіх учасників у тій самій транзакції
+            minutes = (updated_session.end_time - updated_session.start_time).total_seconds() / 60
+            for participant in updated_session.participants or [updated_session.user_id]:
+                is_host = participant == updated_session.requested_by
+                await add_to_rollups(
+                    session, participant, updated_session.work_type, updated_session.start_time.date(), minutes,
+                    packages=(updated_session.packages_count or 0) if is_host else 0,
+                    amount=(updated_session.sales_amount or 0) if is_host else 0
+                )
+
+        if just_closed and notification:
+            add_notification(session, notification(updated_session), event_type="work_end",
+                             dedup_key=f"work_end:{session_id}", user_id=updated_session.user_id)
+
+        await session.commit()
+
+    if just_closed:
+        bump_month_version(updated_session.start_time)
+        # Зміна, розпочата до кінця минулого місяця, змінює і його рейтинг
+        await invalidate_leaderboards([(updated_session.start_time.year, updated_session.start_time.month)])
+    if just_closed and notification:
+        outbox_ready.set()
+    return updated_session
 
 
 async def get_active_work_session(user_id: int):
@@ -317,6 +736,13 @@ async def get_active_work_session(user_id: int):
         return result.scalar_one_or_none()
 
 
+async def get_active_work_sessions() -> List[WorkSession]:
+    """Отримати всі незавершені робочі зміни"""
+    async with async_session() as session:
+        result = await session.execute(select(WorkSession).where(WorkSession.end_time == None))
+        return list(result.scalars().all())
+
+
 async def update_work_session_message_id(session_id: int, message_id: int):
     """Оновити ID закріпленого повідомлення для зміни"""
     async with async_session() as session:
@@ -328,7 +754,8 @@ async def update_work_session_message_id(session_id: int, message_id: int):
         await session.commit()
 
 
-async def add_other_work(user_id: int, partner_id: int, description: str, duration: int = None, all_partners=None):
+async def add_other_work(user_id: int, partner_id: int, description: str, duration: int = None, all_partners=None,
+                         notification: str = None):
     """Додати запис про іншу роботу"""
     now = datetime.datetime.now()
 
@@ -338,11 +765,11 @@ async def add_other_work(user_id: int, partner_id: int, description: str, durati
             partner_id=partner_id,
             description=description,
             work_date=now,
-            duration=duration
+            duration=duration,
+            participants=collect_participants(user_id, partner_id, all_partners)
         )
         session.add(new_work)
-        await session.commit()
-        await session.refresh(new_work)
+        await session.flush()
 
         # Додаємо всіх партнерів у таблицю OtherWorkPartner
         if all_partners:
@@ -353,9 +780,19 @@ async def add_other_work(user_id: int, partner_id: int, description: str, durati
                 )
                 session.add(other_work_partner)
 
-            await session.commit()
+        for participant in new_work.participants:
+            await add_to_rollups(session, participant, "other_work", now.date(), duration or 0)
+
+        if notification:
+            add_notification(session, notification, event_type="other_work",
+                             dedup_key=f"other_work:{new_work.id}", user_id=user_id)
 
-        return new_work.id
+        await session.commit()
+
+    bump_month_version(now)
+    if notification:
+        outbox_ready.set()
+    return new_work.id
 
 
 async def get_user_by_id(user_id: int):
@@ -365,26 +802,27 @@ async def get_user_by_id(user_id: int):
         return result.scalar_one_or_none()
 
 
+async def get_users_by_ids(user_ids) -> List[User]:
+    """Отримати користувачів за списком ID одним запитом"""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return []
+    async with async_session() as session:
+        result = await session.execute(select(User).where(User.id.in_(user_ids)))
+        return list(result.scalars().all())
+
+
 async def get_user_work_sessions(user_id: int, start_date: datetime.datetime, end_date: datetime.datetime):
     """Отримати всі сесії роботи користувача за вказаний період"""
     async with async_session() as session:
-        # Знаходимо сесії, де користувач є головним або партнером
+        # Сесії, де користувач є головним або партнером (GIN-індекс за participants)
         query = select(WorkSession).where(
-            and_(
-                # Користувач є головним або одним з партнерів
-                or_(
-                    WorkSession.user_id == user_id,
-                    WorkSession.requested_by == user_id,
-                    WorkSession.id.in_(
-                        select(WorkPartner.session_id).where(WorkPartner.partner_id == user_id)
-                    )
-                ),
-                # Фільтруємо за датою
-                WorkSession.start_time >= start_date,
-                WorkSession.start_time <= end_date,
-                # Тільки завершені сесії
-                WorkSession.end_time != None
-            )
+            WorkSession.participants.contains([user_id]),
+            # Фільтруємо за датою
+            WorkSession.start_time >= start_date,
+            WorkSession.start_time <= end_date,
+            # Тільки завершені сесії
+            WorkSession.end_time != None
         ).order_by(WorkSession.start_time.desc())
 
         result = await session.execute(query)
@@ -395,16 +833,9 @@ async def get_user_other_works(user_id: int, start_date: datetime.datetime, end_
     """Отримати всі записи іншої роботи користувача за вказаний період"""
     async with async_session() as session:
         query = select(OtherWork).where(
-            and_(
-                or_(
-                    OtherWork.user_id == user_id,
-                    OtherWork.id.in_(
-                        select(OtherWorkPartner.other_work_id).where(OtherWorkPartner.partner_id == user_id)
-                    )
-                ),
-                OtherWork.work_date >= start_date,
-                OtherWork.work_date <= end_date
-            )
+            OtherWork.participants.contains([user_id]),
+            OtherWork.work_date >= start_date,
+            OtherWork.work_date <= end_date
         ).order_by(OtherWork.work_date.desc())
 
         result = await session.execute(query)
@@ -418,35 +849,23 @@ async def get_available_months(user_id: int) -> List[Tuple[int, int]]:
         List[Tuple[int, int]]: Список кортежів (місяць, рік)
     """
     async with async_session() as session:
-        from sqlalchemy import extract, distinct
-
-        # Використовуємо SQLAlchemy Core для отримання унікальних місяців і років
-        # Запит для робочих сесій
-        work_query = select(
-            distinct(extract('month', WorkSession.start_time).cast(Integer).label('month')),
+        work_months = select(
+            extract('month', WorkSession.start_time).cast(Integer).label('month'),
             extract('year', WorkSession.start_time).cast(Integer).label('year')
         ).where(
-            (WorkSession.user_id == user_id) | (WorkSession.partner_id == user_id)
-        ).where(
+            WorkSession.participants.contains([user_id]),
             WorkSession.end_time != None
         )
-
-        result_work = await session.execute(work_query)
-        work_months = [(int(row[0]), int(row[1])) for row in result_work]
-
-        # Запит для іншої роботи
-        other_query = select(
-            distinct(extract('month', OtherWork.work_date).cast(Integer).label('month')),
+        other_months = select(
+            extract('month', OtherWork.work_date).cast(Integer).label('month'),
             extract('year', OtherWork.work_date).cast(Integer).label('year')
         ).where(
-            (OtherWork.user_id == user_id) | (OtherWork.partner_id == user_id)
+            OtherWork.participants.contains([user_id])
         )
 
-        result_other = await session.execute(other_query)
-        other_months = [(int(row[0]), int(row[1])) for row in result_other]
-
-        # Об'єднуємо результати
-        all_months = set(work_months + other_months)
+        # UNION прибирає дублікати місяців з обох таблиць
+        result = await session.execute(union(work_months, other_months))
+        all_months = {(int(row[0]), int(row[1])) for row in result}
 
         # Сортуємо за роком та місяцем у зворотньому порядку
         return sorted(all_months, key=lambda x: (x[1], x[0]), reverse=True)
@@ -483,6 +902,206 @@ async def get_all_other_works(start_date: datetime.datetime, end_date: datetime.
         return result.scalars().all()
 
 
+def _stored_columns(table) -> list:
+    """Колонки таблиці без тих, що обчислюються самим Postgres"""
+    return [column for column in table.c if column.computed is None]
+
+
+def get_export_queries(start_date: datetime.datetime, end_date: datetime.datetime) -> List[Tuple[str, Select]]:
+    """Запити для вивантаження сирих даних за період: (назва таблиці, запит)"""
+    sessions_in_range = select(WorkSession.id).where(
+        WorkSession.start_time >= start_date, WorkSession.start_time <= end_date
+    )
+    works_in_range = select(OtherWork.id).where(
+        OtherWork.work_date >= start_date, OtherWork.work_date <= end_date
+    )
+    work_sessions = WorkSession.__table__
+    work_partners = WorkPartner.__table__
+    other_work = OtherWork.__table__
+    other_work_partners = OtherWorkPartner.__table__
+    return [
+        ("work_sessions", select(*_stored_columns(work_sessions)).where(work_sessions.c.id.in_(sessions_in_range))
+         .order_by(work_sessions.c.id)),
+        ("work_partners", select(work_partners).where(work_partners.c.session_id.in_(sessions_in_range))
+         .order_by(work_partners.c.id)),
+        ("other_work", select(*_stored_columns(other_work)).where(other_work.c.id.in_(works_in_range))
+         .order_by(other_work.c.id)),
+        ("other_work_partners", select(other_work_partners)
+         .where(other_work_partners.c.other_work_id.in_(works_in_range))
+         .order_by(other_work_partners.c.id)),
+    ]
+
+
+async def stream_rows(query: Select, chunk_size: int = 1000) -> AsyncIterator[List[tuple]]:
+    """Читає результат запиту порціями через серверний курсор, не завантажуючи його в пам'ять повністю"""
+    async with async_session() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+async def get_range_totals(start_day: datetime.date, end_day: datetime.date) -> dict:
+    """Підсумки за довільний період з накопичувальних сум: два зрізи незалежно від довжини періоду
+
+    Returns:
+        dict: {user_id: {work_type: {"minutes", "sessions", "packages", "amount"}}}
+    """
+    async with async_session() as session:
+        result = await session.execute(_RANGE_TOTALS, {"start_day": start_day, "end_day": end_day})
+
+    totals = {}
+    for row in result.mappings():
+        if row["sessions"]:
+            totals.setdefault(row["user_id"], {})[row["work_type"]] = {
+                metric: row[metric] for metric in ROLLUP_METRICS
+            }
+    return totals
+
+
+async def get_monthly_totals(start_day: datetime.date, end_day: datetime.date, user_id: int = None) -> dict:
+    """Підсумки за місяцями з щоденних підсумків, для одного користувача або для всіх
+
+    Returns:
+        dict: {(рік, місяць): {work_type: {"minutes", "packages", "amount"}}}
+    """
+    month = func.date_trunc("month", DailyRollup.day).label("month")
+    stmt = select(
+        month, DailyRollup.work_type, func.sum(DailyRollup.minutes), func.sum(DailyRollup.packages),
+        func.sum(DailyRollup.amount)
+    ).where(DailyRollup.day >= start_day, DailyRollup.day <= end_day).group_by(month, DailyRollup.work_type)
+    if user_id is not None:
+        stmt = stmt.where(DailyRollup.user_id == user_id)
+
+    async with async_session() as session:
+        result = await session.execute(stmt)
+
+    totals = {}
+    for month_start, work_type, minutes, packages, amount in result.all():
+        totals.setdefault((month_start.year, month_start.month), {})[work_type] = {
+            "minutes": minutes or 0, "packages": packages or 0, "amount": amount or 0
+        }
+    return totals
+
+
+def _month_bounds(year: int, month: int) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Початок місяця і початок наступного"""
+    start = datetime.datetime(year, month, 1)
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+def is_closed_month(year: int, month: int) -> bool:
+    """Чи місяць уже завершився"""
+    today = datetime.date.today()
+    return (year, month) < (today.year, today.month)
+
+
+async def materialize_leaderboard(year: int, month: int) -> None:
+    """Розраховує рейтинг за місяць віконними функціями і зберігає його замість попереднього"""
+    start, end = _month_bounds(year, month)
+    params = {"year": year, "month": month, "start": start, "end": end, "min_minutes": LEADERBOARD_MIN_MINUTES}
+    async with async_session() as session:
+        # Одночасні перерахунки одного місяця виконуються по черзі
+        await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": year * 100 + month})
+        await session.execute(
+            delete(LeaderboardEntry).where(LeaderboardEntry.year == year, LeaderboardEntry.month == month)
+        )
+        await session.execute(text(f"""
+            INSERT INTO leaderboard (year, month, work_type, user_id, sessions, minutes, packages, amount,
+                                     packages_per_hour, amount_per_hour, rank)
+            SELECT CAST(:year AS INTEGER), CAST(:month AS INTEGER), work_type, user_id, sessions, minutes,
+                   packages, amount, packages_per_hour, amount_per_hour, rank
+            FROM ({_LEADERBOARD_SELECT}) AS ranked
+        """), params)
+        now = datetime.datetime.now()
+        await session.execute(
+            pg_insert(LeaderboardMonth).values(year=year, month=month, built_at=now)
+            .on_conflict_do_update(index_elements=["year", "month"], set_={"built_at": now})
+        )
+        await session.commit()
+
+
+async def invalidate_leaderboards(months) -> None:
+    """Видаляє розрахований рейтинг за закриті місяці [(рік, місяць), ...], дані яких змінилися"""
+    months = [(year, month) for year, month in months if is_closed_month(year, month)]
+    if not months:
+        return
+    async with async_session() as session:
+        for year, month in months:
+            await session.execute(
+                delete(LeaderboardEntry).where(LeaderboardEntry.year == year, LeaderboardEntry.month == month)
+            )
+            await session.execute(
+                delete(LeaderboardMonth).where(LeaderboardMonth.year == year, LeaderboardMonth.month == month)
+            )
+        await session.commit()
+
+
+async def get_leaderboard(year: int, month: int) -> list:
+    """Рейтинг за місяць, впорядкований за типом роботи і місцем
+
+    Для закритого місяця це одне читання за індексом з розрахованої таблиці
+    (при першому зверненні рейтинг розраховується), для поточного - розрахунок на льоту.
+    """
+    if not is_closed_month(year, month):
+        start, end = _month_bounds(year, month)
+        async with async_session() as session:
+            result = await session.execute(
+                text(_LEADERBOARD_SELECT + " ORDER BY work_type, rank"),
+                {"start": start, "end": end, "min_minutes": LEADERBOARD_MIN_MINUTES}
+            )
+            return list(result.all())
+
+    stmt = select(LeaderboardEntry).where(
+        LeaderboardEntry.year == year, LeaderboardEntry.month == month
+    ).order_by(LeaderboardEntry.work_type, LeaderboardEntry.rank)
+    async with async_session() as session:
+        entries = list((await session.execute(stmt)).scalars().all())
+        if entries or await session.get(LeaderboardMonth, (year, month)) is not None:
+            return entries
+
+    await materialize_leaderboard(year, month)
+    async with async_session() as session:
+        return list((await session.execute(stmt)).scalars().all())
+
+
+async def search_works(query: str, limit: int, after: Optional[tuple] = None) -> list:
+    """Повнотекстовий пошук по результатах змін та описах іншої роботи
+
+    Рядки впорядковані за релевантністю, потім від новіших до старіших.
+    Наступна сторінка починається одразу після останнього рядка попередньої
+    (keyset), тож номер сторінки не впливає на швидкість запиту.
+
+    Args:
+        query: пошуковий запит (синтаксис websearch: слова, "фраза", -виключення)
+        limit: кількість рядків
+        after: (rank, moment, kind, id) останнього рядка попередньої сторінки
+
+    Returns:
+        list: рядки з полями kind ("session" або "other_work"), id, moment, work_type, text, participants, rank
+    """
+    ts_query = func.websearch_to_tsquery(literal_column(f"'{FTS_CONFIG}'::regconfig"), query)
+    sessions = select(
+        literal("session").label("kind"), WorkSession.id, WorkSession.start_time.label("moment"),
+        WorkSession.work_type, WorkSession.results.label("text"), WorkSession.participants,
+        func.ts_rank(WorkSession.search_vector, ts_query).label("rank")
+    ).where(WorkSession.search_vector.op("@@")(ts_query))
+    works = select(
+        literal("other_work").label("kind"), OtherWork.id, OtherWork.work_date.label("moment"),
+        literal("other_work").label("work_type"), OtherWork.description.label("text"), OtherWork.participants,
+        func.ts_rank(OtherWork.search_vector, ts_query).label("rank")
+    ).where(OtherWork.search_vector.op("@@")(ts_query))
+
+    hits = union_all(sessions, works).subquery()
+    order = (hits.c.rank, hits.c.moment, hits.c.kind, hits.c.id)
+    stmt = select(hits).order_by(*(column.desc() for column in order)).limit(limit)
+    if after is not None:
+        stmt = stmt.where(tuple_(*order) < tuple_(*after))
+
+    async with async_session() as session:
+        result = await session.execute(stmt)
+        return list(result.all())
+
+
 async def get_available_months_all_users() -> List[Tuple[int, int]]:
     """Отримати список місяців, за які є дані для всіх користувачів
     
@@ -518,3 +1137,98 @@ async def get_available_months_all_users() -> List[Tuple[int, int]]:
 
         # Сортуємо за роком та місяцем у зворотньому порядку
         return sorted(all_months, key=lambda x: (x[1], x[0]), reverse=True)
+
+
+async def claim_pending_notifications(session: AsyncSession, limit: int,
+                                      digest_bypass: Optional[List[str]] = None) -> List[NotificationOutbox]:
+    """Блокує та повертає сповіщення, які час доставити
+
+    Рядки блокуються до завершення транзакції переданої сесії, тому
+    паралельний обробник їх пропустить. Транзакцію варто завершити до
+    відправки, відсунувши next_attempt_at (оренда), щоб не тримати блокування
+    на час мережевих запитів. Якщо передано digest_bypass
+    (режим зведення), сповіщення в загальний чат повертаються лише для
+    типів подій з цього списку - решта збирається у зведення.
+    """
+    now = datetime.datetime.now()
+    conditions = [
+        NotificationOutbox.status == "pending",
+        NotificationOutbox.next_attempt_at <= now
+    ]
+    if digest_bypass is not None:
+        conditions.append(or_(
+            NotificationOutbox.chat_id != int(CHAT_ID),
+            NotificationOutbox.event_type.in_(digest_bypass)
+        ))
+
+    result = await session.execute(
+        select(NotificationOutbox).where(and_(*conditions))
+        .order_by(NotificationOutbox.id).limit(limit).with_for_update(skip_locked=True)
+    )
+    return result.scalars().all()
+
+
+async def save_notifications(notifications: List[NotificationOutbox]) -> None:
+    """Зберігає стан доставки сповіщень, отриманих в іншій сесії, окремою короткою транзакцією"""
+    if not notifications:
+        return
+    async with async_session() as session:
+        await session.execute(update(NotificationOutbox), [
+            {
+                "id": notification.id,
+                "status": notification.status,
+                "attempts": notification.attempts,
+                "last_error": notification.last_error,
+                "next_attempt_at": notification.next_attempt_at,
+                "sent_at": notification.sent_at,
+            }
+            for notification in notifications
+        ])
+        await session.commit()
+
+
+async def prune_sent_notifications(before: datetime.datetime) -> int:
+    """Видаляє з outbox сповіщення, доставлені раніше за before
+
+    Returns:
+        int: кількість видалених записів
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            delete(NotificationOutbox).where(
+                and_(NotificationOutbox.status == "sent", NotificationOutbox.sent_at < before)
+            )
+        )
+        await session.commit()
+        return result.rowcount
+
+
+def _digest_conditions(digest_bypass: List[str], now: datetime.datetime) -> list:
+    return [
+        NotificationOutbox.status == "pending",
+        NotificationOutbox.next_attempt_at <= now,
+        NotificationOutbox.chat_id == int(CHAT_ID),
+        NotificationOutbox.event_type.not_in(digest_bypass)
+    ]
+
+
+async def get_digest_oldest(digest_bypass: List[str]) -> Dict[str, datetime.datetime]:
+    """Час найстарішої події кожного типу, що чекає на зведення (без блокування рядків)"""
+    async with async_session() as session:
+        result = await session.execute(
+            select(NotificationOutbox.event_type, func.min(NotificationOutbox.created_at))
+            .where(and_(*_digest_conditions(digest_bypass, datetime.datetime.now())))
+            .group_by(NotificationOutbox.event_type)
+        )
+        return dict(result.all())
+
+
+async def claim_digest_notifications(session: AsyncSession, digest_bypass: List[str],
+                                     limit: int = 500) -> List[NotificationOutbox]:
+    """Блокує та повертає сповіщення в загальний чат, що очікують на зведення"""
+    result = await session.execute(
+        select(NotificationOutbox).where(
+            and_(*_digest_conditions(digest_bypass, datetime.datetime.now()))
+        ).order_by(NotificationOutbox.id).limit(limit).with_for_update(skip_locked=True)
+    )
+    return result.scalars().all()
@@ -0,0 +1,94 @@
+"""
+Вивантаження сирих даних про роботи у файл (ZIP з CSV або XLSX)
+
+Рядки читаються з бази порціями в циклі подій, а запис і стиснення
+кожної порції виконуються в окремому потоці, щоб не блокувати бота.
+"""
+import asyncio
+import csv
+import datetime
+import io
+import os
+import tempfile
+import zipfile
+
+from services.db import get_export_queries, stream_rows
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX доступний лише зі встановленим openpyxl
+    Workbook = None
+
+EXPORT_FORMATS = ("csv", "xlsx")
+# Скільки рядків читати з курсора за один раз
+CHUNK_SIZE = 1000
+
+
+def xlsx_available() -> bool:
+    return Workbook is not None
+
+
+def _plain(row: tuple) -> tuple:
+    """Списки (наприклад, participants) записуються як ID через пробіл"""
+    return tuple(" ".join(map(str, value)) if isinstance(value, list) else value for value in row)
+
+
+async def _export_csv(path: str, start_date: datetime.datetime, end_date: datetime.datetime) -> int:
+    rows_written = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for table, query in get_export_queries(start_date, end_date):
+            # Кожна таблиця пишеться прямо в архів, порція за порцією
+            with archive.open(f"{table}.csv", "w") as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                writer = csv.writer(text)
+                writer.writerow([column.key for column in query.selected_columns])
+                async for rows in stream_rows(query, CHUNK_SIZE):
+                    await asyncio.to_thread(writer.writerows, [_plain(row) for row in rows])
+                    rows_written += len(rows)
+                text.flush()
+                text.detach()
+    return rows_written
+
+
+def _append_rows(sheet, rows) -> None:
+    for row in rows:
+        sheet.append(_plain(row))
+
+
+async def _export_xlsx(path: str, start_date: datetime.datetime, end_date: datetime.datetime) -> int:
+    rows_written = 0
+    # У режимі write_only рядки не зберігаються в пам'яті, а одразу пишуться у файл
+    workbook = Workbook(write_only=True)
+    for table, query in get_export_queries(start_date, end_date):
+        sheet = workbook.create_sheet(title=table)
+        sheet.append([column.key for column in query.selected_columns])
+        async for rows in stream_rows(query, CHUNK_SIZE):
+            await asyncio.to_thread(_append_rows, sheet, rows)
+            rows_written += len(rows)
+    await asyncio.to_thread(workbook.save, path)
+    return rows_written
+
+
+async def export_work_data(start_date: datetime.datetime, end_date: datetime.datetime, fmt: str = "csv"):
+    """Вивантажує дані за період у тимчасовий файл
+
+    Returns:
+        Tuple[str, int]: шлях до файлу (його треба видалити після відправлення) та кількість рядків
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Невідомий формат вивантаження: {fmt}")
+    if fmt == "xlsx" and not xlsx_available():
+        raise ValueError("Для вивантаження в XLSX потрібен пакет openpyxl")
+
+    suffix = ".zip" if fmt == "csv" else ".xlsx"
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=suffix)
+    os.close(fd)
+    try:
+        if fmt == "csv":
+            rows_written = await _export_csv(path, start_date, end_date)
+        else:
+            rows_written = await _export_xlsx(path, start_date, end_date)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, rows_written
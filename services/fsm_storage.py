@@ -0,0 +1,297 @@
+"""
+Сховища станів FSM для диспетчера
+"""
+import asyncio
+import copy
+import datetime
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+
+from config import FSM_STORAGE, FSM_MAX_KEYS, FSM_TTL
+from services.db import async_session, FSMRecord
+from services.metrics import metrics
+
+# Час життя стану (у секундах) для груп станів. Під час активної зміни
+# WorkStates зберігає session_id, тому живе довше за вибір партнерів
+STATE_GROUP_TTL = {
+    "DryingSetup": 30 * 60,
+    "ReportStates": 30 * 60,
+    "ProductionStates": 30 * 60,
+    "PackagingStates": 60 * 60,
+    "SalesStates": 60 * 60,
+    "OtherWorkStates": 60 * 60,
+    "WorkStates": 24 * 60 * 60,
+}
+
+# Як часто (у секундах) шукати прострочені записи, до яких ніхто не звертається
+SWEEP_INTERVAL = 60
+
+
+@dataclass
+class _BufferedRecord:
+    """Запис FSM, завантажений у пам'ять на час обробки апдейту"""
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    dirty: bool = False
+    version: int = 0  # Зростає з кожною зміною, щоб flush знав, чи записав останню
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # Записи одного ключа йдуть по черзі
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM-сховище в PostgreSQL.
+
+    Зміни стану та даних у межах одного апдейту накопичуються в буфері
+    і записуються в базу одним upsert під час виклику flush()
+    (див. FSMFlushMiddleware).
+    """
+
+    def __init__(self):
+        self._buffer: Dict[StorageKey, _BufferedRecord] = {}
+
+    @staticmethod
+    def _build_key(key: StorageKey) -> str:
+        """Будує рядковий ключ запису з StorageKey"""
+        parts = [str(key.bot_id), str(key.chat_id)]
+        if key.thread_id:
+            parts.append(str(key.thread_id))
+        parts.append(str(key.user_id))
+        if key.business_connection_id:
+            parts.append(key.business_connection_id)
+        parts.append(key.destiny)
+        return ":".join(parts)
+
+    async def _load(self, key: StorageKey) -> _BufferedRecord:
+        """Повертає запис з буфера або завантажує його з бази"""
+        record = self._buffer.get(key)
+        if record is not None:
+            return record
+
+        async with async_session() as session:
+            result = await session.execute(select(FSMRecord).where(FSMRecord.key == self._build_key(key)))
+            row = result.scalar_one_or_none()
+
+        loaded = _BufferedRecord(state=row.state, data=dict(row.data or {})) if row else _BufferedRecord()
+        # Поки йшов запит, запис міг з'явитися в буфері з іншої корутини
+        return self._buffer.setdefault(key, loaded)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._load(key)
+        record.state = state.state if isinstance(state, State) else state
+        record.dirty = True
+        record.version += 1
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._load(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        record = await self._load(key)
+        # Глибока копія, як у MemoryStorage: вкладені списки не мають змінюватись в обхід set_data
+        record.data = copy.deepcopy(dict(data))
+        record.dirty = True
+        record.version += 1
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._load(key)
+        return copy.deepcopy(record.data)
+
+    async def flush(self, key: StorageKey) -> None:
+        """Записує накопичені зміни для ключа в базу та звільняє буфер
+
+        Запис лишається в буфері, доки зміни не збережено: якщо запис у базу
+        не вдався, наступний апдейт продовжить з буферизованого стану, а flush
+        спробує ще раз. Якщо під час запису інший апдейт змінив стан,
+        запис теж лишається в буфері до його flush.
+        """
+        record = self._buffer.get(key)
+        if record is None:
+            return
+
+        async with record.lock:
+            if self._buffer.get(key) is not record:
+                # Поки чекали, запис уже збережено та звільнено
+                return
+
+            version = record.version
+            if record.dirty:
+                await self._write(key, record.state, record.data)
+                if record.version == version:
+                    record.dirty = False
+
+            if record.version == version:
+                del self._buffer[key]
+
+    async def _write(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        db_key = self._build_key(key)
+        async with async_session() as session:
+            if state is None and not data:
+                # Порожній стан не зберігаємо, щоб таблиця не росла
+                await session.execute(delete(FSMRecord).where(FSMRecord.key == db_key))
+            else:
+                now = datetime.datetime.now()
+                statement = insert(FSMRecord).values(
+                    key=db_key,
+                    state=state,
+                    data=data,
+                    updated_at=now
+                )
+                statement = statement.on_conflict_do_update(
+                    index_elements=[FSMRecord.key],
+                    set_={"state": state, "data": data, "updated_at": now}
+                )
+                await session.execute(statement)
+            await session.commit()
+
+    async def close(self) -> None:
+        for key in list(self._buffer):
+            await self.flush(key)
+
+
+@dataclass
+class _BoundedRecord:
+    """Запис FSM з часом закінчення дії та приблизним розміром"""
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    expires_at: float = 0.0
+    size: int = 0
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """
+    FSM-сховище в пам'яті з обмеженою кількістю ключів.
+
+    Кожен запис живе STATE_GROUP_TTL секунд залежно від групи станів
+    (або default_ttl), а при перевищенні max_keys витісняється
+    найдавніше використаний запис.
+    """
+
+    def __init__(self, max_keys: int = 10_000, default_ttl: int = 60 * 60,
+                 ttl_by_group: Optional[Dict[str, int]] = None):
+        self.max_keys = max_keys
+        self.default_ttl = default_ttl
+        self.ttl_by_group = STATE_GROUP_TTL if ttl_by_group is None else ttl_by_group
+        self._records: "OrderedDict[StorageKey, _BoundedRecord]" = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.monotonic()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _ttl_for(self, state: Optional[str]) -> int:
+        """Визначає час життя запису за групою його стану"""
+        if not state:
+            return self.default_ttl
+        group = state.split(":", 1)[0]
+        return self.ttl_by_group.get(group, self.default_ttl)
+
+    @staticmethod
+    def _size_of(record: _BoundedRecord) -> int:
+        """Приблизний розмір запису в байтах"""
+        size = len(record.state or "")
+        if record.data:
+            size += len(json.dumps(record.data, default=str, ensure_ascii=False).encode())
+        return size
+
+    def _remove(self, key: StorageKey) -> None:
+        record = self._records.pop(key, None)
+        if record is not None:
+            self._bytes -= record.size
+
+    def _get(self, key: StorageKey) -> Optional[_BoundedRecord]:
+        """Повертає живий запис і позначає його як нещодавно використаний"""
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if record.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self._update_metrics()
+            return None
+        self._records.move_to_end(key)
+        return record
+
+    def _put(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        """Зберігає запис, оновлює його строк дії та застосовує обмеження"""
+        self._remove(key)
+        if state is None and not data:
+            # Порожній запис не тримаємо в пам'яті
+            self._update_metrics()
+            return
+
+        now = time.monotonic()
+        record = _BoundedRecord(state=state, data=data, expires_at=now + self._ttl_for(state))
+        record.size = self._size_of(record)
+        self._records[key] = record
+        self._bytes += record.size
+
+        while len(self._records) > self.max_keys:
+            _, evicted = self._records.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self._sweep(now)
+        self._update_metrics()
+
+    def _sweep(self, now: float) -> None:
+        """Видаляє всі прострочені записи"""
+        expired = [key for key, record in self._records.items() if record.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self._last_sweep = now
+
+    def _update_metrics(self) -> None:
+        metrics.set("fsm.live_keys", len(self._records))
+        metrics.set("fsm.bytes", self._bytes)
+        metrics.set("fsm.evictions", self.evictions)
+        metrics.set("fsm.expirations", self.expirations)
+
+    def stats(self) -> Dict[str, int]:
+        """Повертає показники заповненості сховища"""
+        return {
+            "live_keys": len(self._records),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = self._get(key)
+        data = record.data if record else {}
+        self._put(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self._get(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        record = self._get(key)
+        # Запис має власну копію даних, тому його розмір не зміниться після підрахунку
+        self._put(key, record.state if record else None, copy.deepcopy(dict(data)))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = self._get(key)
+        return copy.deepcopy(record.data) if record else {}
+
+    async def close(self) -> None:
+        self._records.clear()
+        self._bytes = 0
+
+
+def create_storage() -> BaseStorage:
+    """Створює FSM-сховище відповідно до налаштування FSM_STORAGE"""
+    if FSM_STORAGE == "memory":
+        return MemoryStorage()
+    if FSM_STORAGE == "bounded":
+        return BoundedMemoryStorage(max_keys=FSM_MAX_KEYS, default_ttl=FSM_TTL)
+    return PostgresStorage()
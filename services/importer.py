@@ -0,0 +1,185 @@
+"""
+Масовий імпорт історичних записів про роботи з CSV через COPY
+
+Формат файлу (перший рядок - заголовок):
+    kind,user_id,start_time,end_time,partners,packages_count,sales_amount,results,description,duration
+
+kind - production, packaging, sales або other. Для змін обов'язкові start_time
+та end_time, для іншої роботи - start_time (дата роботи) та description.
+partners - ID партнерів через пробіл або ";". Дати - у форматі ISO
+(наприклад, 2023-05-01 08:00).
+
+Bot API дозволяє ботам завантажувати файли лише до 20 МБ (MAX_FILE_SIZE),
+тож великі архіви варто ділити на кілька файлів - імпорт кожного незалежний.
+"""
+import asyncio
+import csv
+import datetime
+from typing import Iterator, List, Optional, Set, Tuple
+
+from services.cache import bump_month_version
+from services.db import collect_participants, engine, invalidate_leaderboards, rebuild_daily_rollups
+
+WORK_TYPES = ("production", "packaging", "sales")
+OTHER_KIND = "other"
+REQUIRED_COLUMNS = {"kind", "user_id", "start_time"}
+# Скільки рядків CSV завантажувати за один COPY
+BATCH_SIZE = 5000
+# Скільки помилок перевірки показувати адміністратору
+MAX_ERRORS = 20
+# Максимальний розмір файлу, який бот може завантажити через Bot API
+MAX_FILE_SIZE = 20 * 1024 * 1024
+
+WORK_SESSION_COLUMNS = ["id", "user_id", "partner_id", "requested_by", "work_type", "start_time", "end_time",
+                        "results", "packages_count", "sales_amount", "participants"]
+OTHER_WORK_COLUMNS = ["id", "user_id", "partner_id", "description", "work_date", "duration", "participants"]
+
+
+class ImportValidationError(ValueError):
+    """Файл імпорту не пройшов перевірку"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def _optional_int(value: str) -> Optional[int]:
+    value = (value or "").strip()
+    return int(float(value)) if value else None
+
+
+def _parse_time(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat((value or "").strip())
+
+
+def parse_row(row: dict) -> Tuple:
+    """Перевіряє рядок CSV і повертає (kind, запис для COPY без id, список партнерів)"""
+    kind = (row.get("kind") or "").strip()
+    user_id = int(row["user_id"])
+    start_time = _parse_time(row["start_time"])
+    partners = [int(p) for p in (row.get("partners") or "").replace(";", " ").split()]
+    partner_id = partners[0] if partners else None
+    participants = collect_participants(user_id, partners)
+
+    if kind in WORK_TYPES:
+        end_time = _parse_time(row.get("end_time"))
+        if end_time < start_time:
+            raise ValueError("end_time раніше за start_time")
+        record = (user_id, partner_id, user_id, kind, start_time, end_time, row.get("results") or None,
+                  _optional_int(row.get("packages_count")), _optional_int(row.get("sales_amount")), participants)
+    elif kind == OTHER_KIND:
+        description = (row.get("description") or "").strip()
+        if not description:
+            raise ValueError("порожній description")
+        record = (user_id, partner_id, description, start_time, _optional_int(row.get("duration")), participants)
+    else:
+        raise ValueError(f"невідомий kind '{kind}'")
+    return kind, record, partners
+
+
+def validate_file(path: str) -> int:
+    """Перевіряє весь файл одним проходом, не завантажуючи його в пам'ять
+
+    Returns:
+        int: кількість рядків даних
+    """
+    errors = []
+    rows = 0
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+        if missing:
+            raise ImportValidationError([f"Відсутні колонки: {', '.join(sorted(missing))}"])
+        for row in reader:
+            rows += 1
+            try:
+                parse_row(row)
+            except (ValueError, TypeError, KeyError) as e:
+                errors.append(f"Рядок {reader.line_num}: {e}")
+                if len(errors) >= MAX_ERRORS:
+                    break
+    if errors:
+        raise ImportValidationError(errors)
+    return rows
+
+
+def _batches(path: str) -> Iterator[List[Tuple]]:
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        batch = []
+        for row in csv.DictReader(file):
+            batch.append(parse_row(row))
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def _allocate_ids(conn, table: str, count: int) -> List[int]:
+    """Резервує count значень з послідовності первинного ключа таблиці"""
+    if not count:
+        return []
+    rows = await conn.fetch(
+        "SELECT nextval(pg_get_serial_sequence($1, 'id')) FROM generate_series(1, $2)", table, count
+    )
+    return [row[0] for row in rows]
+
+
+async def _copy_batch(conn, batch: List[Tuple], months: Set[Tuple[int, int]]) -> None:
+    sessions = [(record, partners) for kind, record, partners in batch if kind != OTHER_KIND]
+    works = [(record, partners) for kind, record, partners in batch if kind == OTHER_KIND]
+
+    session_ids = await _allocate_ids(conn, "work_sessions", len(sessions))
+    work_ids = await _allocate_ids(conn, "other_work", len(works))
+
+    await conn.copy_records_to_table(
+        "work_sessions", columns=WORK_SESSION_COLUMNS,
+        records=[(session_id, *record) for session_id, (record, _) in zip(session_ids, sessions)]
+    )
+    await conn.copy_records_to_table(
+        "work_partners", columns=["session_id", "partner_id"],
+        records=[(session_id, partner) for session_id, (_, partners) in zip(session_ids, sessions)
+                 for partner in partners]
+    )
+    await conn.copy_records_to_table(
+        "other_work", columns=OTHER_WORK_COLUMNS,
+        records=[(work_id, *record) for work_id, (record, _) in zip(work_ids, works)]
+    )
+    await conn.copy_records_to_table(
+        "other_work_partners", columns=["other_work_id", "partner_id"],
+        records=[(work_id, partner) for work_id, (_, partners) in zip(work_ids, works) for partner in partners]
+    )
+
+    months.update((record[4].year, record[4].month) for record, _ in sessions)
+    months.update((record[3].year, record[3].month) for record, _ in works)
+
+
+async def import_work_logs(path: str) -> int:
+    """Імпортує файл однією транзакцією: або всі рядки, або жодного
+
+    Returns:
+        int: кількість імпортованих рядків
+    """
+    # Розбір CSV - робота процесора, тому вона йде в окремому потоці, а цикл подій чекає лише на COPY
+    rows = await asyncio.to_thread(validate_file, path)
+    months: Set[Tuple[int, int]] = set()
+
+    async with engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        # COPY - можливість asyncpg, тому транзакцією керуємо напряму через драйвер
+        conn = raw.driver_connection
+        async with conn.transaction():
+            batches = _batches(path)
+            while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+                await _copy_batch(conn, batch, months)
+            # Після масового завантаження планувальнику потрібна свіжа статистика
+            await conn.execute("ANALYZE work_sessions, work_partners, other_work, other_work_partners")
+
+    # Щоденні підсумки простіше перерахувати повністю, ніж оновлювати по рядку
+    await rebuild_daily_rollups()
+
+    # Звіти та рейтинги за змінені місяці більше не актуальні
+    for year, month in months:
+        bump_month_version(datetime.datetime(year, month, 1))
+    await invalidate_leaderboards(months)
+    return rows
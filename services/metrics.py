@@ -0,0 +1,42 @@
+"""
+Лічильники та показники роботи бота, що зберігаються в пам'яті процесу
+"""
+from collections import defaultdict
+from typing import Dict, List
+
+
+class Metrics:
+    """Реєстр лічильників, поточних значень та тривалостей"""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.gauges: Dict[str, float] = {}
+        self.timings: Dict[str, List[float]] = {}  # Назва -> [кількість, сума, максимум]
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """Збільшує лічильник"""
+        self.counters[name] += value
+
+    def set(self, name: str, value: float) -> None:
+        """Встановлює поточне значення показника"""
+        self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Додає вимір тривалості"""
+        timing = self.timings.setdefault(name, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Повертає всі показники у вигляді плоского словника"""
+        result = dict(self.counters)
+        result.update(self.gauges)
+        for name, (count, total, maximum) in self.timings.items():
+            result[f"{name}.count"] = count
+            result[f"{name}.avg"] = round(total / count, 3) if count else 0
+            result[f"{name}.max"] = round(maximum, 3)
+        return dict(sorted(result.items()))
+
+
+metrics = Metrics()
@@ -0,0 +1,229 @@
+"""
+Доставка сповіщень з outbox у Telegram
+"""
+import asyncio
+import datetime
+import html
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from config import CHAT_ID, NOTIFY_DIGEST, NOTIFY_DIGEST_WINDOW, NOTIFY_DIGEST_WINDOWS, NOTIFY_DIGEST_BYPASS, \
+    NOTIFY_RETENTION_DAYS
+from services.db import async_session, claim_pending_notifications, claim_digest_notifications, outbox_ready, \
+    get_digest_oldest, get_users_by_ids, prune_sent_notifications, save_notifications, NotificationOutbox
+from services.metrics import metrics
+from utils.pagination import MESSAGE_LIMIT, text_length
+
+# Скільки сповіщень обробляти за одну транзакцію
+BATCH_SIZE = 20
+# Після скількох невдалих спроб сповіщення вважається недоставленим
+MAX_ATTEMPTS = 8
+# Максимальна пауза між повторними спробами, секунди
+MAX_BACKOFF = 10 * 60
+# На скільки секунд забрані сповіщення приховуються від інших обробників;
+# якщо бот впаде під час відправки, після цього часу їх буде відправлено знову
+LEASE_TIME = 5 * 60
+# Як часто видаляти старі доставлені сповіщення, секунди
+PRUNE_INTERVAL = 60 * 60
+
+# Події, які ніколи не збираються у зведення: вони самі є підсумком
+DIGEST_BYPASS = NOTIFY_DIGEST_BYPASS + ["monthly_report"]
+
+# Назви подій у рядках зведення
+DIGEST_EVENTS = {
+    "work_start": "🟢 Початок зміни",
+    "work_end": "🔴 Завершення зміни",
+    "other_work": "📝 Інша робота",
+    "drying_start": "🍇 Запуск сушки",
+    "drying_finish": "🍇 Завершення сушки",
+}
+
+
+def _register_failure(notifications: List[NotificationOutbox], error: Exception, permanent: bool,
+                      now: datetime.datetime) -> None:
+    """Фіксує невдалу спробу доставки та планує повтор"""
+    for notification in notifications:
+        notification.attempts += 1
+        notification.last_error = str(error)
+        if permanent or notification.attempts >= MAX_ATTEMPTS:
+            notification.status = "failed"
+            metrics.inc("outbox.failed")
+        else:
+            backoff = min(2 ** notification.attempts, MAX_BACKOFF)
+            notification.next_attempt_at = now + datetime.timedelta(seconds=backoff)
+            metrics.inc("outbox.retried")
+
+
+def _lease(notifications: List[NotificationOutbox], now: datetime.datetime) -> None:
+    """Відсуває наступну спробу на час відправки, щоб звільнити блокування рядків до мережевих запитів"""
+    for notification in notifications:
+        notification.next_attempt_at = now + datetime.timedelta(seconds=LEASE_TIME)
+
+
+def _register_success(notifications: List[NotificationOutbox], now: datetime.datetime) -> None:
+    for notification in notifications:
+        notification.status = "sent"
+        notification.sent_at = now
+        metrics.inc("outbox.sent")
+        metrics.observe("outbox.delay", (now - notification.created_at).total_seconds())
+
+
+async def deliver_notifications(bot: Bot) -> int:
+    """Відправляє одну порцію сповіщень з outbox
+
+    Returns:
+        int: кількість оброблених сповіщень
+    """
+    async with async_session() as session:
+        notifications = await claim_pending_notifications(
+            session, BATCH_SIZE, digest_bypass=DIGEST_BYPASS if NOTIFY_DIGEST else None
+        )
+        _lease(notifications, datetime.datetime.now())
+        await session.commit()
+
+    for notification in notifications:
+        now = datetime.datetime.now()
+        try:
+            await bot.send_message(notification.chat_id, notification.text, parse_mode="HTML")
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Користувач заблокував бота або текст некоректний - повтор не допоможе
+            print(f"Не вдалось доставити сповіщення {notification.id}: {e}")
+            _register_failure([notification], e, permanent=True, now=now)
+        except Exception as e:
+            _register_failure([notification], e, permanent=False, now=now)
+        else:
+            _register_success([notification], now)
+        # Фіксуємо кожну відправку одразу, щоб збій не повторив уже доставлені сповіщення
+        await save_notifications([notification])
+
+    return len(notifications)
+
+
+def format_digest(notifications: List[NotificationOutbox],
+                  usernames: Dict[int, Optional[str]]) -> List[Tuple[str, List[NotificationOutbox]]]:
+    """Формує зведення - по рядку на подію (час, тип, користувач), розбите на повідомлення в межах ліміту
+
+    Returns:
+        список (текст сторінки, сповіщення на цій сторінці)
+    """
+    first = min(n.created_at for n in notifications)
+    last = max(n.created_at for n in notifications)
+    header = (f"🗞 <b>ЗВЕДЕННЯ ПОДІЙ</b> ({first.strftime('%H:%M')}–{last.strftime('%H:%M')})\n"
+              f"Усього подій: <b>{len(notifications)}</b>\n\n")
+
+    pages = []
+    current, included = header, []
+    for item in sorted(notifications, key=lambda n: n.created_at):
+        line = f"{item.created_at.strftime('%H:%M')} {DIGEST_EVENTS.get(item.event_type, html.escape(item.event_type))}"
+        if item.user_id is not None:
+            username = usernames.get(item.user_id)
+            line += f" — {html.escape(f'@{username}' if username else f'користувач ({item.user_id})')}"
+        line += "\n"
+
+        if included and text_length(current) + text_length(line) > MESSAGE_LIMIT:
+            pages.append((current, included))
+            current, included = "", []
+        current += line
+        included.append(item)
+
+    pages.append((current, included))
+    return pages
+
+
+async def deliver_digest(bot: Bot) -> int:
+    """Відправляє зведення сповіщень для загального чату, вікно яких уже минуло
+
+    Returns:
+        int: кількість сповіщень, що увійшли у відправлене зведення
+    """
+    # Спершу без блокувань перевіряємо, чи вікно хоч одного типу подій уже минуло
+    oldest = await get_digest_oldest(DIGEST_BYPASS)
+    now = datetime.datetime.now()
+    # Зведення відправляється, щойно вікно хоча б одного типу подій минуло,
+    # і забирає з собою всі накопичені події
+    due = any(
+        now - created_at >= datetime.timedelta(seconds=NOTIFY_DIGEST_WINDOWS.get(event_type, NOTIFY_DIGEST_WINDOW))
+        for event_type, created_at in oldest.items()
+    )
+    if not due:
+        return 0
+
+    async with async_session() as session:
+        notifications = await claim_digest_notifications(session, DIGEST_BYPASS)
+        if not notifications:
+            return 0
+        _lease(notifications, now)
+        await session.commit()
+
+    users = await get_users_by_ids(n.user_id for n in notifications if n.user_id is not None)
+    pages = format_digest(notifications, {user.id: user.username for user in users})
+    for number, (text, included) in enumerate(pages):
+        now = datetime.datetime.now()
+        try:
+            await bot.send_message(CHAT_ID, text, parse_mode="HTML")
+        except TelegramBadRequest as e:
+            print(f"Не вдалось доставити сторінку зведення: {e}")
+            # Шукаємо сповіщення, через які Telegram відхилив сторінку, відправляючи їх окремо
+            await _deliver_separately(bot, included)
+            continue
+        except Exception as e:
+            # Недоставлені сторінки спробуємо відправити пізніше, доставлені вже збережено
+            unsent = [item for _, rest in pages[number:] for item in rest]
+            _register_failure(unsent, e, permanent=False, now=now)
+            await save_notifications(unsent)
+            break
+        _register_success(included, now)
+        # Прогрес зберігається після кожної сторінки, тому при збої вони не повторюються
+        await save_notifications(included)
+    else:
+        metrics.inc("outbox.digests")
+
+    return len(notifications)
+
+
+async def _deliver_separately(bot: Bot, notifications: List[NotificationOutbox]) -> None:
+    """Відправляє сповіщення по одному; остаточно невдалими позначаються лише ті, що Telegram відхилив"""
+    for notification in notifications:
+        now = datetime.datetime.now()
+        try:
+            await bot.send_message(CHAT_ID, notification.text, parse_mode="HTML")
+        except TelegramBadRequest as e:
+            print(f"Не вдалось доставити сповіщення {notification.id}: {e}")
+            _register_failure([notification], e, permanent=True, now=now)
+        except Exception as e:
+            _register_failure([notification], e, permanent=False, now=now)
+        else:
+            _register_success([notification], now)
+        await save_notifications([notification])
+
+
+async def run_notification_delivery(bot: Bot, idle_interval: float = 5.0):
+    """Постійно доставляє сповіщення, прокидаючись після кожного нового запису в outbox"""
+    pruned_at = None
+    while True:
+        outbox_ready.clear()
+        try:
+            delivered = await deliver_notifications(bot)
+            if NOTIFY_DIGEST:
+                await deliver_digest(bot)
+        except Exception as e:
+            print(f"Помилка доставки сповіщень: {e}")
+            delivered = 0
+
+        now = datetime.datetime.now()
+        if pruned_at is None or (now - pruned_at).total_seconds() >= PRUNE_INTERVAL:
+            pruned_at = now
+            try:
+                await prune_sent_notifications(now - datetime.timedelta(days=NOTIFY_RETENTION_DAYS))
+            except Exception as e:
+                print(f"Помилка очищення outbox: {e}")
+
+        if delivered:
+            continue
+
+        try:
+            await asyncio.wait_for(outbox_ready.wait(), timeout=idle_interval)
+        except asyncio.TimeoutError:
+            pass
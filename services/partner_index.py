@@ -0,0 +1,51 @@
+"""
+Індекс затверджених користувачів для швидкого пошуку партнерів за початком імені
+"""
+import bisect
+import time
+from typing import List, Optional
+
+from services.db import get_all_approved_users
+
+# Як довго (у секундах) індекс вважається актуальним без явного скидання
+INDEX_TTL = 5 * 60
+
+
+class PartnerIndex:
+    """Відсортований список користувачів з пошуком за префіксом username"""
+
+    def __init__(self, users: List):
+        entries = sorted(((self.search_key(user), user.id, user) for user in users), key=lambda e: (e[0], e[1]))
+        self._keys = [entry[0] for entry in entries]
+        self.users = [entry[2] for entry in entries]
+
+    @staticmethod
+    def search_key(user) -> str:
+        """Ключ, за яким користувача шукають у списку"""
+        return (user.username or str(user.id)).lower()
+
+    def search(self, prefix: str) -> List:
+        """Повертає користувачів, чий username починається з prefix"""
+        prefix = prefix.lower().lstrip("@")
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\uffff", lo=start)
+        return self.users[start:end]
+
+
+_index: Optional[PartnerIndex] = None
+_built_at = 0.0
+
+
+async def get_partner_index() -> PartnerIndex:
+    """Повертає індекс партнерів, перебудовуючи його за потреби"""
+    global _index, _built_at
+    if _index is None or time.monotonic() - _built_at > INDEX_TTL:
+        _index = PartnerIndex(await get_all_approved_users())
+        _built_at = time.monotonic()
+    return _index
+
+
+def invalidate_partner_index() -> None:
+    """Скидає індекс після зміни списку затверджених користувачів"""
+    global _index
+    _index = None
@@ -0,0 +1,175 @@
+"""
+Формування місячного звіту у вигляді одного документа (HTML або CSV)
+"""
+import csv
+import html
+import io
+from typing import Dict, Iterator, List, Tuple
+
+from utils.formatting import format_time
+
+REPORT_FORMATS = ("html", "csv")
+
+USER_COLUMNS = [
+    "Користувач", "Виробництво, хв", "Пакування, хв", "Пакети (пакування)",
+    "Продаж, хв", "Пакети (продаж)", "Сума, грн", "Інша робота, хв", "Зміни сумарно, хв",
+    "Зміни без перетинів, хв", "Загальний час, хв",
+]
+
+OVERLAP_COLUMNS = ["Користувач", "Початок", "Кінець", "Хвилин", "Сесії"]
+
+
+def _user_rows(report_data: Dict, user_names: Dict[int, str]) -> Iterator[list]:
+    """Рядки таблиці користувачів: ім'я та показники у хвилинах"""
+    for user_id, user_data in report_data["users"].items():
+        production = user_data["production"]["host_time"] + user_data["production"]["partner_time"]
+        packaging = user_data["packaging"]["host_time"] + user_data["packaging"]["partner_time"]
+        sales = user_data["sales"]["host_time"] + user_data["sales"]["partner_time"]
+        other_work = user_data["other_work"]["time"]
+        accounting = user_data["accounting"]
+        yield [
+            user_names[user_id],
+            production,
+            packaging,
+            user_data["packaging"]["packages"],
+            sales,
+            user_data["sales"]["packages"],
+            user_data["sales"]["amount"],
+            other_work,
+            accounting["raw_time"],
+            accounting["time"],
+            accounting["time"] + other_work,
+        ]
+
+
+def _totals_row(report_data: Dict) -> list:
+    totals = report_data["totals"]
+    total_time = sum(totals[key]["time"] for key in ("production", "packaging", "sales", "other_work"))
+    return [
+        "Загалом",
+        totals["production"]["time"],
+        totals["packaging"]["time"],
+        totals["packaging"]["packages"],
+        totals["sales"]["time"],
+        totals["sales"]["packages"],
+        totals["sales"]["amount"],
+        totals["other_work"]["time"],
+        total_time - totals["other_work"]["time"],
+        None,
+        None,
+    ]
+
+
+def _overlap_rows(report_data: Dict, user_names: Dict[int, str]) -> Iterator[list]:
+    """Перетини змін: користувач, початок і кінець перетину, хвилини, ID сесій"""
+    for user_id, user_data in report_data["users"].items():
+        for overlap in user_data["accounting"]["overlaps"]:
+            yield [
+                user_names[user_id],
+                overlap["start"].strftime("%d.%m.%Y %H:%M"),
+                overlap["end"].strftime("%d.%m.%Y %H:%M"),
+                round(overlap["minutes"]),
+                " ".join(str(session_id) for session_id in overlap["sessions"]),
+            ]
+
+
+def _other_work_rows(report_data: Dict, user_names: Dict[int, str]) -> List[Tuple[str, str, str]]:
+    """Унікальні записи (опис, дата, учасник) іншої роботи, відсортовані за описом і датою"""
+    rows = {
+        (detail["description"], str(detail["date"]), user_names[detail["user_id"]])
+        for detail in report_data.get("other_works_details", [])
+    }
+    return sorted(rows)
+
+
+def render_report_csv(report_data: Dict, user_names: Dict[int, str], month_name: str, year: int) -> bytes:
+    """Формує звіт у CSV: підсумки та рядок на кожного користувача, далі список інших робіт"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([f"Звіт за {month_name} {year}"])
+    writer.writerow(USER_COLUMNS)
+    writer.writerow(_totals_row(report_data))
+    writer.writerows(_user_rows(report_data, user_names))
+
+    overlaps = list(_overlap_rows(report_data, user_names))
+    if overlaps:
+        writer.writerow([])
+        writer.writerow(OVERLAP_COLUMNS)
+        writer.writerows(overlaps)
+
+    other_works = _other_work_rows(report_data, user_names)
+    if other_works:
+        writer.writerow([])
+        writer.writerow(["Інша робота", "Дата", "Учасник"])
+        writer.writerows(other_works)
+
+    # BOM потрібен, щоб Excel правильно визначив кодування
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def render_report_html(report_data: Dict, user_names: Dict[int, str], month_name: str, year: int) -> bytes:
+    """Формує звіт у вигляді HTML-сторінки з таблицями"""
+    buffer = io.StringIO()
+    write = buffer.write
+    title = html.escape(f"Звіт за {month_name} {year}")
+
+    write("<!DOCTYPE html>\n<html lang=\"uk\">\n<head>\n<meta charset=\"utf-8\">\n")
+    write(f"<title>{title}</title>\n")
+    write("<style>table{border-collapse:collapse}td,th{border:1px solid #999;padding:4px 8px}"
+          "td.n{text-align:right}</style>\n</head>\n<body>\n")
+    write(f"<h1>{title}</h1>\n<table>\n<tr>")
+    write("".join(f"<th>{html.escape(column)}</th>" for column in USER_COLUMNS))
+    write("</tr>\n")
+
+    rows = [_totals_row(report_data)] + list(_user_rows(report_data, user_names))
+    for index, row in enumerate(rows):
+        name, values = row[0], row[1:]
+        cells = []
+        for column, value in zip(USER_COLUMNS[1:], values):
+            # Час показуємо у звичному форматі, кількості - як є
+            if value is None:
+                shown = ""
+            elif column.endswith(", хв"):
+                shown = format_time(value)
+            else:
+                shown = value
+            cells.append(f"<td class=\"n\">{html.escape(str(shown))}</td>")
+        name_cell = f"<b>{html.escape(name)}</b>" if index == 0 else html.escape(name)
+        write(f"<tr><td>{name_cell}</td>{''.join(cells)}</tr>\n")
+    write("</table>\n")
+
+    overlaps = list(_overlap_rows(report_data, user_names))
+    if overlaps:
+        write("<h2>Перетини змін</h2>\n<table>\n<tr>")
+        write("".join(f"<th>{html.escape(column)}</th>" for column in OVERLAP_COLUMNS))
+        write("</tr>\n")
+        for row in overlaps:
+            write("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>\n")
+        write("</table>\n")
+
+    other_works = _other_work_rows(report_data, user_names)
+    if other_works:
+        write("<h2>Список інших робіт</h2>\n")
+        current = None
+        for description, date, user_name in other_works:
+            if description != current:
+                if current is not None:
+                    write("</ul>\n")
+                write(f"<h3>{html.escape(description)}</h3>\n<ul>\n")
+                current = description
+            write(f"<li>{html.escape(date)} - {html.escape(user_name)}</li>\n")
+        write("</ul>\n")
+
+    write("</body>\n</html>\n")
+    return buffer.getvalue().encode("utf-8")
+
+
+def render_report_document(fmt: str, report_data: Dict, user_names: Dict[int, str], month_name: str,
+                           year: int) -> bytes:
+    """Формує документ зі звітом у вказаному форматі"""
+    if fmt == "csv":
+        return render_report_csv(report_data, user_names, month_name, year)
+    if fmt == "html":
+        return render_report_html(report_data, user_names, month_name, year)
+    raise ValueError(f"Невідомий формат звіту: {fmt}")
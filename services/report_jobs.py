@@ -0,0 +1,154 @@
+"""
+Фонові завдання формування звітів з об'єднанням однакових запитів
+
+Запити з однаковим ключем (наприклад, звіт за один і той самий місяць)
+приєднуються до вже запущеного завдання, а не рахують дані повторно.
+Одночасно виконується не більше REPORT_JOBS_CONCURRENCY завдань,
+решта чекає в черзі. Результат розсилається в усі чати, що його чекають.
+"""
+import asyncio
+import html
+import itertools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from aiogram.types import Message
+
+import keyboards as kb
+from config import REPORT_JOBS_CONCURRENCY
+from services.metrics import metrics
+from utils.progress import ProgressReporter
+
+# Обчислення результату; отримує функцію для показу поточного етапу
+Compute = Callable[[Callable[[str], Awaitable[None]]], Awaitable[Any]]
+# Доставка результату в один чат: статус (його треба замінити результатом) і сам результат
+Deliver = Callable[[ProgressReporter, Any], Awaitable[None]]
+
+QUEUED_TEXT = "⏳ <b>Звіт у черзі...</b>"
+CANCELLED_TEXT = "❌ <b>Формування звіту скасовано.</b>"
+
+
+class _Waiter:
+    """Чат, що чекає на результат завдання"""
+
+    def __init__(self, message: Message, deliver: Deliver):
+        self.progress = ProgressReporter(message)
+        self.deliver = deliver
+
+
+class ReportJob:
+    """Одне обчислення звіту та всі чати, що чекають на нього"""
+
+    def __init__(self, job_id: int, key: Hashable):
+        self.id = job_id
+        self.key = key
+        self.stage = QUEUED_TEXT
+        self.waiters: Dict[int, _Waiter] = {}  # ID чату -> очікувач
+        self.task: Optional[asyncio.Task] = None
+
+    async def show(self, waiter: _Waiter) -> None:
+        await waiter.progress.update(self.stage, reply_markup=kb.report_cancel_kb(self.id))
+
+    async def set_stage(self, text: str) -> None:
+        """Показує новий етап у статусах усіх чатів"""
+        self.stage = text
+        await asyncio.gather(*(self.show(waiter) for waiter in list(self.waiters.values())),
+                             return_exceptions=True)
+
+
+class ReportJobs:
+    """Реєстр завдань зі звітами"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[Hashable, ReportJob] = {}
+        self._by_id: Dict[int, ReportJob] = {}
+        self._ids = itertools.count(1)
+
+    async def submit(self, key: Hashable, message: Message, compute: Compute, deliver: Deliver) -> ReportJob:
+        """
+        Ставить звіт у чергу або приєднує чат до вже запущеного завдання з тим самим ключем.
+
+        Повертається одразу: результат буде доставлено через deliver, коли він буде готовий.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        job = self._jobs.get(key)
+        if job is None:
+            job = ReportJob(next(self._ids), key)
+            self._jobs[key] = job
+            self._by_id[job.id] = job
+            job.task = asyncio.create_task(self._run(job, compute))
+            metrics.inc("report_jobs.started")
+        else:
+            metrics.inc("report_jobs.joined")
+
+        chat_id = message.chat.id
+        if chat_id in job.waiters:
+            # Цей чат уже чекає на такий самий звіт
+            await message.answer("⏳ <b>Цей звіт уже формується, зачекайте.</b>", parse_mode="HTML")
+            return job
+
+        waiter = _Waiter(message, deliver)
+        job.waiters[chat_id] = waiter
+        await job.show(waiter)
+        return job
+
+    async def cancel(self, job_id: int, chat_id: int) -> bool:
+        """Від'єднує чат від завдання; завдання без жодного очікувача зупиняється"""
+        job = self._by_id.get(job_id)
+        waiter = job.waiters.pop(chat_id, None) if job else None
+        if waiter is None:
+            return False
+
+        metrics.inc("report_jobs.cancelled")
+        await waiter.progress.finish(CANCELLED_TEXT)
+        if not job.waiters and job.task is not None:
+            job.task.cancel()
+        return True
+
+    async def _run(self, job: ReportJob, compute: Compute) -> None:
+        try:
+            async with self._semaphore:
+                if not job.waiters:
+                    return
+                await job.set_stage("🔍 <b>Пошук даних...</b>")
+                result = await compute(job.set_stage)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            print(f"Помилка при формуванні звіту {job.key}: {e}")
+            await asyncio.gather(
+                *(waiter.progress.finish(f"❌ <b>Помилка при формуванні звіту:</b> {html.escape(str(e))}")
+                  for waiter in job.waiters.values()),
+                return_exceptions=True
+            )
+            return
+        finally:
+            self._finish(job)
+
+        # Результат розсилається всім, хто його чекає, паралельно
+        waiters = list(job.waiters.values())
+        results = await asyncio.gather(
+            *(waiter.deliver(waiter.progress, result) for waiter in waiters),
+            return_exceptions=True
+        )
+        failed = []
+        for waiter, error in zip(waiters, results):
+            if isinstance(error, Exception):
+                print(f"Помилка при доставці звіту {job.key}: {error}")
+                # Статус з кнопкою скасування замінюємо повідомленням про помилку
+                failed.append(waiter.progress.finish(
+                    f"❌ <b>Помилка при надсиланні звіту:</b> {html.escape(str(error))}"
+                ))
+        await asyncio.gather(*failed, return_exceptions=True)
+
+    def _finish(self, job: ReportJob) -> None:
+        # Нові запити з цим ключем уже запускають нове завдання
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        self._by_id.pop(job.id, None)
+
+
+report_jobs = ReportJobs(REPORT_JOBS_CONCURRENCY)
@@ -0,0 +1,245 @@
+"""
+Черга вихідних запитів до Bot API з дотриманням лімітів Telegram
+"""
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    ForwardMessage,
+    SendDocument,
+    SendMediaGroup,
+    SendMessage,
+    SendPhoto,
+    TelegramMethod,
+)
+from cachetools import TTLCache
+
+from config import CHAT_ID
+from services.metrics import metrics
+
+# Пріоритети запитів: менше значення обробляється раніше
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NOTIFICATION = 1
+
+# Методи, які проходять через чергу (решта відправляється напряму)
+QUEUED_METHODS = (
+    SendMessage,
+    SendDocument,
+    SendPhoto,
+    SendMediaGroup,
+    CopyMessage,
+    ForwardMessage,
+    EditMessageText,
+    EditMessageReplyMarkup,
+)
+
+
+class _Bucket:
+    """Token bucket для обмеження частоти запитів"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Скільки секунд чекати до появи токена"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Забороняє запити на вказаний час (після RetryAfter)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+@dataclass(order=True)
+class _QueuedRequest:
+    priority: int
+    seq: int
+    chat_id: Any = field(compare=False)
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class OutgoingQueue:
+    """
+    Черга вихідних повідомлень.
+
+    Запити до одного чату виконуються по черзі і не частіше за ліміт чату,
+    усі запити разом - не частіше за глобальний ліміт. Інтерактивні відповіді
+    користувачам обробляються раніше за сповіщення в загальний чат, а
+    TelegramRetryAfter призводить до паузи для чату та повторної спроби.
+    """
+
+    def __init__(self, global_rate: float = 25.0, private_rate: float = 1.0, private_burst: int = 3,
+                 group_rate: float = 20 / 60, group_burst: int = 3, max_attempts: int = 5):
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_attempts = max_attempts
+        self._global = _Bucket(global_rate, global_rate)
+        self._chats = TTLCache(maxsize=10_000, ttl=5 * 60)
+        self._queue: List[_QueuedRequest] = []
+        self._busy_chats = set()
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        """Запускає обробку черги в поточному event loop"""
+        if not self.running:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Зупиняє обробку; запити, що лишились у черзі, скасовуються, щоб їх не чекали вічно"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for request in self._queue:
+            if not request.future.done():
+                request.future.cancel()
+        self._queue.clear()
+        metrics.set("send_queue.depth", 0)
+
+    async def submit(self, chat_id: Any, priority: int, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Ставить запит у чергу та чекає на його результат"""
+        request = _QueuedRequest(
+            priority=priority,
+            seq=next(self._seq),
+            chat_id=chat_id,
+            call=call,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic()
+        )
+        self._queue.append(request)
+        metrics.set("send_queue.depth", len(self._queue))
+        self._wakeup.set()
+        return await request.future
+
+    def _chat_bucket(self, chat_id: Any) -> _Bucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if str(chat_id).startswith("-"):
+                bucket = _Bucket(self.group_burst, self.group_rate)
+            else:
+                bucket = _Bucket(self.private_burst, self.private_rate)
+        # Повторне збереження продовжує життя відра в кеші
+        self._chats[chat_id] = bucket
+        return bucket
+
+    def _pick(self, now: float) -> Tuple[Optional[_QueuedRequest], Optional[float]]:
+        """Обирає запит, який можна виконати зараз, або час очікування"""
+        global_wait = self._global.wait_time(now)
+        if global_wait > 0:
+            return None, global_wait
+
+        best = None
+        min_wait = None
+        for request in self._queue:
+            if request.chat_id in self._busy_chats:
+                continue
+            wait = self._chat_bucket(request.chat_id).wait_time(now)
+            if wait > 0:
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+            elif best is None or request < best:
+                best = request
+        return best, min_wait
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            request, wait = self._pick(now)
+            if request is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._queue.remove(request)
+            metrics.set("send_queue.depth", len(self._queue))
+            if request.future.done():
+                # Той, хто поставив запит, уже не чекає на нього (наприклад, його скасовано)
+                continue
+            self._global.take(now)
+            self._chat_bucket(request.chat_id).take(now)
+            # Поки запит виконується, інші запити в цей чат чекають, щоб не порушити порядок
+            self._busy_chats.add(request.chat_id)
+            asyncio.create_task(self._execute(request))
+
+    async def _execute(self, request: _QueuedRequest) -> None:
+        try:
+            result = await request.call()
+        except TelegramRetryAfter as e:
+            metrics.inc("send_queue.retry_after")
+            request.attempts += 1
+            if request.attempts >= self.max_attempts:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            elif not request.future.done():
+                self._chat_bucket(request.chat_id).pause(time.monotonic(), e.retry_after)
+                self._queue.append(request)
+                metrics.set("send_queue.depth", len(self._queue))
+        except Exception as e:
+            metrics.inc("send_queue.failed")
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            metrics.inc("send_queue.sent")
+            metrics.observe("send_queue.latency", time.monotonic() - request.enqueued_at)
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self._busy_chats.discard(request.chat_id)
+            self._wakeup.set()
+
+
+class OutgoingQueueMiddleware(BaseRequestMiddleware):
+    """Направляє запити на відправлення повідомлень через OutgoingQueue"""
+
+    def __init__(self, queue: OutgoingQueue):
+        self.queue = queue
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType,
+            bot: Bot,
+            method: TelegramMethod,
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        if not isinstance(method, QUEUED_METHODS) or chat_id is None or not self.queue.running:
+            return await make_request(bot, method)
+
+        # Сповіщення в загальний чат можуть зачекати, відповіді користувачам - ні
+        priority = PRIORITY_NOTIFICATION if str(chat_id) == str(CHAT_ID) else PRIORITY_INTERACTIVE
+        return await self.queue.submit(chat_id, priority, lambda: make_request(bot, method))
+
+
+send_queue = OutgoingQueue()
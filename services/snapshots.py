@@ -0,0 +1,95 @@
+"""
+Знімки поточного стану в пам'яті для відповідей на inline-запити
+
+Inline-запити надходять при кожному натисканні клавіші, тому відповіді
+будуються лише зі знімка, який періодично оновлюється одним набором запитів до БД.
+"""
+import asyncio
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from config import INLINE_SNAPSHOT_INTERVAL
+from services.accounting import session_participants
+from services.db import get_active_drying_sessions, get_active_work_sessions, get_all_approved_users, \
+    get_range_totals
+from services.metrics import metrics
+
+# Номери дегідраторів
+DEHYDRATOR_IDS = (1, 2, 3)
+
+
+@dataclass(frozen=True)
+class DryingInfo:
+    start_time: datetime.datetime
+    finish_time: datetime.datetime
+    user_id: int
+
+
+@dataclass(frozen=True)
+class ShiftInfo:
+    work_type: str
+    start_time: datetime.datetime
+    participants: tuple
+
+
+@dataclass
+class Snapshot:
+    """Незмінний після побудови стан, з якого відповідає inline-режим"""
+    version: int
+    built_at: datetime.datetime
+    approved: FrozenSet[int] = frozenset()
+    drying: Dict[int, DryingInfo] = field(default_factory=dict)  # Номер дегідратора -> сушка
+    shifts: Dict[int, ShiftInfo] = field(default_factory=dict)  # Користувач -> активна зміна
+    # Підсумки поточного місяця: {user_id: {work_type: {"minutes", "sessions", "packages", "amount"}}}
+    month_totals: Dict[int, Dict] = field(default_factory=dict)
+
+
+_snapshot: Optional[Snapshot] = None
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """Останній побудований знімок або None, якщо його ще немає"""
+    return _snapshot
+
+
+async def refresh_snapshot() -> Snapshot:
+    """Будує новий знімок і замінює ним попередній"""
+    global _snapshot
+    now = datetime.datetime.now()
+    today = now.date()
+
+    users = await get_all_approved_users()
+    drying_sessions = await get_active_drying_sessions()
+    work_sessions = await get_active_work_sessions()
+    month_totals = await get_range_totals(today.replace(day=1), today)
+
+    shifts = {}
+    for session in work_sessions:
+        info = ShiftInfo(session.work_type, session.start_time, tuple(session_participants(session)))
+        for user_id in info.participants:
+            shifts[user_id] = info
+
+    _snapshot = Snapshot(
+        version=(_snapshot.version + 1) if _snapshot else 1,
+        built_at=now,
+        approved=frozenset(user.id for user in users),
+        drying={
+            session.dehydrator_id: DryingInfo(session.start_time, session.finish_time, session.user_id)
+            for session in drying_sessions
+        },
+        shifts=shifts,
+        month_totals=month_totals,
+    )
+    metrics.inc("snapshots.refreshed")
+    return _snapshot
+
+
+async def run_snapshot_refresh(interval: float = INLINE_SNAPSHOT_INTERVAL):
+    """Періодично оновлює знімок"""
+    while True:
+        try:
+            await refresh_snapshot()
+        except Exception as e:
+            print(f"Помилка при оновленні знімка для inline-режиму: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,58 @@
+"""
+Пул процесів для важких обчислень, щоб вони не блокували цикл подій бота
+"""
+import asyncio
+import functools
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from config import REPORT_WORKERS, REPORT_WORKER_QUEUE
+from services.metrics import metrics
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+# Обмежує кількість задач у пулі: виконуються + чекають у черзі
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_executor() -> Optional[Executor]:
+    global _executor
+    if _executor is None and REPORT_WORKERS > 0:
+        # spawn не копіює стан процесу бота (з'єднання, потоки) у воркери
+        _executor = ProcessPoolExecutor(max_workers=REPORT_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def run_in_worker(func: Callable[..., T], *args) -> T:
+    """
+    Виконує функцію в окремому процесі і чекає на результат.
+
+    Функція та аргументи мають бути серіалізовані pickle, тобто це функція
+    рівня модуля над простими даними. Якщо черга пулу заповнена, виклик
+    чекає на вільне місце, не займаючи пул ще більше.
+    """
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(REPORT_WORKERS, 1) + REPORT_WORKER_QUEUE)
+
+    started = time.monotonic()
+    async with _slots:
+        metrics.observe("workers.wait", time.monotonic() - started)
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            return await loop.run_in_executor(_get_executor(), functools.partial(func, *args))
+        finally:
+            metrics.observe(f"workers.{func.__name__}", time.monotonic() - started)
+
+
+def shutdown_workers() -> None:
+    """Зупиняє процеси пулу (під час завершення бота)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
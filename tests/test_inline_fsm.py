@@ -0,0 +1,74 @@
+import asyncio
+import datetime
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.fsm.storage.memory import SimpleEventIsolation
+from aiogram.types import Chat, InlineQuery, Message, Update, User
+
+import services.fsm_storage as fsm_storage
+from middleware.fsm_context import InlineStatelessFSMMiddleware
+from middleware.fsm_flush import FSMFlushMiddleware
+from services.fsm_storage import PostgresStorage
+
+USER = User(id=7, is_bot=False, first_name="Test")
+
+
+class _Result:
+    def scalar_one_or_none(self):
+        return None
+
+
+class _Session:
+    """Сесія-заглушка, що рахує звернення до бази"""
+    opened = 0
+
+    async def __aenter__(self):
+        _Session.opened += 1
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, *args, **kwargs):
+        return _Result()
+
+
+def _dispatcher(handled):
+    dp = Dispatcher(storage=PostgresStorage(), events_isolation=SimpleEventIsolation(), disable_fsm=True)
+    dp.fsm = InlineStatelessFSMMiddleware(storage=dp.fsm.storage, events_isolation=dp.fsm.events_isolation)
+    dp.update.outer_middleware(dp.fsm)
+    dp.update.outer_middleware(FSMFlushMiddleware())
+
+    router = Router()
+
+    @router.inline_query()
+    async def on_inline(inline_query: InlineQuery):
+        handled.append("inline")
+
+    @router.message()
+    async def on_message(message: Message):
+        handled.append("message")
+
+    dp.include_router(router)
+    return dp
+
+
+def test_inline_query_does_not_touch_database(monkeypatch):
+    monkeypatch.setattr(fsm_storage, "async_session", _Session)
+    _Session.opened = 0
+    handled = []
+    dp = _dispatcher(handled)
+    bot = Bot("42:TEST")
+
+    inline = Update(update_id=1, inline_query=InlineQuery(id="1", from_user=USER, query="зміна", offset=""))
+    asyncio.run(dp.feed_update(bot, inline))
+    assert handled == ["inline"]
+    assert _Session.opened == 0
+
+    # Звичайні повідомлення, як і раніше, читають стан зі сховища
+    message = Update(update_id=2, message=Message(
+        message_id=1, date=datetime.datetime.now(), chat=Chat(id=7, type="private"), from_user=USER, text="hi"
+    ))
+    asyncio.run(dp.feed_update(bot, message))
+    assert handled == ["inline", "message"]
+    assert _Session.opened == 1
@@ -0,0 +1,31 @@
+import html
+import re
+
+from utils.pagination import pack_blocks, split_html, text_length
+
+# Символ &, за яким не йде повна сутність
+BROKEN_ENTITY_RE = re.compile(r"&(?!#?\w+;)")
+# Хвіст сутності на початку сторінки (після перевідкритих тегів)
+ENTITY_TAIL_RE = re.compile(r"^(<[^>]+>)*#?\w+;")
+
+
+def _check_pages(pages, limit):
+    for page in pages:
+        assert text_length(page) <= limit
+        assert not BROKEN_ENTITY_RE.search(page)
+        assert not ENTITY_TAIL_RE.match(page)
+
+
+def test_entity_near_limit_moves_to_next_page():
+    text = "<b>" + "а" * 10 + "&amp;&lt;ящиків&gt;" + "</b>"
+    for limit in range(18, 30):
+        pages = split_html(text, limit)
+        _check_pages(pages, limit)
+        assert html.unescape(re.sub(r"</?b>", "", "".join(pages))) == "а" * 10 + "&<ящиків>"
+
+
+def test_pack_blocks_keeps_escaped_description_intact():
+    description = html.escape("сортування <ящиків> & пакування " * 20)
+    blocks = [f"📝 <b>{description}</b>\n", "<i>інша робота</i>\n"]
+    for limit in range(40, 120, 7):
+        _check_pages(pack_blocks(blocks, limit), limit)
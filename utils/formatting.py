@@ -0,0 +1,29 @@
+"""
+Форматування значень для тексту звітів
+
+Модуль не залежить від бота і бази, тому його імпортують і процес-воркери
+(див. services.workers).
+"""
+
+
+def format_time(minutes: float) -> str:
+    """Форматує час у хвилинах у зручний для читання формат (години та хвилини)
+    
+    Args:
+        minutes: Час у хвилинах
+        
+    Returns:
+        str: Відформатований час (наприклад, "2 год. 30 хв.")
+    """
+    if minutes is None or minutes == 0:
+        return "0 хв."
+        
+    hours = int(minutes // 60)
+    mins = int(minutes % 60)
+    
+    if hours > 0 and mins > 0:
+        return f"{hours} год. {mins} хв."
+    elif hours > 0:
+        return f"{hours} год."
+    else:
+        return f"{mins} хв."
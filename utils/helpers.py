@@ -5,9 +5,17 @@ import datetime
 from typing import List, Optional, Union, Dict
 
 from aiogram import types
+from aiogram.dispatcher.event.bases import SkipHandler
 from aiogram.fsm.context import FSMContext
 
-from services.db import get_all_approved_users
+from config import ADMIN_ID
+from services.partner_index import get_partner_index
+from utils.formatting import format_time
+from utils.keyboard_edits import keyboard_edits
+
+
+# Тексти кнопок меню, які не вважаються запитом для пошуку партнерів
+MENU_BUTTON_TEXTS = ["🏠 Меню", "🏠 На головну", "🔙 Назад", "🔙 Повернутися назад"]
 
 
 async def init_partner_selection(
@@ -24,8 +32,63 @@ async def init_partner_selection(
     # Зберігаємо тип роботи
     await state.update_data(work_type=work_type)
     
-    # Ініціалізуємо пустий список вибраних партнерів та стан вибору "Нікого"
-    await state.update_data(selected_partners=[], nobody_selected=False)
+    # Ініціалізуємо пустий список вибраних партнерів, стан вибору "Нікого" та сторінку списку
+    await state.update_data(selected_partners=[], nobody_selected=False, partner_page=0, partner_query=None,
+                            partner_search=False)
+
+
+async def render_partner_picker(
+    state: FSMContext,
+    user_id: int
+) -> types.InlineKeyboardMarkup:
+    """
+    Формує клавіатуру вибору партнерів з урахуванням сторінки та фільтра з FSM
+    
+    Args:
+        state: FSM контекст
+        user_id: ID поточного користувача
+        
+    Returns:
+        Інлайн-клавіатура поточної сторінки
+    """
+    from keyboards import get_multiselect_partners_kb
+
+    data = await state.get_data()
+    query = data.get("partner_query")
+    nobody_selected = data.get("nobody_selected", False)
+
+    index = await get_partner_index()
+    users = index.search(query) if query else index.users
+
+    return get_multiselect_partners_kb(
+        users,
+        user_id,
+        selected_partners=[] if nobody_selected else data.get("selected_partners", []),
+        nobody_selected=nobody_selected,
+        page=data.get("partner_page", 0),
+        query=query
+    )
+
+
+async def send_partner_picker(
+    message: types.Message,
+    state: FSMContext,
+    text: str
+) -> None:
+    """
+    Надсилає повідомлення з вибором партнерів і запам'ятовує його ID
+    
+    Args:
+        message: Повідомлення користувача
+        state: FSM контекст
+        text: Текст над клавіатурою
+    """
+    picker_message = await message.answer(
+        text,
+        reply_markup=await render_partner_picker(state, message.from_user.id),
+        parse_mode="HTML"
+    )
+    await state.update_data(picker_message_id=picker_message.message_id)
 
 
 async def handle_nobody_selection(
@@ -52,17 +115,8 @@ async def handle_nobody_selection(
     else:
         await state.update_data(nobody_selected=False)
 
-    # Оновлюємо клавіатуру
-    users = await get_all_approved_users()
-    from keyboards import get_multiselect_partners_kb
-    await callback.message.edit_reply_markup(
-        reply_markup=get_multiselect_partners_kb(
-            users,
-            callback.from_user.id,
-            selected_partners=[] if nobody_selected else data.get("selected_partners", []),
-            nobody_selected=nobody_selected
-        )
-    )
+    # Оновлюємо клавіатуру (саме редагування відкладається та об'єднується з наступними)
+    keyboard_edits.schedule(callback.message, await render_partner_picker(state, callback.from_user.id))
 
     await callback.answer()
 
@@ -88,7 +142,6 @@ async def handle_partner_selection(
 
     # Якщо було вибрано "Нікого", знімаємо цей вибір при виборі партнера
     if nobody_selected:
-        nobody_selected = False
         await state.update_data(nobody_selected=False)
 
     # Додаємо або видаляємо партнера з списку
@@ -100,21 +153,74 @@ async def handle_partner_selection(
     # Оновлюємо список вибраних партнерів
     await state.update_data(selected_partners=selected_partners)
 
-    # Оновлюємо клавіатуру
-    users = await get_all_approved_users()
-    from keyboards import get_multiselect_partners_kb
-    await callback.message.edit_reply_markup(
-        reply_markup=get_multiselect_partners_kb(
-            users,
-            callback.from_user.id,
-            selected_partners=selected_partners,
-            nobody_selected=nobody_selected
-        )
-    )
+    # Оновлюємо клавіатуру (саме редагування відкладається та об'єднується з наступними)
+    keyboard_edits.schedule(callback.message, await render_partner_picker(state, callback.from_user.id))
 
     await callback.answer()
 
 
+async def handle_partner_navigation(
+    callback: types.CallbackQuery,
+    state: FSMContext
+) -> None:
+    """
+    Обробник гортання сторінок та пошуку у списку партнерів
+    
+    Args:
+        callback: Об'єкт колбеку
+        state: FSM контекст
+    """
+    if callback.data.startswith("partners_page_"):
+        await state.update_data(partner_page=int(callback.data.split("_")[2]))
+    elif callback.data == "partners_search":
+        await state.update_data(partner_search=True)
+        await callback.answer("🔍 Надішліть початок імені користувача повідомленням", show_alert=True)
+        return
+    elif callback.data == "partners_search_reset":
+        await state.update_data(partner_query=None, partner_search=False, partner_page=0)
+    else:
+        await callback.answer()
+        return
+
+    keyboard_edits.schedule(callback.message, await render_partner_picker(state, callback.from_user.id))
+    await callback.answer()
+
+
+async def handle_partner_filter_input(
+    message: types.Message,
+    state: FSMContext
+) -> None:
+    """
+    Обробник тексту для фільтрації списку партнерів після натискання "Пошук"
+    
+    Args:
+        message: Повідомлення з початком імені
+        state: FSM контекст
+    """
+    data = await state.get_data()
+    if not data.get("partner_search"):
+        # Повідомлення не є пошуковим запитом - передаємо його іншим обробникам
+        raise SkipHandler()
+
+    query = message.text.strip().lstrip("@")[:32]
+    await state.update_data(partner_query=query or None, partner_search=False, partner_page=0)
+
+    picker_message_id = data.get("picker_message_id")
+    if picker_message_id:
+        keyboard_edits.schedule_by_id(
+            message.bot,
+            message.chat.id,
+            picker_message_id,
+            await render_partner_picker(state, message.from_user.id)
+        )
+
+    # Прибираємо пошуковий запит з чату, щоб не засмічувати його
+    try:
+        await message.delete()
+    except Exception as e:
+        print(f"Помилка при видаленні пошукового запиту: {e}")
+
+
 def get_partners_text(
     selected_partners: List[int], 
     nobody_selected: bool, 
@@ -148,29 +254,6 @@ def get_partners_text(
     return ", ".join(partner_mentions)
 
 
-def format_time(minutes: float) -> str:
-    """Форматує час у хвилинах у зручний для читання формат (години та хвилини)
-    
-    Args:
-        minutes: Час у хвилинах
-        
-    Returns:
-        str: Відформатований час (наприклад, "2 год. 30 хв.")
-    """
-    if minutes is None or minutes == 0:
-        return "0 хв."
-        
-    hours = int(minutes // 60)
-    mins = int(minutes % 60)
-    
-    if hours > 0 and mins > 0:
-        return f"{hours} год. {mins} хв."
-    elif hours > 0:
-        return f"{hours} год."
-    else:
-        return f"{mins} хв."
-
-
 def calculate_duration(start_time: datetime.datetime) -> str:
     """
     Розраховує тривалість від вказаного часу до поточного моменту
@@ -196,4 +279,16 @@ def check_private_chat(message: types.Message) -> bool:
     Returns:
         True якщо чат приватний, інакше False
     """
-    return message.chat.type == "private" 
\ No newline at end of file
+    return message.chat.type == "private" 
+
+def is_admin(user_id: int) -> bool:
+    """
+    Перевіряє, чи є користувач адміністратором бота
+
+    Args:
+        user_id: ID користувача
+
+    Returns:
+        True якщо користувач є адміністратором, інакше False
+    """
+    return str(user_id) == str(ADMIN_ID)
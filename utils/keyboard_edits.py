@@ -0,0 +1,113 @@
+"""
+Відкладене редагування інлайн-клавіатур, що об'єднує часті зміни в одне редагування
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from services.metrics import metrics
+
+MessageKey = Tuple[int, int]
+
+
+def _same_markup(first: Optional[InlineKeyboardMarkup], second: Optional[InlineKeyboardMarkup]) -> bool:
+    """Порівнює дві клавіатури за вмістом"""
+    if first is None or second is None:
+        return first is second
+    return first.model_dump(exclude_none=True) == second.model_dump(exclude_none=True)
+
+
+class KeyboardEditCoalescer:
+    """
+    Застосовує зміни клавіатури повідомлення з затримкою (debounce).
+
+    Кожна нова зміна відкладає редагування ще на `delay` секунд, і в Telegram
+    відправляється остання клавіатура. Щоб при безперервних натисканнях
+    користувач усе ж бачив відгук, редагування відбувається не пізніше ніж
+    через `max_delay` секунд після першої невідправленої зміни. Редагування
+    без змін у розмітці пропускаються.
+    """
+
+    def __init__(self, delay: float = 0.4, max_delay: float = 1.5):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending: Dict[MessageKey, InlineKeyboardMarkup] = {}
+        self._first_at: Dict[MessageKey, float] = {}  # Коли надійшла перша невідправлена зміна
+        self._due_at: Dict[MessageKey, float] = {}  # Коли виконати редагування
+        self._applied: Dict[MessageKey, Optional[InlineKeyboardMarkup]] = {}
+        self._tasks: Dict[MessageKey, asyncio.Task] = {}
+
+    def schedule(self, message: Message, markup: InlineKeyboardMarkup) -> None:
+        """Планує заміну клавіатури повідомлення на markup"""
+        # Клавіатура повідомлення - це те, що зараз бачить користувач
+        self._schedule(message.bot, (message.chat.id, message.message_id), message.reply_markup, markup)
+
+    def schedule_by_id(self, bot: Bot, chat_id: int, message_id: int, markup: InlineKeyboardMarkup) -> None:
+        """Планує заміну клавіатури повідомлення, від якого відомий лише ID"""
+        self._schedule(bot, (chat_id, message_id), None, markup)
+
+    def _schedule(self, bot: Bot, key: MessageKey, current: Optional[InlineKeyboardMarkup],
+                  markup: InlineKeyboardMarkup) -> None:
+        if key not in self._applied:
+            self._applied[key] = current
+        self._pending[key] = markup
+        now = asyncio.get_running_loop().time()
+        first_at = self._first_at.setdefault(key, now)
+        self._due_at[key] = min(now + self.delay, first_at + self.max_delay)
+        metrics.inc("keyboard_edits.scheduled")
+
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._apply(bot, key))
+
+    def discard(self, message: Message) -> None:
+        """Скасовує заплановані редагування, наприклад перед видаленням повідомлення"""
+        key = (message.chat.id, message.message_id)
+        self._pending.pop(key, None)
+        self._first_at.pop(key, None)
+        self._due_at.pop(key, None)
+        self._applied.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    async def _apply(self, bot: Bot, key: MessageKey) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                # Кожна нова зміна відсуває момент редагування
+                while (wait := self._due_at.get(key, 0) - loop.time()) > 0:
+                    await asyncio.sleep(wait)
+                self._first_at.pop(key, None)
+                self._due_at.pop(key, None)
+                markup = self._pending.pop(key, None)
+                if markup is None:
+                    return
+
+                if _same_markup(markup, self._applied.get(key)):
+                    metrics.inc("keyboard_edits.skipped")
+                    continue
+
+                try:
+                    await bot.edit_message_reply_markup(chat_id=key[0], message_id=key[1], reply_markup=markup)
+                    self._applied[key] = markup
+                    metrics.inc("keyboard_edits.sent")
+                except TelegramRetryAfter as e:
+                    # Повторюємо пізніше, якщо за цей час не з'явилося новішої клавіатури
+                    self._pending.setdefault(key, markup)
+                    await asyncio.sleep(e.retry_after)
+                except TelegramBadRequest as e:
+                    if "message is not modified" in str(e):
+                        self._applied[key] = markup
+                    else:
+                        print(f"Помилка при оновленні клавіатури: {e}")
+                        return
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+                self._applied.pop(key, None)
+
+
+keyboard_edits = KeyboardEditCoalescer()
@@ -0,0 +1,162 @@
+"""
+Розбиття HTML-тексту на повідомлення в межах ліміту Telegram
+"""
+import asyncio
+import re
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Лише для підказки типу: розбиття тексту використовують процес-воркери, яким aiogram не потрібен
+    from aiogram.types import Message
+
+# Максимальна довжина повідомлення Telegram
+MESSAGE_LIMIT = 4096
+
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z0-9-]+)[^>]*>")
+_ENTITY_RE = re.compile(r"&#?\w+;")
+
+
+def text_length(text: str) -> int:
+    """Довжина тексту так, як її рахує Telegram (в UTF-16 одиницях)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _tokens(text: str) -> Iterator[Tuple[str, Optional[Tuple[bool, str, str]]]]:
+    """Розбиває текст на шматки тексту і теги, не розриваючи теги та HTML-сутності"""
+    position = 0
+    for match in _TAG_RE.finditer(text):
+        if match.start() > position:
+            yield from _text_tokens(text[position:match.start()])
+        yield match.group(0), (match.group(1) == "/", match.group(2).lower(), match.group(0))
+        position = match.end()
+    if position < len(text):
+        yield from _text_tokens(text[position:])
+
+
+def _text_tokens(text: str) -> Iterator[Tuple[str, None]]:
+    # Сутність на кшталт &amp; не можна розривати, тому вона йде окремим токеном
+    for part in re.findall(rf"{_ENTITY_RE.pattern}|[^&]+|&", text):
+        yield part, None
+
+
+def split_html(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Розбиває надто довгий HTML-текст на частини не довші за limit.
+
+    Частини по можливості розриваються на переносах рядків, а відкриті на
+    місці розриву теги закриваються в кінці частини і відкриваються знову
+    на початку наступної.
+    """
+    if text_length(text) <= limit:
+        return [text]
+
+    parts = []
+    current = ""
+    open_tags: List[Tuple[str, str]] = []
+
+    def closing() -> str:
+        return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+
+    def reopened() -> str:
+        return "".join(tag for _, tag in open_tags)
+
+    def flush() -> None:
+        nonlocal current
+        parts.append(current + closing())
+        current = reopened()
+
+    for token, tag in _tokens(text):
+        if tag is not None:
+            is_closing, name, raw = tag
+            # Для відкритого тегу потрібне місце і під його закриття
+            if not is_closing and current and text_length(current + raw + closing()) + len(name) + 3 > limit:
+                flush()
+            current += raw
+            if is_closing:
+                for i in range(len(open_tags) - 1, -1, -1):
+                    if open_tags[i][0] == name:
+                        del open_tags[i]
+                        break
+            else:
+                open_tags.append((name, raw))
+            continue
+
+        if _ENTITY_RE.fullmatch(token):
+            # Сутність або вміщується цілком, або переноситься на наступну сторінку
+            if text_length(current + token + closing()) > limit and current != reopened():
+                flush()
+            current += token
+            continue
+
+        # Звичайний текст ділимо на рядки, а занадто довгі рядки - на символи
+        for piece in re.split(r"(?<=\n)", token):
+            while piece:
+                room = limit - text_length(current + closing())
+                if text_length(piece) <= room:
+                    current += piece
+                    break
+                if current.strip() and "\n" in current:
+                    flush()
+                    continue
+                # Рядок довший за цілу сторінку - ріжемо посимвольно
+                cut = 0
+                while cut < len(piece) and text_length(piece[:cut + 1]) <= room:
+                    cut += 1
+                if cut == 0:
+                    flush()
+                    continue
+                current += piece[:cut]
+                piece = piece[cut:]
+                flush()
+
+    if current.strip():
+        parts.append(current + closing())
+    return [part for part in parts if part.strip()]
+
+
+def pack_blocks(blocks: Iterable[str], limit: int = MESSAGE_LIMIT) -> Iterator[str]:
+    """Жадібно пакує логічні блоки в повідомлення, не розриваючи блоки без потреби"""
+    current = ""
+    for block in blocks:
+        if not block:
+            continue
+        if text_length(current) + text_length(block) <= limit:
+            current += block
+            continue
+
+        if current:
+            yield current
+            current = ""
+        if text_length(block) <= limit:
+            current = block
+            continue
+
+        # Блок сам не вміщується в повідомлення - ділимо його з урахуванням тегів
+        *full, current = split_html(block, limit)
+        yield from full
+    if current:
+        yield current
+
+
+async def send_pages(message: "Message", pages: Iterable[str], **kwargs) -> int:
+    """
+    Надсилає сторінки по черзі, готуючи наступну, поки попередня відправляється.
+
+    Returns:
+        int: кількість надісланих повідомлень
+    """
+    kwargs.setdefault("parse_mode", "HTML")
+    sent = 0
+    in_flight: Optional[asyncio.Task] = None
+    try:
+        for page in pages:
+            if in_flight is not None:
+                await in_flight
+            in_flight = asyncio.create_task(message.answer(page, **kwargs))
+            sent += 1
+        if in_flight is not None:
+            await in_flight
+    finally:
+        if in_flight is not None and not in_flight.done():
+            in_flight.cancel()
+    return sent
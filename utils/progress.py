@@ -0,0 +1,103 @@
+"""
+Одне статусне повідомлення, що оновлюється під час довгих операцій
+"""
+import asyncio
+import time
+from typing import Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from services.metrics import metrics
+
+
+class ProgressReporter:
+    """
+    Показує хід виконання довгої операції в одному повідомленні.
+
+    Перше оновлення надсилає статус, наступні редагують його не частіше
+    ніж раз на `min_interval` секунд: етап, що надійшов раніше, запам'ятовується
+    і показується, щойно мине інтервал (проміжні етапи при цьому пропускаються),
+    а `finish` замінює статус першою сторінкою результату.
+    """
+
+    def __init__(self, message: Message, min_interval: float = 1.0):
+        self.message = message
+        self.min_interval = min_interval
+        self.status: Optional[Message] = None
+        self._text: Optional[str] = None
+        self._updated_at = 0.0
+        # Останній етап, який ще не показано через обмеження частоти
+        self._pending: Optional[Tuple[str, Optional[InlineKeyboardMarkup]]] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def update(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        """Показує новий етап виконання (за потреби - з інлайн-кнопками під статусом)"""
+        if text == self._text:
+            self._pending = None
+            return
+
+        now = time.monotonic()
+        if self.status is not None and now - self._updated_at < self.min_interval:
+            metrics.inc("progress.coalesced")
+            self._pending = (text, reply_markup)
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_pending())
+            return
+
+        self._pending = None
+        if self.status is None:
+            self.status = await self.message.answer(text, parse_mode="HTML", reply_markup=reply_markup)
+        else:
+            try:
+                await self.status.edit_text(text, parse_mode="HTML", reply_markup=reply_markup)
+            except TelegramBadRequest as e:
+                print(f"Помилка при оновленні статусу: {e}")
+                return
+
+        self._text = text
+        self._updated_at = now
+
+    async def _flush_pending(self) -> None:
+        """Показує відкладений етап, щойно мине інтервал між редагуваннями"""
+        try:
+            await asyncio.sleep(max(self._updated_at + self.min_interval - time.monotonic(), 0))
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+        if self._pending is not None:
+            text, reply_markup = self._pending
+            await self.update(text, reply_markup=reply_markup)
+
+    def _cancel_pending(self) -> None:
+        self._pending = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+    async def finish(self, text: str, **kwargs) -> Message:
+        """Замінює статус текстом результату і повертає повідомлення з ним"""
+        self._cancel_pending()
+        kwargs.setdefault("parse_mode", "HTML")
+        if self.status is not None and "reply_markup" not in kwargs:
+            try:
+                result = await self.status.edit_text(text, **kwargs)
+                self.status = None
+                return result
+            except TelegramBadRequest as e:
+                print(f"Помилка при оновленні статусу: {e}")
+
+        # Відповідь з reply-клавіатурою неможливо отримати редагуванням
+        await self.discard()
+        return await self.message.answer(text, **kwargs)
+
+    async def discard(self) -> None:
+        """Видаляє статусне повідомлення"""
+        self._cancel_pending()
+        if self.status is None:
+            return
+        try:
+            await self.status.delete()
+        except TelegramBadRequest:
+            pass
+        self.status = None